@@ -69,6 +69,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # The migration history cannot be replayed on an empty database
+        # (admin's first migration predates CustomUser), so build test
+        # tables straight from the models. A file rather than the shared
+        # in-memory database lets concurrent connections wait on locks.
+        'TEST': {'MIGRATE': False, 'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -138,8 +143,16 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 REST_FRAMEWORK = {
+    # application/json output is byte-identical to rest_framework's JSONRenderer
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'invoice_backend.renderers.ORJSONRenderer',
+        'invoice_backend.renderers.MessagePackRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'invoice_backend.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'invoice_backend.renderers.MessagePackParser',
     ],
      'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Invoice,Setting,Statement, Deposit,Buyer, CompanyBill, Salary, Other,BankingDeposit,Employee, OTP
+from .models import Invoice,Setting,Statement, Deposit,Buyer, CompanyBill, Salary, Other,BankingDeposit,Employee, OTP, InvoiceSequence
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
@@ -17,6 +17,7 @@ admin.site.register(Other)
 admin.site.register(Employee)
 admin.site.register(BankingDeposit)
 admin.site.register(OTP)
+admin.site.register(InvoiceSequence)
 # admin.site.register(RemainingAmount)
 
 
@@ -0,0 +1,101 @@
+"""
+Amounts in words using the Indian numbering system (lakh, crore).
+
+Produces the same text as num2words(value, to='currency', lang='en_IN',
+currency=...) for the currencies below, but from precomputed tables and
+with a bounded cache, so it is cheap enough to run for every invoice.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+_ONES = [
+    'zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine',
+    'ten', 'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen',
+    'seventeen', 'eighteen', 'nineteen',
+]
+_TENS = ['', '', 'twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy', 'eighty', 'ninety']
+
+# Largest scale first; each head below a scale is under 1000
+_SCALES = ((10 ** 7, 'crore'), (10 ** 5, 'lakh'), (1000, 'thousand'))
+
+# Same limit as num2words' en_IN converter
+MAX_AMOUNT = 10 ** 10
+
+# (singular, plural) names of the unit and the subunit
+CURRENCY_FORMS = {
+    'INR': (('rupee', 'rupees'), ('paisa', 'paise')),
+    'USD': (('dollar', 'dollars'), ('cent', 'cents')),
+    'EUR': (('euro', 'euro'), ('cent', 'cents')),
+    'GBP': (('pound sterling', 'pounds sterling'), ('penny', 'pence')),
+    'AUD': (('dollar', 'dollars'), ('cent', 'cents')),
+    'CAD': (('dollar', 'dollars'), ('cent', 'cents')),
+    'MXN': (('peso', 'pesos'), ('cent', 'cents')),
+    'SAR': (('saudi riyal', 'saudi riyals'), ('halalah', 'halalas')),
+    'RUB': (('rouble', 'roubles'), ('kopek', 'kopeks')),
+    'SEK': (('krona', 'kronor'), ('öre', 'öre')),
+    'NOK': (('krone', 'kroner'), ('øre', 'øre')),
+}
+
+
+def _below_thousand(n):
+    if n < 20:
+        return _ONES[n]
+    if n < 100:
+        tens, ones = divmod(n, 10)
+        return _TENS[tens] + ('-' + _ONES[ones] if ones else '')
+    hundreds, rest = divmod(n, 100)
+    words = _ONES[hundreds] + ' hundred'
+    return words + ' and ' + _below_thousand(rest) if rest else words
+
+
+_BELOW_THOUSAND = tuple(_below_thousand(n) for n in range(1000))
+
+
+@lru_cache(maxsize=4096)
+def cardinal(n):
+    """Words for a non-negative integer below MAX_AMOUNT"""
+    if n < 1000:
+        return _BELOW_THOUSAND[n]
+    if n >= MAX_AMOUNT:
+        raise OverflowError(f'abs({n}) must be less than {MAX_AMOUNT}.')
+    for scale, name in _SCALES:
+        if n >= scale:
+            head, rest = divmod(n, scale)
+            words = f'{_BELOW_THOUSAND[head]} {name}'
+            if rest:
+                # Like num2words: "and" only before a remainder under a hundred
+                words += (' and ' if rest < 100 else ', ') + cardinal(rest)
+            return words
+
+
+def split_amount(value):
+    """(units, subunits, negative) rounded half-up to two decimal places"""
+    amount = Decimal(value).quantize(Decimal('.01'), rounding=ROUND_HALF_UP)
+    negative = amount < 0
+    units, fraction = divmod(abs(amount), 1)
+    return int(units), int(fraction * 100), negative
+
+
+@lru_cache(maxsize=4096)
+def _currency_words(units, subunits, negative, currency):
+    try:
+        unit_forms, subunit_forms = CURRENCY_FORMS[currency]
+    except KeyError:
+        raise ValueError(f'No words for currency "{currency}"')
+    return '%s%s %s, %s %s' % (
+        'minus ' if negative else '',
+        cardinal(units),
+        unit_forms[0 if units == 1 else 1],
+        cardinal(subunits),
+        subunit_forms[0 if subunits == 1 else 1],
+    )
+
+
+def amount_in_words(value, currency='INR'):
+    """
+    e.g. 1234567.89 -> "twelve lakh, thirty-four thousand, five hundred and
+    sixty-seven rupees, eighty-nine paise". Integers are whole units.
+    Raises ValueError for currencies missing from CURRENCY_FORMS and
+    OverflowError from MAX_AMOUNT up.
+    """
+    return _currency_words(*split_amount(value), currency)
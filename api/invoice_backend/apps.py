@@ -1,9 +1,24 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def install_search_index(sender, using, **kwargs):
+    # Test databases are built from the models without running migrations,
+    # so the full-text index is (re)installed after every migrate as well
+    from django.db import connections
+    from . import search
+    search.install(connections[using])
 
 
 class InvoiceBackendConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField' #Sets the default type for auto-incrementing model IDs
     name = 'invoice_backend'  #Registers your app's name and location for Django
 
+    def ready(self):
+        post_migrate.connect(install_search_index, sender=self)
 
+        from . import dashboard
+        for model in dashboard.TRACKED_MODELS:
+            post_save.connect(dashboard.touch_owner, sender=model)
+            post_delete.connect(dashboard.touch_owner, sender=model)
 
@@ -0,0 +1,54 @@
+"""
+ETags for the endpoints the frontend re-fetches on every mount.
+
+The validators come from cheap per-user change markers, the row count and
+latest updated_at of each table behind the endpoint, so a request whose
+If-None-Match still matches is answered with 304 by django's condition()
+before the view queries or serializes anything. Counting rows catches
+deletes, which leave no updated_at behind.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
+
+from .serializers import UserSerializer
+
+
+def _digest(request, markers):
+    # The user, the query string (fields, cursor, year...) and the requested
+    # encoding (JSON or MessagePack) are part of the key
+    raw = repr((request.user.pk, request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), markers))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _wants_etag(request):
+    return request.method in ('GET', 'HEAD') and request.user.is_authenticated
+
+
+def table_marker(request, model):
+    """(row count, latest updated_at) of the user's rows, or of the whole table for shared lookups like Partner"""
+    queryset = model.objects.all()
+    if any(field.name == 'user' for field in model._meta.concrete_fields):
+        queryset = queryset.filter(user=request.user)
+    marker = queryset.aggregate(count=Count('pk'), changed=Max('updated_at'))
+    return marker['count'], marker['changed']
+
+
+def etag_on_changes(*models):
+    """condition() decorator whose ETag changes whenever a row of any of the models is saved or deleted"""
+    def etag(request, *args, **kwargs):
+        if not _wants_etag(request):
+            return None
+        return _digest(request, [table_marker(request, model) for model in models])
+    return condition(etag_func=etag)
+
+
+def _current_user_etag(request, *args, **kwargs):
+    if not _wants_etag(request):
+        return None
+    # The user row is already loaded by authentication, so this costs no query
+    return _digest(request, [getattr(request.user, name) for name in UserSerializer.Meta.fields])
+
+
+etag_on_current_user = condition(etag_func=_current_user_etag)
@@ -0,0 +1,77 @@
+"""
+The dashboard's counters and totals, from a few aggregate queries.
+
+Every save or delete of a tracked row bumps the owner's data_version
+(CustomUser.objects.touch), and the computed summary is cached under
+that version. The version is read from request.user, which
+authentication has already loaded, so a cache hit costs no query at all
+and a write makes the next read recompute without deleting anything.
+Because the version lives in the database, every process sees the bump
+even with a per-process cache.
+"""
+from django.core.cache import cache
+from django.db.models import Case, Count, F, Sum, When
+
+from .models import BILLED_INR, BankAccount, Buyer, CashEntry, Client, CompanyBill, CustomUser, Employee, Invoice, Other, Salary
+
+# The user's financial rows; saving or deleting one bumps data_version
+TRACKED_MODELS = (Invoice, CompanyBill, Buyer, Salary, Other, Employee, BankAccount, CashEntry)
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def touch_owner(sender, instance, **kwargs):
+    """post_save / post_delete receiver for TRACKED_MODELS"""
+    CustomUser.objects.touch(instance.user_id)
+
+
+def _amount(total):
+    return float(total or 0)
+
+
+def summary(user):
+    # Served from invoice_user_year_billed_idx alone, without reading the table
+    years = (
+        Invoice.objects.filter(user=user).values('financial_year').order_by('-financial_year')
+        .annotate(invoice_count=Count('pk'), total_billed=Sum(BILLED_INR))
+    )
+    financial_years = [{
+        'financial_year': year['financial_year'],
+        'invoice_count': year['invoice_count'],
+        'total_billed': _amount(year['total_billed']),
+    } for year in years]
+    total_billed = sum(year['total_billed'] for year in financial_years)
+
+    # Each invoice's outstanding balance is in its own currency (payments
+    # linked to it are too); in INR at the rate the invoice was billed at
+    outstanding = Invoice.objects.filter(user=user).aggregate(total=Sum(Case(
+        When(total_with_gst=0, then=F('outstanding')),
+        default=F('outstanding') * BILLED_INR / F('total_with_gst'))))['total']
+    bank = BankAccount.objects.filter(user=user, is_deleted=False).aggregate(accounts=Count('pk'), balance=Sum('amount'))
+    cash = CashEntry.objects.filter(user=user, is_deleted=False).aggregate(balance=Sum('amount'))
+
+    return {
+        'clients': Client.objects.filter(user=user).count(),
+        'employees': Employee.objects.filter(user=user).count(),
+        'invoice_count': sum(year['invoice_count'] for year in financial_years),
+        'total_billed': total_billed,
+        'outstanding_receivables': _amount(outstanding),
+        'financial_years': financial_years,
+        'bank_accounts': bank['accounts'],
+        'bank_balance': _amount(bank['balance']),
+        'cash_in_hand': _amount(cash['balance']),
+    }
+
+
+def cached_for_user(user, name, compute, *args):
+    """compute(user, *args), cached under the user's data version and the args"""
+    key = ':'.join([name, str(user.pk), str(user.data_version), *map(str, args)])
+    data = cache.get(key)
+    if data is None:
+        data = compute(user, *args)
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
+
+
+def cached_summary(user):
+    return cached_for_user(user, 'dashboard-summary', summary)
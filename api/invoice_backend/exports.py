@@ -0,0 +1,238 @@
+"""
+Streaming exports of invoices and the four banking transaction types.
+
+Rows are read in primary-key chunks (keyset, not OFFSET) as plain tuples
+and each chunk is encoded and handed out before the next one is read, so
+memory stays flat however many rows there are. The same generators back
+the export endpoint (StreamingHttpResponse) and the export_data command.
+
+XLSX is written with zipfile into a buffer that is emptied after every
+chunk; a workbook is a zip of XML parts and the rows go out as inline
+strings, so no spreadsheet library is needed and nothing accumulates.
+"""
+import csv
+import math
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Buyer, CompanyBill, Invoice, Other, Salary, financial_year_bounds
+
+CHUNK_SIZE = 2000
+
+
+class Dataset:
+    def __init__(self, model, date_field, columns):
+        self.model = model
+        self.date_field = date_field
+        self.columns = columns
+
+    def queryset(self, user=None, year=None, date_from=None, date_to=None):
+        queryset = self.model.objects.all()
+        if user is not None:
+            queryset = queryset.filter(user=user)
+        if year:
+            first, last = financial_year_bounds(year)
+            queryset = queryset.filter(**{f'{self.date_field}__range': (first, last)})
+        if date_from:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': date_from})
+        if date_to:
+            queryset = queryset.filter(**{f'{self.date_field}__lte': date_to})
+        return queryset
+
+
+DATASETS = {
+    'invoices': Dataset(Invoice, 'invoice_date', [
+        'id', 'invoice_number', 'financial_year', 'invoice_date', 'buyer_name', 'buyer_address', 'buyer_gst',
+        'consignee_name', 'consignee_gst', 'country', 'state', 'currency', 'Particulars', 'hsn_sac_code',
+        'total_hours', 'rate', 'base_amount', 'cgst', 'sgst', 'igst', 'taxtotal', 'total_with_gst',
+        'exchange_rate', 'inr_equivalent', 'amount_received', 'outstanding', 'amount_in_words', 'remark',
+    ]),
+    'company': Dataset(CompanyBill, 'transaction_date', [
+        'id', 'transaction_date', 'company_name', 'invoice_id', 'notice', 'amount', 'payment_method', 'bank_name',
+    ]),
+    'buyer': Dataset(Buyer, 'transaction_date', [
+        'id', 'transaction_date', 'buyer_name', 'notice', 'amount', 'payment_method', 'bank_name',
+    ]),
+    'salary': Dataset(Salary, 'salary_date', [
+        'id', 'salary_date', 'salary_name', 'salary_newname', 'salary_amount', 'payment_method', 'bank_name',
+    ]),
+    'other': Dataset(Other, 'other_date', [
+        'id', 'other_date', 'transaction_type', 'other_type', 'other_notice', 'other_amount',
+        'payment_method', 'bank_name', 'partner__name',
+    ]),
+}
+
+
+def chunks(queryset, columns, chunk_size=CHUNK_SIZE):
+    """Lists of value tuples, pk order, at most chunk_size rows each; columns must start with 'id'"""
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list(*columns)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1][0]
+
+
+class _Buffer:
+    """Write target that hands over what was written since the last take()"""
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.parts) if self.parts and isinstance(self.parts[0], bytes) else ''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def csv_stream(columns, row_chunks):
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.take()
+    for chunk in row_chunks:
+        writer.writerows(chunk)
+        yield buffer.take()
+
+
+def ndjson_stream(columns, row_chunks):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in row_chunks:
+        yield ''.join(encoder.encode(dict(zip(columns, row))) + '\n' for row in chunk)
+
+
+XLSX_MAX_ROWS = 1048576
+# Characters XML 1.0 does not allow, even escaped
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '{sheets}</Types>'
+)
+_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{sheets}</Relationships>'
+)
+_SHEET_RELATIONSHIP = (
+    '<Relationship Id="rId{n}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{n}.xml"/>'
+)
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def _cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, Decimal)) or (isinstance(value, float) and math.isfinite(value)):
+        return f'<c><v>{value}</v></c>'
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    text = escape(_XML_ILLEGAL.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(values):
+    return '<row>' + ''.join(_cell(value) for value in values) + '</row>'
+
+
+def xlsx_stream(columns, row_chunks):
+    """
+    A workbook with the rows on one sheet, continued on further sheets
+    (header repeated) past Excel's 1,048,576-row limit.
+    """
+    buffer = _Buffer()
+    workbook = zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED)
+    header = _row(columns)
+    sheets = 0
+    sheet = None
+    rows_on_sheet = XLSX_MAX_ROWS
+
+    for chunk in row_chunks:
+        start = 0
+        while start < len(chunk):
+            if rows_on_sheet == XLSX_MAX_ROWS:
+                if sheet:
+                    sheet.write(_SHEET_END.encode())
+                    sheet.close()
+                sheets += 1
+                sheet = workbook.open(f'xl/worksheets/sheet{sheets}.xml', 'w', force_zip64=True)
+                sheet.write((_SHEET_START + header).encode())
+                rows_on_sheet = 1
+            end = start + min(len(chunk) - start, XLSX_MAX_ROWS - rows_on_sheet)
+            sheet.write(''.join(_row(values) for values in chunk[start:end]).encode())
+            rows_on_sheet += end - start
+            start = end
+        yield buffer.take()
+
+    if not sheet:
+        sheets = 1
+        sheet = workbook.open('xl/worksheets/sheet1.xml', 'w')
+        sheet.write((_SHEET_START + header).encode())
+    sheet.write(_SHEET_END.encode())
+    sheet.close()
+
+    numbers = range(1, sheets + 1)
+    workbook.writestr('[Content_Types].xml', _CONTENT_TYPES.format(
+        sheets=''.join(_SHEET_CONTENT_TYPE.format(n=n) for n in numbers)))
+    workbook.writestr('_rels/.rels', _ROOT_RELS)
+    workbook.writestr('xl/workbook.xml', _WORKBOOK.format(sheets=''.join(
+        f'<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>' for n in numbers)))
+    workbook.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS.format(
+        sheets=''.join(_SHEET_RELATIONSHIP.format(n=n) for n in numbers)))
+    workbook.close()
+    yield buffer.take()
+
+
+FORMATS = {
+    'csv': (csv_stream, 'text/csv; charset=utf-8'),
+    'ndjson': (ndjson_stream, 'application/x-ndjson; charset=utf-8'),
+    'xlsx': (xlsx_stream, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def export(dataset_name, export_format, user=None, **filters):
+    """(content type, iterator of str/bytes pieces) for one export"""
+    dataset = DATASETS[dataset_name]
+    stream, content_type = FORMATS[export_format]
+    row_chunks = chunks(dataset.queryset(user, **filters), dataset.columns)
+    return content_type, stream(dataset.columns, row_chunks)
@@ -0,0 +1,122 @@
+"""
+One date-ordered feed of every banking transaction: company payments,
+buyer payments, salaries, other transactions and cash entries, each
+mapped onto the same columns (FEED_COLUMNS).
+
+A page is a single UNION ALL statement. Each branch is its table's
+filtered query, already sorted and cut to the page size, so the database
+merges at most page_size + 1 rows per branch; the filters and the keyset
+position are pushed into every branch, where the (user, date) indexes
+serve them. Rows are ordered newest first, then by type and newest id,
+and the position of the last row sent is the next page's cursor.
+"""
+from datetime import date
+
+from django.db import connection as default_connection
+from django.db.models import Case, CharField, F, Q, Value, When
+from django.db.models.functions import Abs
+
+from .models import Buyer, CashEntry, CompanyBill, Other, Salary
+
+FEED_COLUMNS = ['type', 'id', 'date', 'party', 'amount', 'direction', 'method', 'bank', 'note']
+# In the order rows of one day are listed
+TYPES = ('buyer', 'cash', 'company', 'other', 'salary')
+METHODS = ('Cash', 'Banking')
+
+
+def _text(value):
+    return Value(value, output_field=CharField())
+
+
+def _method():
+    # As the journal books it (settlement_account): the stored method, else
+    # Banking when a bank is named
+    return Case(When(payment_method__isnull=False, then=F('payment_method')),
+                When(~Q(bank_name=''), bank_name__isnull=False, then=_text('Banking')),
+                default=_text('Cash'), output_field=CharField())
+
+
+def _direction(out):
+    return Case(When(out, then=_text('out')), default=_text('in'), output_field=CharField())
+
+
+def branches(user):
+    """(type, queryset annotated with the feed columns) pairs; a type may have several"""
+    company = CompanyBill.objects.filter(user=user).annotate(
+        party=F('company_name'), value=F('amount'), direction=_text('in'), method=_method(), bank=F('bank_name'),
+        note=F('notice'))
+    return [
+        ('buyer', Buyer.objects.filter(user=user).annotate(
+            day=F('transaction_date'), party=F('buyer_name'), value=F('amount'), direction=_text('out'),
+            method=F('payment_method'), bank=F('bank_name'), note=F('notice'))),
+        ('cash', CashEntry.objects.filter(user=user, is_deleted=False).annotate(
+            day=F('date'), party=_text(''), value=Abs('amount'), direction=_direction(Q(amount__lt=0)),
+            method=_text('Cash'), bank=Value(None, output_field=CharField()), note=F('description'))),
+        # Undated payments are listed on the day they were recorded, as the ledger counts them. They
+        # are a branch of their own so the dated ones keep to the (user, transaction_date) index.
+        ('company', company.filter(transaction_date__isnull=False).annotate(day=F('transaction_date'))),
+        ('company', company.filter(transaction_date__isnull=True).annotate(day=F('recorded_on'))),
+        ('other', Other.objects.filter(user=user).annotate(
+            day=F('other_date'), party=F('other_notice'), value=Abs('other_amount'),
+            direction=_direction(Q(transaction_type='debit')), method=_method(), bank=F('bank_name'),
+            note=F('other_type'))),
+        ('salary', Salary.objects.filter(user=user).annotate(
+            day=F('salary_date'), party=F('salary_name'), value=F('salary_amount'), direction=_text('out'),
+            method=_method(), bank=F('bank_name'), note=_text(''))),
+    ]
+
+
+def _after(kind, position):
+    """Rows of one branch that sort after position (day, type, id) in the feed order"""
+    day, last_kind, last_id = position
+    if kind > last_kind:
+        return Q(day__lte=day)
+    if kind == last_kind:
+        return Q(day__lt=day) | Q(day=day, pk__lt=last_id)
+    return Q(day__lt=day)
+
+
+def transactions(user, types=TYPES, bank=None, method=None, date_from=None, date_to=None, after=None,
+                 limit=100, connection=default_connection):
+    """
+    A page of the feed as dicts of FEED_COLUMNS, and the position
+    (date, type, id) it ends on, None on the last page
+    """
+    parts, params = [], []
+    for kind, queryset in branches(user):
+        if kind not in types or (kind == 'cash' and (bank or method not in (None, 'Cash'))):
+            continue
+        if bank and kind != 'cash':
+            queryset = queryset.filter(bank_name=bank)
+        if method and kind != 'cash':
+            queryset = queryset.filter(method=method)
+        if date_from:
+            queryset = queryset.filter(day__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(day__lte=date_to)
+        if after is not None:
+            queryset = queryset.filter(_after(kind, after))
+        queryset = (queryset.annotate(kind=_text(kind))
+                    .values_list('kind', 'pk', 'day', 'party', 'value', 'direction', 'method', 'bank', 'note')
+                    .order_by('-day', '-pk')[:limit + 1])
+        sql, branch_params = queryset.query.sql_with_params()
+        parts.append(f'SELECT * FROM ({sql}) AS rows_{len(parts)}')
+        params += branch_params
+    if not parts:
+        return [], None
+
+    # Every branch selects the same columns in the same order; name them
+    # rather than rely on where Django puts the annotations
+    sql = (f"SELECT kind, pk, day, party, value, direction, method, bank, note "
+           f"FROM ({' UNION ALL '.join(parts)}) AS feed ORDER BY day DESC, kind, pk DESC LIMIT %s")
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, limit + 1])
+        rows = cursor.fetchall()
+
+    page = []
+    for kind, pk, day, party, amount, direction, row_method, row_bank, note in rows[:limit]:
+        page.append(dict(zip(FEED_COLUMNS, (
+            kind, pk, day if isinstance(day, date) else date.fromisoformat(str(day)[:10]), party or '',
+            float(amount or 0), direction, row_method, row_bank or None, note or ''))))
+    last = page[-1] if len(rows) > limit else None
+    return page, last and (last['date'], last['type'], last['id'])
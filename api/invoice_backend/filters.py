@@ -0,0 +1,208 @@
+from datetime import date
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from .feed import METHODS as FEED_METHODS, TYPES as FEED_TYPES
+from .models import financial_year_bounds, get_financial_year
+from .pagination import decode_position
+from .reports import DEFAULT_AGING_BUCKETS, PERIODS, SETTLED_TOLERANCE
+from .search import KINDS
+
+
+class InvoiceFilterSerializer(serializers.Serializer):
+    """Query parameters accepted by the invoice list. All are optional and combine with AND."""
+    buyer = serializers.CharField(required=False, help_text='Buyer name prefix (case-sensitive)')
+    gst = serializers.CharField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    amount_min = serializers.FloatField(required=False)
+    amount_max = serializers.FloatField(required=False)
+    currency = serializers.CharField(required=False)
+    country = serializers.CharField(required=False)
+    state = serializers.CharField(required=False)
+    year = serializers.CharField(required=False)
+    status = serializers.ChoiceField(['paid', 'unpaid'], required=False,
+                                     help_text='By outstanding amount, from the linked payments')
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """Query parameters of /api/search/"""
+    q = serializers.CharField()
+    kind = serializers.CharField(required=False, help_text='Comma-separated: ' + ', '.join(KINDS))
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    page = serializers.IntegerField(required=False, default=1, min_value=1)
+    page_size = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+
+    def validate_kind(self, value):
+        kinds = [kind.strip() for kind in value.split(',') if kind.strip()]
+        unknown = sorted(set(kinds) - set(KINDS))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown kinds: {', '.join(unknown)}")
+        return kinds
+
+
+class ExportFilterSerializer(serializers.Serializer):
+    """Query parameters of the exports; year and the dates combine with AND"""
+    year = serializers.RegexField(r'^\d{4}[/-]\d{4}$', required=False, help_text='Financial year, e.g. 2025/2026')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+
+class AgingQuerySerializer(serializers.Serializer):
+    """Query parameters of the receivables aging report"""
+    as_of = serializers.DateField(required=False, default=timezone.localdate)
+    buckets = serializers.CharField(required=False, default=','.join(map(str, DEFAULT_AGING_BUCKETS)),
+                                    help_text='Ascending bucket edges in days, e.g. 30,60,90')
+    page = serializers.IntegerField(required=False, default=1, min_value=1)
+    page_size = serializers.IntegerField(required=False, default=50, min_value=1, max_value=1000)
+
+    def validate_buckets(self, value):
+        try:
+            edges = tuple(int(edge) for edge in value.split(','))
+        except ValueError:
+            raise serializers.ValidationError('Bucket edges must be whole numbers of days')
+        if not 0 < len(edges) <= 12 or edges[0] < 1 or list(edges) != sorted(set(edges)):
+            raise serializers.ValidationError('Give 1 to 12 distinct ascending edges, each at least 1 day')
+        return edges
+
+
+class ReportDateSerializer(serializers.Serializer):
+    """Query parameters of reports taken as of a single date"""
+    as_of = serializers.DateField(required=False, default=timezone.localdate)
+
+
+class DateRangeSerializer(serializers.Serializer):
+    """
+    A financial year, narrowed by the dates when given; with neither, the
+    financial year so far.
+    """
+    year = serializers.RegexField(r'^\d{4}[/-]\d{4}$', required=False, help_text='Financial year, e.g. 2025/2026')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if 'year' in attrs:
+            first, last = financial_year_bounds(attrs.pop('year'))
+            attrs['date_from'] = max(attrs.get('date_from', first), first)
+            attrs['date_to'] = min(attrs.get('date_to', last), last)
+        else:
+            attrs.setdefault('date_to', timezone.localdate())
+            attrs.setdefault('date_from', financial_year_bounds(get_financial_year(attrs['date_to']))[0])
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError('date_from is after date_to')
+        return attrs
+
+
+class StatementQuerySerializer(DateRangeSerializer):
+    """Query parameters of the income and expenditure statement"""
+    period = serializers.ChoiceField(PERIODS, required=False, default='month')
+
+
+class TrialBalanceQuerySerializer(ReportDateSerializer):
+    """Query parameters of the trial balance"""
+    account = serializers.CharField(required=False, help_text="Account name prefix, e.g. 'Bank:' for every bank")
+
+
+class AccountLedgerQuerySerializer(DateRangeSerializer):
+    """Query parameters of one account's journal lines"""
+    account = serializers.CharField()
+
+
+class CashBookQuerySerializer(DateRangeSerializer):
+    """Query parameters of the cash book; ?from= and ?to= are short for date_from and date_to"""
+    cursor = serializers.CharField(required=False)
+    page_size = serializers.IntegerField(required=False, default=100, min_value=1, max_value=1000)
+
+    def to_internal_value(self, data):
+        data = data.copy()
+        for short, name in (('from', 'date_from'), ('to', 'date_to')):
+            if short in data and name not in data:
+                data[name] = data[short]
+        return super().to_internal_value(data)
+
+    def validate_cursor(self, value):
+        try:
+            # (date, source_type, source_id, balance) of the last entry sent
+            return decode_position(value, date.fromisoformat, str, int, float)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+
+
+class TransactionFeedQuerySerializer(serializers.Serializer):
+    """Query parameters of /api/transactions/; all optional, they combine with AND"""
+    type = serializers.CharField(required=False, help_text='Comma-separated: ' + ', '.join(FEED_TYPES))
+    bank = serializers.CharField(required=False, help_text='Bank name; leaves out cash entries')
+    method = serializers.ChoiceField(FEED_METHODS, required=False)
+    year = serializers.RegexField(r'^\d{4}[/-]\d{4}$', required=False, help_text='Financial year, e.g. 2025/2026')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    cursor = serializers.CharField(required=False)
+    page_size = serializers.IntegerField(required=False, default=100, min_value=1, max_value=1000)
+
+    def validate_type(self, value):
+        types = [kind.strip() for kind in value.split(',') if kind.strip()]
+        unknown = sorted(set(types) - set(FEED_TYPES))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown types: {', '.join(unknown)}")
+        return tuple(types)
+
+    def validate_cursor(self, value):
+        try:
+            # (date, type, id) of the last row sent
+            return decode_position(value, date.fromisoformat, str, int)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+
+    def validate(self, attrs):
+        if 'year' in attrs:
+            first, last = financial_year_bounds(attrs.pop('year'))
+            attrs['date_from'] = max(attrs.get('date_from', first), first)
+            attrs['date_to'] = min(attrs.get('date_to', last), last)
+        if attrs.get('date_from') and attrs.get('date_to') and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError('date_from is after date_to')
+        return attrs
+
+
+def _prefix_range(prefix):
+    # "starts with" as a range, so a plain b-tree index on the column can
+    # serve it on every backend (LIKE can't use one on SQLite)
+    return prefix, prefix + '\U0010ffff'
+
+
+def filter_invoices(queryset, query_params):
+    """
+    Narrow queryset by the invoice list query parameters.
+    Raises ValidationError (400) on malformed values.
+    """
+    params = InvoiceFilterSerializer(data=query_params)
+    params.is_valid(raise_exception=True)
+    filters = params.validated_data
+
+    if 'buyer' in filters:
+        low, high = _prefix_range(filters['buyer'])
+        queryset = queryset.filter(buyer_name__gte=low, buyer_name__lt=high)
+    if 'gst' in filters:
+        queryset = queryset.filter(buyer_gst=filters['gst'])
+    if 'date_from' in filters:
+        queryset = queryset.filter(invoice_date__gte=filters['date_from'])
+    if 'date_to' in filters:
+        queryset = queryset.filter(invoice_date__lte=filters['date_to'])
+    if 'amount_min' in filters:
+        queryset = queryset.filter(total_with_gst__gte=filters['amount_min'])
+    if 'amount_max' in filters:
+        queryset = queryset.filter(total_with_gst__lte=filters['amount_max'])
+    if 'currency' in filters:
+        queryset = queryset.filter(currency=filters['currency'])
+    if 'country' in filters:
+        queryset = queryset.filter(country=filters['country'])
+    if 'state' in filters:
+        queryset = queryset.filter(state=filters['state'])
+    if 'year' in filters:
+        queryset = queryset.filter(financial_year=filters['year'])
+    if filters.get('status') == 'unpaid':
+        queryset = queryset.filter(outstanding__gt=SETTLED_TOLERANCE)
+    elif filters.get('status') == 'paid':
+        queryset = queryset.filter(outstanding__lte=SETTLED_TOLERANCE)
+    return queryset
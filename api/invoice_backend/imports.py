@@ -0,0 +1,413 @@
+"""
+Bulk import of invoices and the four banking transaction types from CSV
+or XLSX, the datasets and columns exports.py writes.
+
+The file is read as a stream of rows: CSV with the csv module, XLSX with
+zipfile and an incremental XML parse of each worksheet, each row dropped
+once read. Header cells name serializer fields, case-insensitively;
+other columns (ids, computed totals) are ignored. Rows are handled in
+chunks of CHUNK_SIZE. Each row is validated with the dataset's API
+serializer, so a row is accepted exactly when the form would accept it.
+The chunk's valid rows are then inserted with bulk_create in one
+transaction, together with what save() would have done for each of them:
+invoice numbers, Other's debit/credit sign, the invoice a payment names,
+search documents, journal lines, client totals and ledger periods. Rows
+that fail are stored as ImportRowErrors, and the job's counts and
+progress are saved after every chunk, so memory stays flat and the job
+can be polled while it runs.
+
+Invoices keep the numbers in the file, and the financial year's sequence
+moves past them; rows without one are numbered as the API would. A
+number already used in its financial year is a row error.
+"""
+import csv
+import io
+import re
+import threading
+import zipfile
+from datetime import date, timedelta
+from xml.etree.ElementTree import ParseError as XMLParseError, iterparse
+
+from django.db import connections, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError, ValidationError
+
+from .models import (Buyer, CompanyBill, CustomUser, ImportJob, ImportRowError, Invoice, JournalLine, Other, Partner,
+                     Salary, SearchDocument, SearchIndexed, get_financial_year)
+from .serializers import (BuyerSerializer, CompanyBillSerializer, InvoiceSerializer, OtherSerializer,
+                          SalarySerializer)
+
+CHUNK_SIZE = 2000
+
+
+def _size(stream):
+    position = stream.tell()
+    size = stream.seek(0, io.SEEK_END)
+    stream.seek(position)
+    return size or 1
+
+
+def read_csv(stream):
+    """Yield (line number, cells, share of the file read) per row of a CSV file, the header first"""
+    size = _size(stream)
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for row in reader:
+        yield reader.line_num, row, min(stream.tell() / size, 1.0)
+
+
+_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_SHEET_NAME = re.compile(r'xl/worksheets/sheet(\d+)\.xml')
+
+
+def _column(reference):
+    """Zero-based column of a cell reference such as 'AB12'"""
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord('A') + 1
+    return index - 1
+
+
+def _text(element):
+    # Rich text is split into runs
+    return ''.join(node.text or '' for node in element.iter(f'{_MAIN}t'))
+
+
+class _Number(str):
+    """Text of a numeric XLSX cell, which may be a date stored as a day count"""
+
+
+def _cell(cell, strings):
+    kind = cell.get('t')
+    if kind == 'inlineStr':
+        return _text(cell)
+    value = cell.find(f'{_MAIN}v')
+    value = (value.text or '') if value is not None else ''
+    if kind == 's':
+        return strings[int(value)]
+    if kind == 'b':
+        return 'true' if value == '1' else 'false'
+    return _Number(value) if kind in (None, 'n') and value else value
+
+
+def read_xlsx(stream):
+    """
+    Yield (row number, cells, share of the file read) per row of every
+    worksheet of an XLSX workbook, in sheet order, the header first; a
+    later sheet repeating the header (as exports write past a sheet's
+    row limit) continues the rows.
+    """
+    try:
+        workbook = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise ParseError('The file is not an XLSX workbook')
+    sheets = sorted((info for info in workbook.infolist() if _SHEET_NAME.fullmatch(info.filename)),
+                    key=lambda info: int(_SHEET_NAME.fullmatch(info.filename)[1]))
+    if not sheets:
+        raise ParseError('The workbook has no worksheets')
+
+    # Text cells written by Excel point into one table of shared strings
+    strings = []
+    if 'xl/sharedStrings.xml' in workbook.namelist():
+        with workbook.open('xl/sharedStrings.xml') as part:
+            for _, element in iterparse(part):
+                if element.tag == f'{_MAIN}si':
+                    strings.append(_text(element))
+                    element.clear()
+
+    total, done, header = sum(info.file_size for info in sheets) or 1, 0, None
+    try:
+        for info in sheets:
+            first, number = True, 0
+            with workbook.open(info) as sheet:
+                sheet_data = None
+                for event, element in iterparse(sheet, events=('start', 'end')):
+                    if event == 'start':
+                        if element.tag == f'{_MAIN}sheetData':
+                            sheet_data = element
+                        continue
+                    if element.tag != f'{_MAIN}row':
+                        continue
+                    cells = []
+                    for cell in element.iter(f'{_MAIN}c'):
+                        column = _column(cell.get('r')) if cell.get('r') else len(cells)
+                        cells.extend([''] * (column - len(cells)))
+                        cells.append(_cell(cell, strings))
+                    # Rows may leave out their number when they follow on
+                    number = int(element.get('r') or number + 1)
+                    # Read rows are dropped, so a sheet of any size takes no memory
+                    sheet_data.clear()
+                    if first and header is not None and cells == header:
+                        first = False
+                        continue
+                    first = False
+                    if header is None:
+                        header = cells
+                    yield number, cells, (done + sheet.tell()) / total
+            done += info.file_size
+    except XMLParseError as exc:
+        raise ParseError(f'The workbook is damaged: {exc}')
+
+
+READERS = {'csv': read_csv, 'xlsx': read_xlsx}
+
+
+def import_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension not in READERS:
+        raise ParseError(f"Unsupported file format {extension!r}; upload a .csv or .xlsx file")
+    return extension
+
+
+# Dates in XLSX cells are days since this one, up to 9999-12-31
+_EXCEL_EPOCH = date(1899, 12, 30)
+_LAST_SERIAL = 2958465
+
+
+def _excel_date(value):
+    """ISO date of an XLSX day count; anything else is left for the serializer to reject"""
+    try:
+        days = float(value)
+    except ValueError:
+        return value
+    if not 0 < days <= _LAST_SERIAL:
+        return value
+    return (_EXCEL_EPOCH + timedelta(days=int(days))).isoformat()
+
+
+class Dataset:
+    """How the rows of one dataset are validated and inserted"""
+    # Set by the import rather than read from the file
+    exclude = ('user',)
+    # Header spellings of columns read by prepare() rather than the serializer
+    extra_columns = {}
+
+    def __init__(self, model, serializer_class):
+        self.model = model
+        self.serializer_class = serializer_class
+
+    def serializer(self):
+        """The serializer rows are validated with, cut to the fields a file can set"""
+        fields = [name for name, field in self.serializer_class().fields.items()
+                  if not field.read_only and name not in self.exclude]
+        return self.serializer_class(fields=fields)
+
+    def columns(self, serializer, header):
+        """{cell index: field name} of the header cells naming a field"""
+        names = {name.lower(): name for name in serializer.fields}
+        names.update(self.extra_columns)
+        return {index: names[cell.strip().lower()] for index, cell in enumerate(header)
+                if cell.strip().lower() in names}
+
+    def build(self, user_id, validated, data):
+        """The unsaved row of validated, which the serializer validated from data"""
+        return self.model(user_id=user_id, **validated)
+
+    def prepare(self, user_id, objects, extras):
+        """
+        Per-chunk lookups before the insert, in its transaction; returns
+        {position in objects: errors} of the rows to leave out
+        """
+        return {}
+
+    def insert(self, user_id, objects):
+        created = self.model.objects.bulk_create(objects, batch_size=500)
+        # What save() and its receivers do for a single row
+        if issubclass(self.model, SearchIndexed):
+            SearchDocument.objects.index(created)
+        JournalLine.objects.post(created)
+        CustomUser.objects.touch(user_id)
+        return created
+
+
+class InvoiceDataset(Dataset):
+    def build(self, user_id, validated, data):
+        # Without a number in the file the invoice is numbered, rather than given the field default
+        invoice = super().build(user_id, validated, data)
+        if 'invoice_number' not in data:
+            invoice.invoice_number = None
+        return invoice
+
+    def prepare(self, user_id, objects, extras):
+        errors, seen, numbered = {}, set(), {}
+        for position, invoice in enumerate(objects):
+            if invoice.invoice_number:
+                key = (get_financial_year(invoice.invoice_date), invoice.invoice_number)
+                if key in seen:
+                    errors[position] = {'invoice_number': [f'{key[1]} appears twice in {key[0]}']}
+                seen.add(key)
+                numbered.setdefault(key, position)
+        used = (Invoice.objects.filter(user_id=user_id, financial_year__in={year for year, _ in seen},
+                                       invoice_number__in={number for _, number in seen})
+                .values_list('financial_year', 'invoice_number'))
+        for year, number in used.iterator():
+            if (year, number) in numbered:
+                errors[numbered[(year, number)]] = {'invoice_number': [f'{number} is already used in {year}']}
+        return errors
+
+    def insert(self, user_id, objects):
+        return Invoice.objects.bulk_create_numbered(objects, keep_numbers=True)
+
+
+class CompanyDataset(Dataset):
+    def prepare(self, user_id, objects, extras):
+        # The invoice each payment names, as CompanyBill.save() resolves it: the latest with the
+        # number, with the fields the payment's journal entries read
+        numbers = {payment.invoice_id for payment in objects if payment.invoice_id}
+        invoices = {invoice.invoice_number: invoice for invoice in (
+            Invoice.objects.filter(user_id=user_id, invoice_number__in=numbers).order_by('pk')
+            .only('pk', 'invoice_number', 'buyer_name', 'total_with_gst', 'inr_equivalent'))}
+        for payment in objects:
+            payment.linked_invoice = invoices.get(payment.invoice_id)
+        return {}
+
+    def insert(self, user_id, objects):
+        created = super().insert(user_id, objects)
+        Invoice.objects.refresh_payments(payment.linked_invoice_id for payment in created)
+        return created
+
+
+class OtherDataset(Dataset):
+    # The partner is named in the file; partner_id would look each row's partner up alone
+    exclude = ('user', 'partner_id')
+    extra_columns = {'partner': 'partner', 'partner__name': 'partner'}
+
+    def build(self, user_id, validated, data):
+        other = super().build(user_id, validated, data)
+        other.sign_amount()
+        return other
+
+    def prepare(self, user_id, objects, extras):
+        names = {extra['partner'] for extra in extras if 'partner' in extra}
+        partners = dict(Partner.objects.filter(name__in=names).values_list('name', 'pk'))
+        errors = {}
+        for position, (other, extra) in enumerate(zip(objects, extras)):
+            if 'partner' in extra:
+                other.partner_id = partners.get(extra['partner'])
+                if other.partner_id is None:
+                    errors[position] = {'partner': [f"No partner named {extra['partner']!r}"]}
+        return errors
+
+
+DATASETS = {
+    'invoices': InvoiceDataset(Invoice, InvoiceSerializer),
+    'company': CompanyDataset(CompanyBill, CompanyBillSerializer),
+    'buyer': Dataset(Buyer, BuyerSerializer),
+    'salary': Dataset(Salary, SalarySerializer),
+    'other': OtherDataset(Other, OtherSerializer),
+}
+
+
+def _import_chunk(job, dataset, serializer, chunk):
+    """Validate and insert one chunk of (row number, {column: value}); returns the rows imported"""
+    errors, numbers, objects, extras = [], [], [], []
+    for number, data in chunk:
+        extra = {name: data.pop(name) for name in set(dataset.extra_columns.values()) if name in data}
+        try:
+            validated = serializer.run_validation(data)
+        except ValidationError as exc:
+            errors.append(ImportRowError(job=job, row=number, errors=serializers.as_serializer_error(exc)))
+            continue
+        numbers.append(number)
+        objects.append(dataset.build(job.user_id, validated, data))
+        extras.append(extra)
+
+    with transaction.atomic():
+        rejected = dataset.prepare(job.user_id, objects, extras)
+        errors += [ImportRowError(job=job, row=numbers[position], errors=row_errors)
+                   for position, row_errors in rejected.items()]
+        objects = [obj for position, obj in enumerate(objects) if position not in rejected]
+        if objects:
+            dataset.insert(job.user_id, objects)
+        ImportRowError.objects.bulk_create(sorted(errors, key=lambda error: error.row))
+    return len(objects)
+
+
+def run(job, stream, chunk_size=CHUNK_SIZE, report=None):
+    """
+    Import stream into job's dataset, saving the job's counts after every
+    chunk and calling report(job) if given. A file that cannot be read
+    fails the job with the reason as its message.
+    """
+    def save(*fields):
+        job.save(update_fields=['status', 'rows', 'imported', 'failed', 'progress', 'updated_at', *fields])
+
+    def flush(chunk, progress):
+        imported = _import_chunk(job, dataset, serializer, chunk)
+        job.rows += len(chunk)
+        job.imported += imported
+        job.failed += len(chunk) - imported
+        job.progress = progress
+        save()
+        if report:
+            report(job)
+
+    try:
+        dataset = DATASETS[job.dataset]
+        serializer = dataset.serializer()
+        rows = READERS[import_format(job.filename)](stream)
+        job.status = 'running'
+        save()
+        _, header, _ = next(rows, (None, [], None))
+        columns = dataset.columns(serializer, header)
+        if not columns:
+            raise ParseError(f'The first row names no {job.dataset} columns')
+        date_fields = {name for name, field in serializer.fields.items() if isinstance(field, serializers.DateField)}
+
+        chunk, progress = [], 0.0
+        for number, cells, progress in rows:
+            data = {name: cells[index] for index, name in columns.items()
+                    if index < len(cells) and cells[index].strip()}
+            if not data:
+                continue
+            for name in date_fields & data.keys():
+                # XLSX date cells hold a day count; the serializer reads ISO dates
+                if isinstance(data[name], _Number):
+                    data[name] = _excel_date(data[name])
+            chunk.append((number, data))
+            if len(chunk) == chunk_size:
+                flush(chunk, progress)
+                chunk = []
+        if chunk:
+            flush(chunk, progress)
+    except ParseError as exc:
+        job.status, job.message = 'failed', str(exc.detail)
+    except Exception as exc:
+        job.status, job.message, job.finished_at = 'failed', str(exc), timezone.now()
+        save('message', 'finished_at')
+        raise
+    else:
+        job.status, job.progress = 'done', 1.0
+    job.finished_at = timezone.now()
+    save('message', 'finished_at')
+    return job
+
+
+def run_upload(job_id):
+    """Import a job's uploaded file, then delete it"""
+    job = ImportJob.objects.get(pk=job_id)
+    try:
+        with job.file.open('rb') as stream:
+            run(job, stream)
+    finally:
+        job.file.delete(save=False)
+        job.save(update_fields=['file'])
+
+
+def _run_in_thread(job_id):
+    try:
+        run_upload(job_id)
+    finally:
+        connections.close_all()
+
+
+def start(job):
+    """
+    Import the job's upload in a background thread once the job is
+    committed. The thread does not outlive the process: a job cut short
+    is failed by ImportJob.objects.fail_stale() when next polled.
+    """
+    transaction.on_commit(lambda: threading.Thread(
+        target=_run_in_thread, args=(job.pk,), name=f'import-{job.pk}', daemon=True).start())
@@ -0,0 +1,107 @@
+"""
+Account balances as of any date from monthly closing snapshots of the
+journal.
+
+JournalLine is the one ledger: every source posts its lines there, and
+the trial balance sums them as they are. Accounts kept per party (the
+buyers of receivables, the payees of salaries, the notices of other
+transactions) are split by JournalLine.party. LedgerSnapshot keeps, per
+user and month, the debit and credit totals of every account and party
+up to the end of that month. A balance as of a date is the snapshot of
+the month before plus the lines dated since the first of the month, so
+it reads one month of rows however long the history is.
+
+Totals here are gross of reversals: a reversal takes its amount off the
+side of the line it cancels, so an edited salary counts as paid once
+rather than as paid, refunded and paid again. Balances are the same
+either way.
+
+Snapshots are built lazily, up to the month before the date asked for,
+rolling forward from the last built month. Posting lines reopens the
+periods from the month of the earliest on (JournalLine.objects.post calls
+LedgerSnapshot.objects.invalidate); later periods are rebuilt by the next
+read and earlier ones are left alone.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, Q, Sum, When
+
+from .models import CustomUser, JournalLine, LedgerSnapshot, month_start, previous_month
+
+# A line's debit and credit, with a reversal's moved to the side it cancels
+GROSS_DEBIT = Case(When(reversal=True, then=-F('credit')), default=F('debit'))
+GROSS_CREDIT = Case(When(reversal=True, then=-F('debit')), default=F('credit'))
+
+
+def flows(user, start, end):
+    """The user's journal lines dated start..end inclusive (start None: from the first)"""
+    dated = Q(date__lte=end) if start is None else Q(date__range=(start, end))
+    return JournalLine.objects.filter(dated, user=user)
+
+
+def _totals(user, start, end, by_day=False):
+    """{(day or None, account, party): [debit, credit]} of the lines, summed in SQL"""
+    columns = ['date', 'account', 'party'] if by_day else ['account', 'party']
+    return {
+        (row.get('date'), row['account'], row['party']): [float(row['debits']), float(row['credits'])]
+        for row in flows(user, start, end).values(*columns).order_by()
+        .annotate(debits=Sum(GROSS_DEBIT), credits=Sum(GROSS_CREDIT))
+    }
+
+
+def next_month(month):
+    return (month + timedelta(days=31)).replace(day=1)
+
+
+def close_through(user, through):
+    """Build the user's missing snapshots up to the month starting on through"""
+    with transaction.atomic():
+        # Locks the user row, which invalidate() updates, for the roll
+        closed = (CustomUser.objects.select_for_update().filter(pk=user.pk)
+                  .values_list('ledger_closed_through', flat=True).get())
+        if closed is not None and closed >= through:
+            return
+        running = defaultdict(lambda: [0.0, 0.0])
+        if closed is not None:
+            for account, party, debit, credit in LedgerSnapshot.objects.filter(
+                    user=user, period=closed).values_list('account', 'party', 'debit', 'credit'):
+                running[(account, party)] = [debit, credit]
+        movements = defaultdict(list)
+        start = next_month(closed) if closed is not None else None
+        for (day, *key), (debit, credit) in _totals(user, start, next_month(through) - timedelta(days=1),
+                                                    by_day=True).items():
+            movements[month_start(day)].append((tuple(key), debit, credit))
+
+        month = start or min(movements, default=through)
+        snapshots = []
+        while month <= through:
+            for key, debit, credit in movements.get(month, ()):
+                running[key][0] += debit
+                running[key][1] += credit
+            snapshots.extend(
+                LedgerSnapshot(user=user, period=month, account=account, party=party, debit=debit, credit=credit)
+                for (account, party), (debit, credit) in running.items())
+            month = next_month(month)
+        LedgerSnapshot.objects.bulk_create(snapshots, batch_size=1000, ignore_conflicts=True)
+        CustomUser.objects.filter(pk=user.pk).update(ledger_closed_through=through)
+
+
+def balances(user, as_of):
+    """
+    {(account, party): (debit, credit)} of every line dated on or before
+    as_of: the closing snapshot of the month before plus this month's
+    lines.
+    """
+    month = month_start(as_of)
+    closed = previous_month(month)
+    close_through(user, closed)
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for account, party, debit, credit in LedgerSnapshot.objects.filter(
+            user=user, period=closed).values_list('account', 'party', 'debit', 'credit'):
+        totals[(account, party)] = [debit, credit]
+    for (_, *key), (debit, credit) in _totals(user, month, as_of).items():
+        totals[tuple(key)][0] += debit
+        totals[tuple(key)][1] += credit
+    return {key: tuple(total) for key, total in totals.items()}
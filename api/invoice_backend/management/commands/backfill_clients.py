@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from invoice_backend.models import Client, Invoice
+
+
+class Command(BaseCommand):
+    help = 'Group existing invoices into clients by buyer name, address and GSTIN, and count their aggregates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_pk = 0
+        linked = 0
+
+        # Walk the table by primary key so each chunk is an index range scan
+        while True:
+            chunk = list(
+                Invoice.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', 'user', 'buyer_name', 'buyer_address', 'buyer_gst', 'client', 'updated_at')[:chunk_size]
+            )
+            if not chunk:
+                break
+            now = timezone.now()
+            with transaction.atomic():
+                Client.objects.attach(chunk)
+                for invoice in chunk:
+                    invoice.updated_at = now
+                Invoice.objects.bulk_update(chunk, ['client', 'updated_at'])
+            last_pk = chunk[-1].pk
+            linked += len(chunk)
+
+        # Recount every client once, after all of its invoices are linked
+        client_ids = list(Client.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(client_ids), chunk_size):
+            with transaction.atomic():
+                Client.objects.refresh(client_ids[start:start + chunk_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{linked} invoices linked to {Client.objects.count()} clients'))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from invoice_backend.models import Client, CompanyBill, Invoice, JournalLine
+
+# Columns written by Invoice.calculate_totals()
+COMPUTED_FIELDS = ['base_amount', 'cgst', 'sgst', 'igst', 'taxtotal', 'total_with_gst',
+                   'inr_equivalent', 'amount_in_words', 'outstanding']
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored tax, total, INR equivalent and amount in words columns of existing invoices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_pk = 0
+        updated = 0
+
+        # Walk the table by primary key so each chunk is an index range scan
+        while True:
+            chunk = list(Invoice.objects.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+            if not chunk:
+                break
+            now = timezone.now()
+            for invoice in chunk:
+                invoice.calculate_totals()
+                invoice.updated_at = now
+            with transaction.atomic():
+                # bulk_update() skips auto_now, and updated_at is what list ETags are built from
+                Invoice.objects.bulk_update(chunk, COMPUTED_FIELDS + ['updated_at'])
+                # Client totals are sums of the INR equivalents just written
+                Client.objects.refresh(invoice.client_id for invoice in chunk)
+                # The journal holds the old totals, and the payments booked at the old rates;
+                # repost the changed entries, which reopens the ledger snapshots after them
+                JournalLine.objects.post(chunk)
+                JournalLine.objects.post(CompanyBill.objects.filter(linked_invoice__in=chunk)
+                                         .select_related('linked_invoice'))
+            last_pk = chunk[-1].pk
+            updated += len(chunk)
+            self.stdout.write(f'{updated} invoices updated')
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully recomputed totals for {updated} invoices'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from invoice_backend.models import Buyer, CashEntry, CompanyBill, Invoice, JournalLine, Other, Salary
+
+# Every model that posts into the journal on save
+JOURNALED_MODELS = [Invoice, CompanyBill, Buyer, Salary, Other, CashEntry]
+
+
+class Command(BaseCommand):
+    help = ('Post the journal entries of existing invoices and transactions. Rows already posted as they '
+            'are post nothing, so the command can be re-run; rows changed outside save() are reversed and reposted.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        posted = 0
+
+        for model in JOURNALED_MODELS:
+            last_pk = 0
+            seen = 0
+            # Walk each table by primary key so each chunk is an index range scan
+            while True:
+                rows = model.objects.filter(pk__gt=last_pk).order_by('pk')
+                if model is CompanyBill:
+                    # Payments are booked at their invoice's exchange rate
+                    rows = rows.select_related('linked_invoice')
+                chunk = list(rows[:chunk_size])
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    posted += len(JournalLine.objects.post(chunk))
+                last_pk = chunk[-1].pk
+                seen += len(chunk)
+                self.stdout.write(f'{seen} {model._meta.verbose_name_plural} checked, {posted} lines posted')
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully posted {posted} journal lines'))
@@ -0,0 +1,553 @@
+import io
+import itertools
+import random
+import time
+import tracemalloc
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from invoice_backend.models import CustomUser
+
+
+def invoice_row(index):
+    return {
+        'buyer_name': f'Benchmark Buyer {index % 50}',
+        'buyer_address': 'Ahmedabad',
+        'buyer_gst': f'24BENCH{index % 50:04d}F1Z5',
+        'invoice_date': '2025-06-01',
+        'hsn_sac_code': '9983',
+        'base_amount': 1000 + index,
+        'country': 'India',
+        'state': 'Gujarat',
+    }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def api_client(user):
+    # 'testserver' is only an allowed host under the test runner
+    client = APIClient(SERVER_NAME='localhost')
+    client.force_authenticate(user)
+    return client
+
+
+def bench_bulk_create(command, user, rows):
+    client = api_client(user)
+    payload = [invoice_row(i) for i in range(rows)]
+
+    def one_by_one():
+        for row in payload:
+            assert client.post('/api/create/', row, format='json').status_code == 201
+
+    def in_bulk():
+        assert client.post('/api/create/bulk/', payload, format='json').status_code == 201
+
+    single = timed(one_by_one)
+    bulk = timed(in_bulk)
+    command.report('POST /api/create/ x%d' % rows, single)
+    command.report('POST /api/create/bulk/ (%d rows)' % rows, bulk)
+    command.stdout.write(f'speedup: {single / bulk:.1f}x')
+
+
+def bench_amount_words(command, user, rows):
+    from num2words import num2words
+    from invoice_backend.amount_words import amount_in_words, cardinal, _currency_words
+
+    rng = random.Random(rows)
+    totals = [round(rng.uniform(100, 5_000_000), 2) for _ in range(rows)]
+
+    def with_num2words():
+        for total in totals:
+            num2words(total, to='currency', lang='en_IN', currency='INR')
+
+    def with_tables():
+        for total in totals:
+            amount_in_words(total, 'INR')
+
+    baseline = timed(with_num2words)
+    cardinal.cache_clear()
+    _currency_words.cache_clear()
+    cold = timed(with_tables)
+    warm = timed(with_tables)
+    command.report(f'num2words x{rows}', baseline)
+    command.report(f'amount_in_words x{rows} (cold cache)', cold)
+    command.report(f'amount_in_words x{rows} (warm cache)', warm)
+    command.stdout.write(f'speedup: {baseline / cold:.1f}x cold, {baseline / warm:.1f}x warm')
+
+
+def bench_list_serialization(command, user, rows):
+    from rest_framework.renderers import JSONRenderer
+    from invoice_backend.models import Invoice
+    from invoice_backend.serializers import InvoiceSerializer
+    from invoice_backend.values_serializer import compile_plan
+
+    invoices = [Invoice(user=user, **invoice_row(i)) for i in range(rows)]
+    for invoice in invoices:
+        invoice.invoice_date = date(2025, 6, 1)
+    Invoice.objects.bulk_create_numbered(invoices)
+    queryset = Invoice.objects.filter(user=user)
+    plan = compile_plan(InvoiceSerializer)
+    renderer = JSONRenderer()
+    output = {}
+
+    def with_serializer():
+        output['serializer'] = InvoiceSerializer(queryset.all(), many=True).data
+
+    def with_plan():
+        output['plan'] = plan.serialize(queryset.values_list(*plan.columns))
+
+    # The same work split in two: reading rows, then turning them into dicts
+    instances = list(queryset.all())
+    tuples = list(queryset.values_list(*plan.columns))
+
+    baseline = timed(with_serializer)
+    fast = timed(with_plan)
+    baseline_step = timed(lambda: InvoiceSerializer(instances, many=True).data)
+    fast_step = timed(lambda: plan.serialize(tuples))
+    rendered = timed(lambda: renderer.render(output['plan']))
+    assert renderer.render(output['serializer']) == renderer.render(output['plan'])
+
+    command.report(f'InvoiceSerializer x{rows}', baseline)
+    command.report(f'values_list + RowPlan x{rows}', fast)
+    command.report('  serializer step only (instances -> dicts)', baseline_step)
+    command.report('  RowPlan step only (tuples -> dicts)', fast_step)
+    command.report('JSON rendering (same for both)', rendered)
+    command.stdout.write(f'speedup: {baseline / fast:.1f}x including the query, '
+                         f'{baseline_step / fast_step:.1f}x for the serialization step (output identical)')
+
+
+def bench_search(command, user, rows):
+    from invoice_backend import search
+    from invoice_backend.models import CustomUser, SearchDocument
+
+    rng = random.Random(rows)
+    # Zipf-like vocabulary of made-up words: a few are everywhere, most are rare
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    vocabulary = list(dict.fromkeys(''.join(rng.choices(letters, k=rng.randint(4, 9))) for _ in range(20000)))
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    owners = [user] + [CustomUser.objects.create_user(
+        email=f'benchmark{i}@example.invalid', first_name='Benchmark', mobile='0000000000', password=None)
+        for i in range(49)]
+
+    def document(i):
+        words = rng.choices(vocabulary, cum_weights=cumulative, k=12)
+        return SearchDocument(user=owners[i % len(owners)], kind='invoice', object_id=i,
+                              title=' '.join(words[:3]), body=' '.join(words[3:]))
+
+    start = time.perf_counter()
+    for batch_start in range(0, rows, 10000):
+        SearchDocument.objects.bulk_create(
+            [document(i) for i in range(batch_start, min(rows, batch_start + 10000))], batch_size=2000)
+    command.report(f'index {rows} documents', time.perf_counter() - start)
+
+    queries = (
+        ('most common word', vocabulary[0]),
+        ('two common words', f'{vocabulary[0]} {vocabulary[1]}'),
+        ('common word + typed prefix', f'{vocabulary[0]} {vocabulary[5][:3]}'),
+        ('mid-frequency word', vocabulary[300]),
+        ('rare word', vocabulary[15000]),
+    )
+
+    def run_queries(state):
+        for label, query in queries:
+            timings = []
+            for page in range(3):
+                timings.append(timed(lambda: search.search(user, query, limit=21, offset=page * 20)))
+            command.report(f'{label}, worst of 3 pages ({state})', max(timings))
+
+    run_queries('incremental')
+    command.report('optimize index', timed(search.optimize))
+    run_queries('optimized')
+
+
+def bench_export(command, user, rows):
+    from invoice_backend import exports
+    from invoice_backend.models import Invoice
+
+    def create(count):
+        invoices = [Invoice(user=user, **invoice_row(i)) for i in range(count)]
+        for invoice in invoices:
+            invoice.invoice_date = date(2025, 6, 1)
+        Invoice.objects.bulk_create_numbered(invoices)
+
+    def measure(total):
+        for export_format in sorted(exports.FORMATS):
+            size = 0
+            tracemalloc.start()
+            start = time.perf_counter()
+            for piece in exports.export('invoices', export_format, user)[1]:
+                size += len(piece)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            command.report(f'{export_format} x{total} ({size / 1e6:.1f} MB out, peak {peak / 1e6:.1f} MB)', elapsed)
+
+    small = max(rows // 10, 1)
+    create(small)
+    measure(small)
+    create(rows - small)
+    measure(rows)
+
+
+def bench_renderers(command, user, rows):
+    from rest_framework.renderers import JSONRenderer
+    from invoice_backend import renderers
+    from invoice_backend.models import Invoice, Other
+
+    invoices = [Invoice(user=user, **invoice_row(i)) for i in range(rows)]
+    for invoice in invoices:
+        invoice.invoice_date = date(2025, 6, 1)
+    Invoice.objects.bulk_create_numbered(invoices)
+    Other.objects.bulk_create([
+        Other(user=user, other_type='Rent', other_date=date(2025, 6, 1), other_notice=f'Rent for unit {i}',
+              other_amount=-1000 - i, transaction_type='debit', payment_method='Banking', bank_name='HDFC')
+        for i in range(rows)
+    ])
+    client = api_client(user)
+
+    for path in ('/api/invoices/', '/api/banking/other/'):
+        data = client.get(path).data
+        encoders = [('JSONRenderer', JSONRenderer()), ('ORJSONRenderer', renderers.ORJSONRenderer()),
+                    ('MessagePackRenderer', renderers.MessagePackRenderer())]
+        baseline = None
+        for name, renderer in encoders:
+            body = renderer.render(data)
+            elapsed = min(timed(lambda: renderer.render(data)) for _ in range(3))
+            command.report(f'{path} x{rows} {name} ({len(body) / 1e6:.2f} MB)', elapsed)
+            if baseline is None:
+                baseline = (body, elapsed)
+            elif name == 'ORJSONRenderer':
+                assert body == baseline[0], 'JSON output differs'
+                command.stdout.write(f'speedup: {baseline[1] / elapsed:.1f}x (output identical)')
+            else:
+                command.stdout.write(f'speedup: {baseline[1] / elapsed:.1f}x, '
+                                     f'{len(body) / len(baseline[0]):.0%} of the JSON size')
+
+
+def bench_dashboard(command, user, rows):
+    from django.core.cache import cache
+    from invoice_backend.models import CompanyBill, Invoice
+
+    invoices = [Invoice(user=user, **invoice_row(i)) for i in range(rows)]
+    for i, invoice in enumerate(invoices):
+        invoice.invoice_date = date(2023 + i % 3, 6, 1)
+    Invoice.objects.bulk_create_numbered(invoices)
+    CompanyBill.objects.bulk_create([
+        CompanyBill(user=user, invoice_id=invoice.invoice_number, linked_invoice=invoice, amount=500,
+                    transaction_date=date(2025, 7, 1))
+        for invoice in invoices[::2]
+    ])
+    client = api_client(user)
+
+    def p95(samples):
+        return sorted(samples)[int(len(samples) * 0.95) - 1]
+
+    def cold():
+        cache.clear()
+        assert client.get('/api/dashboard/summary/').status_code == 200
+
+    def warm():
+        assert client.get('/api/dashboard/summary/').status_code == 200
+
+    command.report(f'GET /api/dashboard/summary/ x{rows} uncached (p95)', p95([timed(cold) for _ in range(20)]))
+    command.report(f'GET /api/dashboard/summary/ x{rows} cached (p95)', p95([timed(warm) for _ in range(200)]))
+
+
+def bench_aging(command, user, rows):
+    from datetime import timedelta
+    from invoice_backend.models import CompanyBill, Invoice
+
+    invoices = [Invoice(user=user, **invoice_row(i)) for i in range(rows)]
+    for i, invoice in enumerate(invoices):
+        invoice.invoice_date = date(2025, 3, 1) + timedelta(days=i % 300)
+    Invoice.objects.bulk_create_numbered(invoices)
+    CompanyBill.objects.bulk_create([
+        CompanyBill(user=user, invoice_id=invoice.invoice_number, linked_invoice=invoice, amount=500,
+                    transaction_date=date(2025, 12, 1))
+        for invoice in invoices[::3]
+    ])
+    client = api_client(user)
+
+    for path in ('/api/reports/receivables-aging/?as_of=2025-12-31', '/api/reports/receivables-aging/csv/'):
+        def fetch():
+            response = client.get(path)
+            assert response.status_code == 200
+            if response.streaming:
+                b''.join(response.streaming_content)
+        command.report(f'GET {path.split("?")[0]} x{rows}', min(timed(fetch) for _ in range(3)))
+
+
+def bench_income_expenditure(command, user, rows):
+    from datetime import timedelta
+    from django.core.cache import cache
+    from invoice_backend.models import Buyer, CompanyBill, Invoice, Other, Salary
+
+    # Five financial years of every kind of transaction
+    days = [date(2021, 4, 1) + timedelta(days=i % 1826) for i in range(rows)]
+    invoices = [Invoice(user=user, **invoice_row(i)) for i in range(rows)]
+    for invoice, day in zip(invoices, days):
+        invoice.invoice_date = day
+    Invoice.objects.bulk_create_numbered(invoices)
+    CompanyBill.objects.bulk_create([CompanyBill(user=user, amount=500, transaction_date=day) for day in days])
+    Salary.objects.bulk_create([Salary(user=user, salary_name=f'Employee {i % 20}', salary_amount=300, salary_date=day)
+                                for i, day in enumerate(days)])
+    Buyer.objects.bulk_create([Buyer(user=user, amount=200, transaction_date=day) for day in days])
+    Other.objects.bulk_create([
+        Other(user=user, other_type=('Rent', 'Commission', 'Travel')[i % 3], other_notice='benchmark',
+              transaction_type=('debit', 'credit')[i % 2], other_amount=100, other_date=day)
+        for i, day in enumerate(days)
+    ])
+    client = api_client(user)
+    path = '/api/reports/income-expenditure/?date_from=2021-04-01&date_to=2026-03-31&period=quarter'
+
+    def fetch(clear):
+        if clear:
+            cache.clear()
+        assert client.get(path).status_code == 200
+
+    command.report(f'GET five-year statement x{rows} uncached', min(timed(lambda: fetch(True)) for _ in range(3)))
+    command.report(f'GET five-year statement x{rows} cached', min(timed(lambda: fetch(False)) for _ in range(20)))
+
+
+def bench_ledger(command, user, rows):
+    from datetime import timedelta
+    from invoice_backend.models import CashEntry, Other, Salary
+
+    # Ten years of entries; as-of reads near the start and the end of it
+    days = [date(2016, 1, 1) + timedelta(days=i % 3652) for i in range(rows)]
+    Salary.objects.bulk_create([Salary(user=user, salary_name=f'Employee {i % 20}', salary_amount=300, salary_date=day)
+                                for i, day in enumerate(days)])
+    Other.objects.bulk_create([
+        Other(user=user, other_type=('Partner', 'Loan', 'Rent')[i % 3], other_notice=f'Party {i % 30}',
+              transaction_type=('debit', 'credit')[i % 2], other_amount=100, other_date=day)
+        for i, day in enumerate(days)
+    ])
+    CashEntry.objects.bulk_create([CashEntry(user=user, amount=(50, -20)[i % 2], date=day) for i, day in enumerate(days)])
+    client = api_client(user)
+
+    def fetch(as_of):
+        assert client.get(f'/api/reports/balance-sheet/?as_of={as_of}').status_code == 200
+
+    command.report(f'first balance sheet x{rows}, builds 120 months', timed(lambda: fetch('2025-12-20')))
+    for label, as_of in (('ten years in', '2025-12-20'), ('ten days in', '2016-01-10')):
+        command.report(f'GET balance sheet {label} x{rows}', min(timed(lambda: fetch(as_of)) for _ in range(10)))
+
+
+def bench_journal(command, user, rows):
+    from datetime import timedelta
+    from invoice_backend.models import CashEntry, JournalLine, Other, Salary
+
+    # bulk_create() skips save(), so post the same ten years the way backfill_journal does
+    days = [date(2016, 1, 1) + timedelta(days=i % 3652) for i in range(rows)]
+    sources = Salary.objects.bulk_create([
+        Salary(user=user, salary_name=f'Employee {i % 20}', salary_amount=300, salary_date=day,
+               payment_method=('Cash', 'Banking')[i % 2], bank_name=('HDFC', 'SBI')[i % 2])
+        for i, day in enumerate(days)
+    ])
+    sources += Other.objects.bulk_create([
+        Other(user=user, other_type=('Partner', 'Loan', 'Rent')[i % 3], other_notice=f'Party {i % 30}',
+              transaction_type=('debit', 'credit')[i % 2], other_amount=(-100, 100)[i % 2], other_date=day)
+        for i, day in enumerate(days)
+    ])
+    sources += CashEntry.objects.bulk_create([CashEntry(user=user, amount=(50, -20)[i % 2], date=day)
+                                              for i, day in enumerate(days)])
+    command.report(f'post journal of {len(sources)} rows', timed(lambda: JournalLine.objects.post(sources)))
+    client = api_client(user)
+
+    def fetch(path):
+        assert client.get(path).status_code == 200
+
+    for label, path in (('trial balance', '/api/reports/trial-balance/?as_of=2025-12-31'),
+                        ('bank balances', '/api/reports/trial-balance/?as_of=2025-12-31&account=Bank:'),
+                        ('bank ledger, one year', '/api/reports/account-ledger/?account=Bank:SBI&year=2024/2025')):
+        command.report(f'GET {label} x{rows}', min(timed(lambda: fetch(path)) for _ in range(10)))
+
+
+def bench_cash_book(command, user, rows):
+    from datetime import timedelta
+    from django.core.cache import cache
+    from invoice_backend.models import CashEntry, JournalLine, Salary
+
+    # Ten years of cash, posted the way backfill_journal does
+    days = [date(2016, 1, 1) + timedelta(days=i % 3652) for i in range(rows)]
+    sources = Salary.objects.bulk_create([
+        Salary(user=user, salary_name=f'Employee {i % 20}', salary_amount=300, salary_date=day, payment_method='Cash')
+        for i, day in enumerate(days)
+    ])
+    sources += CashEntry.objects.bulk_create([CashEntry(user=user, amount=500, date=day) for day in days])
+    JournalLine.objects.post(sources)
+    client = api_client(user)
+
+    def fetch(path):
+        response = client.get(path)
+        assert response.status_code == 200
+        return response.data['next']
+
+    last_month = '/api/reports/cash-book/?from=2025-12-01&to=2025-12-31'
+
+    def uncached():
+        cache.clear()
+        fetch(last_month)
+
+    command.report(f'GET cash book last month x{rows}, balances uncached', min(timed(uncached) for _ in range(10)))
+    deep = fetch('/api/reports/cash-book/?from=2016-01-01&to=2025-12-31&page_size=100')
+    for label, path in (('first page of ten years', '/api/reports/cash-book/?from=2016-01-01&to=2025-12-31'),
+                        ('second page of ten years', deep),
+                        ('last month', last_month)):
+        command.report(f'GET cash book {label} x{rows}', min(timed(lambda: fetch(path)) for _ in range(10)))
+
+
+def bench_reconcile(command, user, rows):
+    import io
+    from datetime import timedelta
+    from invoice_backend import reconcile
+    from invoice_backend.models import BankAccount, CompanyBill, Other, Salary
+
+    # rows transactions through one bank over a year, many sharing an amount; a statement of a tenth of them
+    rng = random.Random(0)
+    days = [date(2025, 4, 1) + timedelta(days=rng.randrange(365)) for _ in range(rows)]
+    amounts = [rng.choice((300, 500, 1180, 2500)) + rng.randrange(200) for _ in range(rows)]
+    banked = {'payment_method': 'Banking', 'bank_name': 'HDFC'}
+    third = rows // 3
+    CompanyBill.objects.bulk_create([CompanyBill(user=user, amount=amounts[i], transaction_date=days[i],
+                                                 company_name=f'Client {i % 40}', **banked) for i in range(third)])
+    Salary.objects.bulk_create([Salary(user=user, salary_name=f'Employee {i % 20}', salary_amount=amounts[i],
+                                       salary_date=days[i], **banked) for i in range(third, 2 * third)])
+    Other.objects.bulk_create([Other(user=user, other_type='Rent', other_notice=f'Party {i % 30}',
+                                     transaction_type='credit', other_amount=amounts[i], other_date=days[i], **banked)
+                               for i in range(2 * third, rows)])
+    account = BankAccount.objects.create(user=user, bank_name='HDFC', account_number='1', amount=0)
+
+    lines = ['Date,Narration,Amount']
+    for i in rng.sample(range(rows), rows // 10):
+        sign = -1 if third <= i < 2 * third else 1
+        posted = days[i] + timedelta(days=rng.randrange(-2, 3))
+        lines.append(f'{posted:%d/%m/%Y},TRANSFER {i},{sign * amounts[i]}.00')
+    statement = '\n'.join(lines).encode()
+
+    def run():
+        reconcile.import_statement(account, 'statement.csv', io.BytesIO(statement))
+
+    command.report(f'reconcile {rows // 10} lines against {rows} transactions', timed(run))
+
+
+def bench_transactions(command, user, rows):
+    from datetime import timedelta
+    from invoice_backend.models import Buyer, CashEntry, CompanyBill, Other, Salary
+
+    # Ten years of rows spread over the five types
+    days = [date(2016, 1, 1) + timedelta(days=i % 3652) for i in range(rows)]
+    fifth = rows // 5
+    banked = ({'payment_method': 'Cash'}, {'payment_method': 'Banking', 'bank_name': 'HDFC'})
+    CompanyBill.objects.bulk_create([CompanyBill(user=user, company_name=f'Client {i % 40}', amount=1000,
+                                                 transaction_date=days[i], **banked[i % 2]) for i in range(fifth)])
+    Buyer.objects.bulk_create([Buyer(user=user, buyer_name=f'Supplier {i % 40}', amount=500,
+                                     transaction_date=days[i], **banked[i % 2]) for i in range(fifth, 2 * fifth)])
+    Salary.objects.bulk_create([Salary(user=user, salary_name=f'Employee {i % 20}', salary_amount=300,
+                                       salary_date=days[i], **banked[i % 2]) for i in range(2 * fifth, 3 * fifth)])
+    Other.objects.bulk_create([Other(user=user, other_type='Rent', other_notice=f'Party {i % 30}',
+                                     transaction_type='debit', other_amount=100, other_date=days[i], **banked[i % 2])
+                               for i in range(3 * fifth, 4 * fifth)])
+    CashEntry.objects.bulk_create([CashEntry(user=user, amount=50, date=days[i]) for i in range(4 * fifth, rows)])
+    client = api_client(user)
+
+    def fetch(path):
+        response = client.get(path)
+        assert response.status_code == 200
+        return response.data['next']
+
+    deep = fetch('/api/transactions/')
+    for label, path in (('first page', '/api/transactions/'), ('second page', deep),
+                        ('banked in one year', '/api/transactions/?method=Banking&bank=HDFC&year=2020/2021'),
+                        ('salaries', '/api/transactions/?type=salary')):
+        command.report(f'GET transactions {label} x{rows}', min(timed(lambda: fetch(path)) for _ in range(10)))
+
+
+def bench_import(command, user, rows):
+    import csv
+    import tempfile
+    from invoice_backend import imports
+    from invoice_backend.models import ImportJob
+
+    def invoices(writer, count):
+        writer.writerow(['invoice_number', 'invoice_date', 'buyer_name', 'buyer_address', 'buyer_gst',
+                         'hsn_sac_code', 'base_amount', 'country', 'state'])
+        for i in range(count):
+            row = invoice_row(i)
+            writer.writerow([f'{i + 1:02d}-2025/2026', row['invoice_date'], row['buyer_name'], row['buyer_address'],
+                             row['buyer_gst'], row['hsn_sac_code'], row['base_amount'], row['country'], row['state']])
+
+    def others(writer, count):
+        writer.writerow(['other_date', 'transaction_type', 'other_type', 'other_notice', 'other_amount',
+                         'payment_method', 'bank_name'])
+        for i in range(count):
+            writer.writerow([f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}', ('debit', 'credit')[i % 2],
+                             ('Rent', 'Loan', 'Partner')[i % 3], f'Party {i % 30}', 100 + i % 500,
+                             ('Cash', 'Banking')[i % 2], ('', 'HDFC')[i % 2]])
+
+    # Every invoice number is used once, so the larger file follows on from the smaller
+    small = max(rows // 10, 1)
+    for dataset, write in (('invoices', invoices), ('other', others)):
+        for count in (small, rows):
+            with tempfile.TemporaryFile('w+b') as stream:
+                text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+                write(csv.writer(text), count)
+                text.flush()
+                text.detach()
+                stream.seek(0)
+                if dataset == 'invoices' and count == rows:
+                    user.invoice_set.all().delete()
+                job = ImportJob.objects.create(user=user, dataset=dataset, filename=f'{dataset}.csv')
+                tracemalloc.start()
+                start = time.perf_counter()
+                imports.run(job, stream)
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                assert job.imported == count, (job.imported, job.message)
+                command.report(f'import {dataset} csv x{count} (peak {peak / 1e6:.1f} MB)', elapsed)
+
+
+BENCHMARKS = {
+    'aging': bench_aging,
+    'amount-words': bench_amount_words,
+    'bulk-create': bench_bulk_create,
+    'cash-book': bench_cash_book,
+    'dashboard': bench_dashboard,
+    'export': bench_export,
+    'import': bench_import,
+    'income-expenditure': bench_income_expenditure,
+    'journal': bench_journal,
+    'ledger': bench_ledger,
+    'list-serialization': bench_list_serialization,
+    'reconcile': bench_reconcile,
+    'renderers': bench_renderers,
+    'search': bench_search,
+    'transactions': bench_transactions,
+}
+
+
+class Command(BaseCommand):
+    help = 'Time hot code paths against the configured database. Everything written is rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=sorted(BENCHMARKS))
+        parser.add_argument('--rows', type=int, default=500)
+
+    def report(self, label, seconds):
+        self.stdout.write(f'{label:<60} {seconds * 1000:10.1f} ms')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(
+                email='benchmark@example.invalid', first_name='Benchmark',
+                mobile='0000000000', password=None)
+            BENCHMARKS[options['target']](self, user, options['rows'])
+            transaction.set_rollback(True)
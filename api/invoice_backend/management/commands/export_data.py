@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from invoice_backend import exports
+from invoice_backend.filters import ExportFilterSerializer
+from invoice_backend.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Stream invoices or one banking transaction type to a CSV, NDJSON or XLSX file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('format', choices=sorted(exports.FORMATS))
+        parser.add_argument('--user', help='Email of the owner; every user when omitted')
+        parser.add_argument('--year', help='Financial year, e.g. 2025/2026')
+        parser.add_argument('--date-from')
+        parser.add_argument('--date-to')
+        parser.add_argument('--output', help='File to write; standard output when omitted')
+
+    def handle(self, *args, **options):
+        filters = ExportFilterSerializer(data={
+            name: options[name] for name in ('year', 'date_from', 'date_to') if options[name]
+        })
+        if not filters.is_valid():
+            raise CommandError(filters.errors)
+
+        user = None
+        if options['user']:
+            try:
+                user = CustomUser.objects.get(email=options['user'])
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}")
+
+        _, content = exports.export(options['dataset'], options['format'], user, **filters.validated_data)
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for piece in content:
+                output.write(piece.encode() if isinstance(piece, str) else piece)
+        finally:
+            if options['output']:
+                output.close()
@@ -0,0 +1,42 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from invoice_backend import imports
+from invoice_backend.models import CustomUser, ImportJob
+
+# Row errors shown at the end; the rest are on the job
+SHOWN_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = 'Import invoices or one banking transaction type from a CSV or XLSX file with a header row'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(imports.DATASETS))
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Email of the owner')
+        parser.add_argument('--chunk-size', type=int, default=imports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(email=options['user'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        job = ImportJob.objects.create(user=user, dataset=options['dataset'],
+                                       filename=os.path.basename(options['path']))
+        with open(options['path'], 'rb') as stream:
+            imports.run(job, stream, options['chunk_size'], report=self.report)
+
+        if job.status == 'failed':
+            raise CommandError(job.message)
+        for error in job.row_errors.order_by('pk')[:SHOWN_ERRORS]:
+            self.stdout.write(f'row {error.row}: {error.errors}')
+        if job.failed > SHOWN_ERRORS:
+            self.stdout.write(f'... and {job.failed - SHOWN_ERRORS} more, at /api/imports/{job.pk}/errors/')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {job.imported} of {job.rows} rows into {job.dataset} (import {job.pk})'))
+
+    def report(self, job):
+        self.stdout.write(f'{job.rows} rows read, {job.imported} imported, {job.failed} failed '
+                          f'({job.progress:.0%})')
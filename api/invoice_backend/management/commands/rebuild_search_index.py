@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from invoice_backend import search
+from invoice_backend.models import Invoice, CompanyBill, Buyer, Other, Employee, Partner, SearchDocument
+
+INDEXED_MODELS = [Invoice, CompanyBill, Buyer, Other, Employee, Partner]
+
+
+class Command(BaseCommand):
+    help = 'Write the search documents of every existing invoice, transaction, employee and partner'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        search.install()
+
+        for model in INDEXED_MODELS:
+            last_pk = 0
+            indexed = 0
+            while True:
+                chunk = list(model.objects.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    SearchDocument.objects.index(chunk)
+                last_pk = chunk[-1].pk
+                indexed += len(chunk)
+            self.stdout.write(f'{model.__name__}: {indexed} indexed')
+
+        search.rebuild()
+        search.optimize()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from invoice_backend.models import CompanyBill, CustomUser, Invoice
+
+# Differences below this are float noise, not drift
+TOLERANCE = 0.005
+
+
+class Command(BaseCommand):
+    help = 'Recompute amount_received and outstanding from linked payments and fix the invoices that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted invoices without fixing them')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_pk = 0
+        checked = repaired = 0
+
+        # Walk the table by primary key so each chunk is an index range scan
+        while True:
+            chunk = list(
+                Invoice.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', 'user_id', 'invoice_number', 'total_with_gst', 'amount_received', 'outstanding', 'updated_at')[:chunk_size]
+            )
+            if not chunk:
+                break
+            received = dict(
+                CompanyBill.objects.filter(linked_invoice__in=[invoice.pk for invoice in chunk])
+                .values('linked_invoice').order_by().annotate(total=Sum('amount'))
+                .values_list('linked_invoice', 'total')
+            )
+            now = timezone.now()
+            drifted = []
+            for invoice in chunk:
+                amount_received = float(received.get(invoice.pk) or 0)
+                outstanding = (invoice.total_with_gst or 0) - amount_received
+                if (abs(invoice.amount_received - amount_received) > TOLERANCE
+                        or abs(invoice.outstanding - outstanding) > TOLERANCE):
+                    self.stdout.write(f'{invoice.invoice_number}: received {invoice.amount_received} -> '
+                                      f'{amount_received}, outstanding {invoice.outstanding} -> {outstanding}')
+                    invoice.amount_received, invoice.outstanding, invoice.updated_at = amount_received, outstanding, now
+                    drifted.append(invoice)
+            if drifted and not options['dry_run']:
+                with transaction.atomic():
+                    # bulk_update() skips auto_now, and updated_at is what list ETags are built from
+                    Invoice.objects.bulk_update(drifted, ['amount_received', 'outstanding', 'updated_at'])
+                    # Reports cached under data_version were built from the drifted balances
+                    for user_id in {invoice.user_id for invoice in drifted}:
+                        CustomUser.objects.touch(user_id)
+            last_pk = chunk[-1].pk
+            checked += len(chunk)
+            repaired += len(drifted)
+
+        verb = 'would be repaired' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'{repaired} of {checked} invoices {verb}'))
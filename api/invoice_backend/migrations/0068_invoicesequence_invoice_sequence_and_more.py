@@ -0,0 +1,67 @@
+# Generated by Django 5.2 on 2026-10-18 18:43
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def renumber_duplicates(apps, schema_editor):
+    # Concurrent saves could issue one number twice. The first invoice keeps it,
+    # later ones move past the highest number of the year, like a new invoice
+    Invoice = apps.get_model('invoice_backend', 'Invoice')
+    duplicates = (Invoice.objects.filter(user__isnull=False, invoice_number__isnull=False)
+                  .values('user', 'financial_year', 'invoice_number').order_by()
+                  .annotate(count=Count('pk')).filter(count__gt=1))
+    for row in list(duplicates):
+        user_id, year = row['user'], row['financial_year']
+        numbers = Invoice.objects.filter(user_id=user_id, financial_year=year).values_list('invoice_number', flat=True)
+        last = max((int(match[1]) for match in (re.fullmatch(r'(\d+)-\d{4}/\d{4}', number or '') for number in numbers)
+                    if match), default=0)
+        later = (Invoice.objects.filter(user_id=user_id, financial_year=year, invoice_number=row['invoice_number'])
+                 .order_by('pk')[1:])
+        for invoice in later:
+            last += 1
+            number = f"{last:02d}-{year}"
+            print(f"  Invoice {invoice.pk} shared number {row['invoice_number']}; renumbered to {number}")
+            Invoice.objects.filter(pk=invoice.pk).update(invoice_number=number, updated_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0067_unsecuredloan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('financial_year', models.CharField(max_length=9)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='sequence',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(renumber_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.UniqueConstraint(fields=('user', 'financial_year', 'invoice_number'), name='unique_invoice_number_per_year'),
+        ),
+        migrations.AddField(
+            model_name='invoicesequence',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='invoicesequence',
+            constraint=models.UniqueConstraint(fields=('user', 'financial_year'), name='unique_invoice_sequence'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+from django.db.models import Max
+
+
+def backfill_sequences(apps, schema_editor):
+    Invoice = apps.get_model('invoice_backend', 'Invoice')
+    InvoiceSequence = apps.get_model('invoice_backend', 'InvoiceSequence')
+
+    batch = []
+    for invoice in Invoice.objects.only('pk', 'invoice_number').iterator(chunk_size=2000):
+        try:
+            # Number part of "01-2025/2026"
+            invoice.sequence = int(invoice.invoice_number.split('-')[0])
+        except (ValueError, IndexError, AttributeError):
+            continue
+        batch.append(invoice)
+        if len(batch) >= 2000:
+            Invoice.objects.bulk_update(batch, ['sequence'])
+            batch = []
+    if batch:
+        Invoice.objects.bulk_update(batch, ['sequence'])
+
+    last_numbers = (
+        Invoice.objects.exclude(sequence=None)
+        .values('user', 'financial_year')
+        .annotate(last_number=Max('sequence'))
+    )
+    InvoiceSequence.objects.bulk_create(
+        InvoiceSequence(user_id=row['user'], financial_year=row['financial_year'],
+                        last_number=row['last_number'])
+        for row in last_numbers
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0068_invoicesequence_invoice_sequence_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sequences, migrations.RunPython.noop),
+    ]
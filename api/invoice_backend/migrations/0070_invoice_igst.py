@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0069_backfill_invoice_sequences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='igst',
+            field=models.FloatField(blank=True, default=0.0, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0071_updated_at_change_markers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'invoice_date'], name='invoice_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'buyer_name'], name='invoice_user_buyer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'buyer_gst', 'invoice_date'], name='invoice_user_gst_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'total_with_gst'], name='invoice_user_total_idx'),
+        ),
+    ]
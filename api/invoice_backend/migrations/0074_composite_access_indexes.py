@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0073_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bankaccount',
+            index=models.Index(fields=['user', 'is_deleted'], name='bankaccount_user_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashentry',
+            index=models.Index(fields=['user', 'is_deleted'], name='cashentry_user_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companybill',
+            index=models.Index(fields=['user', 'invoice_id', 'transaction_date'], name='companybill_user_invoice_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='other',
+            index=models.Index(fields=['user', 'other_type'], name='other_user_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['email', 'created_at'], name='otp_email_created_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2 on 2026-10-18 19:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def link_clients(apps, schema_editor):
+    # What backfill_clients does, so existing invoices are grouped on deploy:
+    # one client per buyer name, address and GSTIN, counted from its invoices
+    Client = apps.get_model('invoice_backend', 'Client')
+    Invoice = apps.get_model('invoice_backend', 'Invoice')
+    groups = {}
+    for row in (Invoice.objects.values('user_id', 'buyer_name', 'buyer_address', 'buyer_gst').order_by()
+                .annotate(count=Count('pk'), total=Sum(Coalesce('inr_equivalent', 'total_with_gst')),
+                          last=Max('invoice_date'))):
+        key = (row['user_id'], row['buyer_name'], row['buyer_address'], row['buyer_gst'] or '')
+        count, total, last = groups.get(key, (0, 0.0, None))
+        groups[key] = (count + row['count'], total + (row['total'] or 0.0),
+                       max(filter(None, [last, row['last']]), default=None))
+    for (user_id, name, address, gst), (count, total, last) in groups.items():
+        client = Client.objects.create(user_id=user_id, name=name, address=address, gst=gst, invoice_count=count,
+                                       total_billed=total, last_invoice_date=last)
+        same_gst = Q(buyer_gst__isnull=True) | Q(buyer_gst='') if not gst else Q(buyer_gst=gst)
+        Invoice.objects.filter(same_gst, user_id=user_id, buyer_name=name, buyer_address=address).update(
+            client=client)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0074_composite_access_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Client',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('address', models.TextField()),
+                ('gst', models.CharField(blank=True, default='', max_length=20)),
+                ('invoice_count', models.PositiveIntegerField(default=0)),
+                ('total_billed', models.FloatField(default=0.0)),
+                ('last_invoice_date', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='client',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='invoices', to='invoice_backend.client'),
+        ),
+        migrations.AddConstraint(
+            model_name='client',
+            constraint=models.UniqueConstraint(fields=('user', 'name', 'address', 'gst'), name='unique_client'),
+        ),
+        migrations.RunPython(link_clients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 19:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def link_payments(apps, schema_editor):
+    # One UPDATE: each payment points at the newest of the user's invoices
+    # whose number matches its invoice_id text
+    CompanyBill = apps.get_model('invoice_backend', 'CompanyBill')
+    Invoice = apps.get_model('invoice_backend', 'Invoice')
+    CompanyBill.objects.exclude(invoice_id=None).exclude(invoice_id='').update(linked_invoice=Subquery(
+        Invoice.objects.filter(user=OuterRef('user'), invoice_number=OuterRef('invoice_id'))
+        .order_by('-pk').values('pk')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0076_dashboard_summary'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='companybill',
+            name='companybill_user_invoice_idx',
+        ),
+        migrations.AddField(
+            model_name='companybill',
+            name='linked_invoice',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payments', to='invoice_backend.invoice'),
+        ),
+        migrations.AddIndex(
+            model_name='companybill',
+            index=models.Index(fields=['linked_invoice', 'transaction_date'], name='companybill_invoice_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'invoice_number'], name='invoice_user_number_idx'),
+        ),
+        migrations.RunPython(link_payments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 20:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0077_companybill_linked_invoice'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'client', 'currency', 'invoice_date', 'total_with_gst'], name='invoice_user_aging_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 20:17
+
+from django.db import migrations, models
+from django.db.models import F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_balances(apps, schema_editor):
+    # One UPDATE, the same one InvoiceManager.refresh_payments() runs
+    Invoice = apps.get_model('invoice_backend', 'Invoice')
+    CompanyBill = apps.get_model('invoice_backend', 'CompanyBill')
+    received = Coalesce(Subquery(
+        CompanyBill.objects.filter(linked_invoice=OuterRef('pk')).order_by().values('linked_invoice')
+        .annotate(total=Sum('amount')).values('total'), output_field=FloatField()), 0.0)
+    Invoice.objects.update(amount_received=received, outstanding=Coalesce(F('total_with_gst'), 0.0) - received)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0078_invoice_aging_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='amount_received',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='outstanding',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'outstanding'], name='invoice_user_outstanding_idx'),
+        ),
+        migrations.RunPython(fill_balances, migrations.RunPython.noop),
+    ]
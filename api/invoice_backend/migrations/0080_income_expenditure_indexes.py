@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0079_invoice_payment_balances'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='invoice',
+            name='invoice_user_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='buyer',
+            index=models.Index(fields=['user', 'transaction_date', 'amount'], name='buyer_user_date_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companybill',
+            index=models.Index(fields=['user', 'transaction_date', 'amount'], name='companybill_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'invoice_date', 'inr_equivalent'], name='invoice_user_date_billed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='other',
+            index=models.Index(fields=['user', 'other_date', 'other_type', 'transaction_type', 'other_amount'], name='other_user_date_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salary',
+            index=models.Index(fields=['user', 'salary_date', 'salary_amount'], name='salary_user_date_amount_idx'),
+        ),
+    ]
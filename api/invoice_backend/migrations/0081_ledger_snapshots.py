@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 20:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0080_income_expenditure_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='ledger_closed_through',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='LedgerSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('account', models.CharField(choices=[('other', 'Other'), ('salary', 'Salary'), ('buyer', 'Buyer'), ('receivable', 'Receivable'), ('cash', 'Cash')], max_length=20)),
+                ('category', models.CharField(blank=True, default='', max_length=255)),
+                ('name', models.TextField(blank=True, default='')),
+                ('debit', models.FloatField(default=0.0)),
+                ('credit', models.FloatField(default=0.0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ledgersnapshot',
+            constraint=models.UniqueConstraint(fields=('user', 'period', 'account', 'category', 'name'), name='unique_ledger_snapshot'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 20:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0081_ledger_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('account', models.CharField(max_length=255)),
+                ('debit', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('credit', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('source_type', models.CharField(max_length=20)),
+                ('source_id', models.BigIntegerField()),
+                ('reversal', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='journalline',
+            index=models.Index(fields=['user', 'account', 'date', 'debit', 'credit'], name='journal_user_account_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalline',
+            index=models.Index(fields=['source_type', 'source_id'], name='journal_source_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-18 20:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0082_journal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255)),
+                ('date_from', models.DateField(blank=True, null=True)),
+                ('date_to', models.DateField(blank=True, null=True)),
+                ('closing_balance', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('bank_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statements', to='invoice_backend.bankaccount')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('description', models.TextField(blank=True, default='')),
+                ('reference', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(choices=[('unmatched', 'Unmatched'), ('suggested', 'Suggested'), ('confirmed', 'Confirmed'), ('ignored', 'Ignored')], default='unmatched', max_length=10)),
+                ('source_type', models.CharField(blank=True, default='', max_length=20)),
+                ('source_id', models.BigIntegerField(blank=True, null=True)),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='invoice_backend.bankstatement')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='statementline',
+            index=models.Index(fields=['statement', 'status', 'id'], name='statementline_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='statementline',
+            index=models.Index(fields=['user', 'source_type', 'source_id'], name='statementline_source_idx'),
+        ),
+    ]
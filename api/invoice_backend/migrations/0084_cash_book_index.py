@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0083_bank_statements'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='journalline',
+            name='journal_user_account_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='journalline',
+            index=models.Index(fields=['user', 'account', 'date', 'source_type', 'source_id', 'debit', 'credit'], name='journal_user_account_date_idx'),
+        ),
+    ]
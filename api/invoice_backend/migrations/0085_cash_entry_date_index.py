@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 21:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0084_cash_book_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cashentry',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', 'date'], name='cashentry_user_live_date_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 21:45
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def merge_duplicates(apps, schema_editor):
+    # Keep one user-less row per year, at the highest number any of them issued
+    InvoiceSequence = apps.get_model('invoice_backend', 'InvoiceSequence')
+    rows = InvoiceSequence.objects.filter(user__isnull=True)
+    for year in rows.values_list('financial_year', flat=True).distinct():
+        year_rows = rows.filter(financial_year=year).order_by('pk')
+        last_number = year_rows.aggregate(last=Max('last_number'))['last']
+        keep = year_rows.first()
+        year_rows.exclude(pk=keep.pk).delete()
+        InvoiceSequence.objects.filter(pk=keep.pk).update(last_number=last_number)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0086_import_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='invoicesequence',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('financial_year',), name='unique_invoice_sequence_without_user'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 21:53
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def fill_recorded_on(apps, schema_editor):
+    # The day undated payments have been booked on so far, so their journal lines stand
+    CompanyBill = apps.get_model('invoice_backend', 'CompanyBill')
+    CompanyBill.objects.update(recorded_on=TruncDate('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0088_importjob_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companybill',
+            name='recorded_on',
+            field=models.DateField(default=django.utils.timezone.localdate, editable=False),
+        ),
+        migrations.RunPython(fill_recorded_on, migrations.RunPython.noop),
+    ]
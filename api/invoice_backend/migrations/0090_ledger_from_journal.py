@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-18 21:58
+
+from django.db import migrations, models
+
+
+def reopen_ledgers(apps, schema_editor):
+    # Snapshots were summed from the source tables; the next read rebuilds them from
+    # the journal. Lines posted before party existed are reposted by 0092
+    apps.get_model('invoice_backend', 'LedgerSnapshot').objects.all().delete()
+    apps.get_model('invoice_backend', 'CustomUser').objects.update(ledger_closed_through=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0089_companybill_recorded_on'),
+    ]
+
+    operations = [
+        migrations.RunPython(reopen_ledgers, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='ledgersnapshot',
+            name='unique_ledger_snapshot',
+        ),
+        migrations.RemoveField(
+            model_name='ledgersnapshot',
+            name='category',
+        ),
+        migrations.RemoveField(
+            model_name='ledgersnapshot',
+            name='name',
+        ),
+        migrations.AddField(
+            model_name='journalline',
+            name='party',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='ledgersnapshot',
+            name='party',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='ledgersnapshot',
+            name='account',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='journalline',
+            index=models.Index(fields=['user', 'date'], name='journal_user_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgersnapshot',
+            constraint=models.UniqueConstraint(fields=('user', 'period', 'account', 'party'), name='unique_ledger_snapshot'),
+        ),
+    ]
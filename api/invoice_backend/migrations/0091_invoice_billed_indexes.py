@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0090_ledger_from_journal'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='invoice',
+            name='invoice_user_year_billed_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='invoice',
+            name='invoice_user_date_billed_idx',
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'invoice_date', 'inr_equivalent', 'total_with_gst'], name='invoice_user_date_billed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'financial_year', 'inr_equivalent', 'total_with_gst'], name='invoice_user_year_billed_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import F, Sum
+
+from invoice_backend import models as current
+
+# Every model that posts into the journal on save, as backfill_journal walks them
+JOURNALED_MODELS = ['Invoice', 'CompanyBill', 'Buyer', 'Salary', 'Other', 'CashEntry']
+
+
+def post_journal(apps, schema_editor):
+    # What backfill_journal does, so the reports built on the journal have it
+    # on deploy: the entries of every row as journal_entries() writes them now,
+    # less what is already posted. Historical models have no methods, so each
+    # row goes through its model's current journal_entries()
+    JournalLine = apps.get_model('invoice_backend', 'JournalLine')
+    for name in JOURNALED_MODELS:
+        model = apps.get_model('invoice_backend', name)
+        journal_entries = getattr(current, name).journal_entries
+        source_type = model._meta.model_name
+        rows = model.objects.exclude(user=None).order_by('pk')
+        if name == 'CompanyBill':
+            # Payments are booked at their invoice's exchange rate
+            rows = rows.select_related('linked_invoice')
+        last_pk = 0
+        while True:
+            chunk = list(rows.filter(pk__gt=last_pk)[:1000])
+            if not chunk:
+                break
+            posted = defaultdict(dict)
+            for row in (JournalLine.objects.filter(source_type=source_type, source_id__in=[row.pk for row in chunk])
+                        .values('source_id', 'date', 'account', 'party').order_by()
+                        .annotate(net=Sum(F('debit') - F('credit')))):
+                if row['net']:
+                    posted[row['source_id']][(row['date'], row['account'], row['party'])] = row['net']
+            lines = []
+            for source in chunk:
+                entries = [(current.as_date(day), account, current.as_money(debit), current.as_money(credit),
+                            party or '') for day, account, debit, credit, party in journal_entries(source)]
+                entries = [entry for entry in entries if entry[2] or entry[3]]
+                wanted = defaultdict(Decimal)
+                for day, account, debit, credit, party in entries:
+                    wanted[(day, account, party)] += debit - credit
+                before = posted[source.pk]
+                if before == {key: net for key, net in wanted.items() if net}:
+                    continue
+                common = {'user_id': source.user_id, 'source_type': source_type, 'source_id': source.pk}
+                lines.extend(JournalLine(date=day, account=account, party=party, debit=max(-net, 0),
+                                         credit=max(net, 0), reversal=True, **common)
+                             for (day, account, party), net in before.items())
+                lines.extend(JournalLine(date=day, account=account, party=party, debit=debit, credit=credit,
+                                         **common)
+                             for day, account, debit, credit, party in entries)
+            JournalLine.objects.bulk_create(lines, batch_size=1000)
+            last_pk = chunk[-1].pk
+    # Snapshots built before the lines were posted are rebuilt on the next read
+    apps.get_model('invoice_backend', 'LedgerSnapshot').objects.all().delete()
+    apps.get_model('invoice_backend', 'CustomUser').objects.update(ledger_closed_through=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoice_backend', '0091_invoice_billed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(post_journal, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest, Now
 from django.utils import timezone
 from datetime import date
 from django.contrib.auth.models import AbstractUser, Group, Permission
@@ -9,7 +11,12 @@ from django.contrib.auth import get_user_model
 from datetime import datetime, timedelta
 from django.db.models import JSONField 
 import random
+import re
 import string
+from collections import defaultdict
+from decimal import Decimal
+from functools import partial
+from .amount_words import amount_in_words
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import api_view, permission_classes
@@ -35,6 +42,11 @@ class CustomUserManager(BaseUserManager):
         extra_fields.setdefault('is_superuser', True)
         return self.create_user(email, first_name, mobile, password, **extra_fields)   #Calls create_user() with extra permissions.
 
+    def touch(self, user_id):
+        """Bump data_version after a write to the user's invoices, transactions or accounts"""
+        if user_id is not None:
+            self.filter(pk=user_id).update(data_version=F('data_version') + 1)
+
 class CustomUser(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
     first_name = models.CharField(max_length=100)
@@ -42,6 +54,10 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
+    # Keys the cached dashboard summary; loaded with the user on every request
+    data_version = models.PositiveIntegerField(default=0, editable=False)
+    # Last month whose LedgerSnapshot rows are all built; None before the first
+    ledger_closed_through = models.DateField(null=True, blank=True, editable=False)
 
     objects = CustomUserManager()
 
@@ -51,12 +67,461 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     def _str_(self):
         return self.email
 
-class Invoice(models.Model):
+# Invoices to buyers in this state are charged CGST + SGST instead of IGST
+SELLER_STATE = 'Gujarat'
+
+
+def get_financial_year(for_date=None):
+    """Financial year label ("2025/2026") for a date; April 1st to March 31st"""
+    if not for_date:
+        for_date = datetime.now().date()
+    # If date is January, February or March, financial year started the previous year
+    start = for_date.year if for_date.month >= 4 else for_date.year - 1
+    return f"{start}/{start + 1}"
+
+
+def financial_year_bounds(financial_year):
+    """First and last day of a financial year label ("2025/2026", or the older "2025-2026")"""
+    start = int(re.split(r'[/-]', financial_year)[0])
+    return date(start, 4, 1), date(start + 1, 3, 31)
+
+
+def format_invoice_number(sequence, financial_year):
+    return f"{sequence:02d}-{financial_year}"
+
+
+def parse_invoice_number(invoice_number):
+    """(sequence, financial_year) of a number format_invoice_number() wrote, else None"""
+    match = re.fullmatch(r'(\d+)-(\d{4}/\d{4})', invoice_number or '')
+    return (int(match[1]), match[2]) if match else None
+
+
+class InvoiceSequenceManager(models.Manager):
+    """Sequence lookups accept either a user instance or a user id"""
+
+    def _seed(self, user_id, financial_year):
+        """Highest number already issued, for years that predate the sequence table"""
+        return Invoice.objects.filter(
+            user_id=user_id, financial_year=financial_year
+        ).aggregate(last=Max('sequence'))['last'] or 0
+
+    def allocate(self, user, financial_year, count=1):
+        """Atomically reserve `count` consecutive numbers and return the first one.
+
+        The UPDATE takes the row lock (or SQLite's write lock) before anything is
+        read, so concurrent callers queue up instead of reading the same value.
+        """
+        user_id = getattr(user, 'pk', user)
+        rows = self.filter(user_id=user_id, financial_year=financial_year)
+        with transaction.atomic():
+            if not rows.update(last_number=F('last_number') + count):
+                first = self._seed(user_id, financial_year) + 1
+                try:
+                    with transaction.atomic():
+                        self.create(user_id=user_id, financial_year=financial_year,
+                                    last_number=first + count - 1)
+                    return first
+                except IntegrityError:
+                    # Another request created the row first
+                    rows.update(last_number=F('last_number') + count)
+            last_number = rows.values_list('last_number', flat=True).get()
+        return last_number - count + 1
+
+    def advance(self, user, financial_year, number):
+        """Move the sequence on to number unless it is already past it, for numbers issued elsewhere"""
+        user_id = getattr(user, 'pk', user)
+        rows = self.filter(user_id=user_id, financial_year=financial_year)
+        with transaction.atomic():
+            if not rows.update(last_number=Greatest('last_number', number)):
+                try:
+                    with transaction.atomic():
+                        self.create(user_id=user_id, financial_year=financial_year,
+                                    last_number=max(self._seed(user_id, financial_year), number))
+                except IntegrityError:
+                    rows.update(last_number=Greatest('last_number', number))
+
+    def peek(self, user, financial_year):
+        """Next number that allocate() would hand out, without reserving it"""
+        user_id = getattr(user, 'pk', user)
+        last_number = self.filter(
+            user_id=user_id, financial_year=financial_year
+        ).values_list('last_number', flat=True).first()
+        if last_number is None:
+            last_number = self._seed(user_id, financial_year)
+        return last_number + 1
+
+
+class InvoiceSequence(models.Model):
+    """Last invoice number issued per user and financial year"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
+    financial_year = models.CharField(max_length=9)
+    last_number = models.PositiveIntegerField(default=0)
+
+    objects = InvoiceSequenceManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'financial_year'], name='unique_invoice_sequence'),
+            # NULLs are distinct in a unique index, so invoices without a user need their own
+            models.UniqueConstraint(fields=['financial_year'], condition=models.Q(user__isnull=True),
+                                    name='unique_invoice_sequence_without_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.financial_year}: {self.last_number}"
+
+
+class SearchDocumentManager(models.Manager):
+    def index(self, objects):
+        """Insert or refresh the search documents of saved SearchIndexed objects"""
+        documents = []
+        for obj in objects:
+            title, body, when = obj.search_document()
+            documents.append(SearchDocument(
+                user_id=getattr(obj, 'user_id', None), kind=obj.search_kind, object_id=obj.pk,
+                title=(title or '')[:255], body=body or '', date=when))
+        if documents:
+            self.bulk_create(documents, update_conflicts=True, unique_fields=['kind', 'object_id'],
+                             update_fields=['user', 'title', 'body', 'date'])
+
+    def unindex(self, obj):
+        self.filter(kind=obj.search_kind, object_id=obj.pk).delete()
+
+
+class SearchDocument(models.Model):
+    """
+    The searchable text of one invoice, transaction, employee or partner.
+    The full-text index over this table (FTS5 or tsvector) is created and
+    queried in search.py.
+    """
+    # Null for shared rows such as partners, which every user can find
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True, default='')
+    date = models.DateField(null=True, blank=True)
+
+    objects = SearchDocumentManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
+
+
+class SearchIndexed(models.Model):
+    """Keeps a SearchDocument in step with every save() and delete()"""
+    search_kind = None
+
+    class Meta:
+        abstract = True
+
+    def search_document(self):
+        """(title, body, date) to index"""
+        raise NotImplementedError
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            SearchDocument.objects.index([self])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            SearchDocument.objects.unindex(self)
+            return super().delete(*args, **kwargs)
+
+
+# Journal accounts; banks are 'Bank:<bank_name>' and other transactions 'Other:<other_type>'
+RECEIVABLE_ACCOUNT = 'Accounts Receivable'
+SALES_ACCOUNT = 'Sales'
+GST_ACCOUNT = 'GST Payable'
+CASH_ACCOUNT = 'Cash'
+SALARY_ACCOUNT = 'Salaries'
+BUYER_ACCOUNT = 'Buyer Payments'
+CASH_ADJUSTMENT_ACCOUNT = 'Cash Adjustments'
+
+
+def bank_account(bank_name):
+    return f'Bank:{bank_name}' if bank_name else 'Bank'
+
+
+def settlement_account(payment_method, bank_name):
+    """Where a transaction's money went in or out: the named bank, or cash"""
+    if payment_method == 'Banking' or (payment_method is None and bank_name):
+        return bank_account(bank_name)
+    return CASH_ACCOUNT
+
+
+def as_date(value):
+    """The date a DateField stores for value: an ISO string, a datetime (Buyer's default) or a date"""
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value
+
+
+def as_money(value):
+    return Decimal(str(value or 0)).quantize(Decimal('0.01'))
+
+
+class JournalLineManager(models.Manager):
+    def post(self, sources, removed=False):
+        """
+        Append lines so the journal of each source nets to its current
+        journal_entries(), or to nothing once removed: reversals of what it
+        posted before, then its entries. Sources whose entries have not
+        changed post nothing. One query per source model, plus the insert.
+        Ledger snapshots are reopened from the earliest line posted.
+        """
+        by_model = defaultdict(list)
+        for source in sources:
+            if source.pk is not None and source.user_id is not None:
+                by_model[source._meta.model_name].append(source)
+        lines = []
+        for source_type, group in by_model.items():
+            posted = defaultdict(dict)
+            for row in (self.filter(source_type=source_type, source_id__in=[source.pk for source in group])
+                        .values('source_id', 'date', 'account', 'party').order_by()
+                        .annotate(net=Sum(F('debit') - F('credit')))):
+                if row['net']:
+                    posted[row['source_id']][(row['date'], row['account'], row['party'])] = row['net']
+            for source in group:
+                entries = [] if removed else [
+                    (as_date(day), account, as_money(debit), as_money(credit), party or '')
+                    for day, account, debit, credit, party in source.journal_entries()]
+                entries = [entry for entry in entries if entry[2] or entry[3]]
+                wanted = defaultdict(Decimal)
+                for day, account, debit, credit, party in entries:
+                    wanted[(day, account, party)] += debit - credit
+                before = posted[source.pk]
+                if before == {key: net for key, net in wanted.items() if net}:
+                    continue
+                line = partial(JournalLine, user_id=source.user_id, source_type=source_type, source_id=source.pk)
+                lines.extend(line(date=day, account=account, party=party, debit=max(-net, 0), credit=max(net, 0),
+                                  reversal=True)
+                             for (day, account, party), net in before.items())
+                lines.extend(line(date=day, account=account, party=party, debit=debit, credit=credit)
+                             for day, account, debit, credit, party in entries)
+        created = self.bulk_create(lines, batch_size=1000)
+        earliest = {}
+        for line in created:
+            earliest[line.user_id] = min(earliest.get(line.user_id, line.date), line.date)
+        for user_id, day in earliest.items():
+            LedgerSnapshot.objects.invalidate(user_id, day)
+        return created
+
+
+class JournalLine(models.Model):
+    """
+    One line of the double-entry journal every money movement posts into
+    (see Journaled). Lines are only ever appended: an edit or delete of the
+    source posts reversals, dated like the lines they cancel, so sums up
+    to any date reflect the data as it is now.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    date = models.DateField()
+    account = models.CharField(max_length=255)
+    # Who the line is with, where the account is kept per party: the buyer
+    # of a receivable, the payee of a salary, the notice of an other transaction
+    party = models.TextField(blank=True, default='')
+    debit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    credit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # The posting row, by model name and pk; it may since have been deleted
+    source_type = models.CharField(max_length=20)
+    source_id = models.BigIntegerField()
+    reversal = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = JournalLineManager()
+
+    class Meta:
+        indexes = [
+            # Covers balances and trial balances (sums per account up to a date)
+            # and the cash book, which nets each source's lines per day in order
+            models.Index(fields=['user', 'account', 'date', 'source_type', 'source_id', 'debit', 'credit'],
+                         name='journal_user_account_date_idx'),
+            models.Index(fields=['source_type', 'source_id'], name='journal_source_idx'),
+            # The lines of a date range across accounts, which ledger snapshots roll up
+            models.Index(fields=['user', 'date'], name='journal_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.account} Dr {self.debit} Cr {self.credit}"
+
+
+class Journaled(models.Model):
+    """Posts the row's journal entries on every save() and reverses them on delete()"""
+
+    class Meta:
+        abstract = True
+
+    def journal_entries(self):
+        """[(date, account, debit, credit, party)], debits equal to credits"""
+        raise NotImplementedError
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            JournalLine.objects.post([self])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            JournalLine.objects.post([self], removed=True)
+            return super().delete(*args, **kwargs)
+
+
+# What an invoice billed in INR; invoices saved before inr_equivalent was
+# stored count at face value, as the journal books them
+BILLED_INR = Coalesce('inr_equivalent', 'total_with_gst')
+
+
+class ClientManager(models.Manager):
+    def attach(self, invoices):
+        """
+        Point each invoice at the client for its buyer name, address and
+        GSTIN, creating missing clients. A constant number of queries per
+        user, however many invoices and clients there are.
+        """
+        def key(invoice):
+            return invoice.user_id, invoice.buyer_name, invoice.buyer_address, invoice.buyer_gst or ''
+
+        keys = {key(invoice) for invoice in invoices}
+        names = defaultdict(set)
+        for user_id, name, _, _ in keys:
+            names[user_id].add(name)
+
+        def load(clients):
+            for user_id, user_names in names.items():
+                for client in self.filter(user_id=user_id, name__in=user_names):
+                    clients[(client.user_id, client.name, client.address, client.gst)] = client
+
+        clients = {}
+        load(clients)
+        missing = keys - clients.keys()
+        if missing:
+            # A concurrent save may create the same client; the unique
+            # constraint keeps one and the reload picks it up
+            self.bulk_create([Client(user_id=user_id, name=name, address=address, gst=gst)
+                              for user_id, name, address, gst in sorted(missing, key=lambda k: k[1:])],
+                             ignore_conflicts=True)
+            load(clients)
+        for invoice in invoices:
+            invoice.client = clients[key(invoice)]
+
+    def refresh(self, client_ids):
+        """
+        Recount the aggregates of the given clients from their invoices, in
+        one UPDATE; clients left without invoices are removed.
+        """
+        client_ids = {client_id for client_id in client_ids if client_id is not None}
+        if not client_ids:
+            return
+        invoices = Invoice.objects.filter(client=OuterRef('pk')).order_by().values('client')
+        self.filter(pk__in=client_ids).update(
+            invoice_count=Coalesce(Subquery(invoices.annotate(n=Count('pk')).values('n')), 0),
+            total_billed=Coalesce(Subquery(invoices.annotate(total=Sum(BILLED_INR)).values('total')), 0.0),
+            last_invoice_date=Subquery(invoices.annotate(last=Max('invoice_date')).values('last')),
+            updated_at=Now(),
+        )
+        self.filter(pk__in=client_ids, invoice_count=0).delete()
+
+
+class Client(models.Model):
+    """
+    A buyer as invoices name it: one row per distinct (name, address, GSTIN)
+    of a user's invoices, with aggregates kept current on every invoice
+    save and delete.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
+    name = models.CharField(max_length=255)
+    address = models.TextField()
+    gst = models.CharField(max_length=20, blank=True, default='')
+    invoice_count = models.PositiveIntegerField(default=0)
+    total_billed = models.FloatField(default=0.0)  # Sum of BILLED_INR
+    last_invoice_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ClientManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name', 'address', 'gst'], name='unique_client'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class InvoiceManager(models.Manager):
+    def bulk_create_numbered(self, invoices, batch_size=500, keep_numbers=False):
+        """Number, total and insert unsaved invoices in a single transaction.
+
+        Each (user, financial year) gets one contiguous block of numbers,
+        handed out in list order, instead of one sequence update per invoice.
+        With keep_numbers, invoices that have an invoice_number (imported
+        ones) keep it and the year's sequence moves on past the highest.
+        """
+        groups = defaultdict(list)
+        kept = defaultdict(int)
+        for invoice in invoices:
+            invoice.financial_year = get_financial_year(invoice.invoice_date)
+            invoice.calculate_totals()
+            if keep_numbers and invoice.invoice_number:
+                parsed = parse_invoice_number(invoice.invoice_number)
+                invoice.sequence = parsed[0] if parsed and parsed[1] == invoice.financial_year else None
+                key = (invoice.user_id, invoice.financial_year)
+                kept[key] = max(kept[key], invoice.sequence or 0)
+            else:
+                groups[(invoice.user_id, invoice.financial_year)].append(invoice)
+
+        with transaction.atomic():
+            for (user_id, financial_year), number in kept.items():
+                if number:
+                    InvoiceSequence.objects.advance(user_id, financial_year, number)
+            for (user_id, financial_year), group in groups.items():
+                first = InvoiceSequence.objects.allocate(user_id, financial_year, count=len(group))
+                for offset, invoice in enumerate(group):
+                    invoice.sequence = first + offset
+                    invoice.invoice_number = format_invoice_number(invoice.sequence, financial_year)
+            Client.objects.attach(invoices)
+            created = self.bulk_create(invoices, batch_size=batch_size)
+            SearchDocument.objects.index(created)
+            JournalLine.objects.post(created)
+            Client.objects.refresh(invoice.client_id for invoice in created)
+            # bulk_create sends no post_save, which is what touches the user elsewhere
+            for user_id in {invoice.user_id for invoice in created}:
+                CustomUser.objects.touch(user_id)
+            return created
+
+    def refresh_payments(self, invoice_ids):
+        """
+        Recompute amount_received and outstanding of the given invoices from
+        their linked payments, in one UPDATE.
+        """
+        invoice_ids = {invoice_id for invoice_id in invoice_ids if invoice_id is not None}
+        if not invoice_ids:
+            return
+        received = Coalesce(Subquery(
+            CompanyBill.objects.filter(linked_invoice=OuterRef('pk')).order_by().values('linked_invoice')
+            .annotate(total=Sum('amount')).values('total'), output_field=models.FloatField()), 0.0)
+        self.filter(pk__in=invoice_ids).update(
+            amount_received=received, outstanding=F('total_with_gst') - received, updated_at=Now())
+
+
+class Invoice(Journaled, SearchIndexed):
+    search_kind = 'invoice'
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
     # Buyer Info (required fields)
     buyer_name = models.CharField(max_length=255)
     buyer_address = models.TextField()
     buyer_gst = models.CharField(max_length=20, blank=True, null=True)
+    client = models.ForeignKey(Client, on_delete=models.SET_NULL, null=True, blank=True, related_name='invoices')
     
     # Consignee Info (optional)
     consignee_name = models.CharField(max_length=255, blank=True, null=True)
@@ -66,6 +531,7 @@ class Invoice(models.Model):
     # Invoice details (date is required)
     financial_year = models.CharField(max_length=9, default='2025-2026')
     invoice_number = models.CharField(max_length=20, default="01-2025/2026")
+    sequence = models.PositiveIntegerField(blank=True, null=True, editable=False)  # Numeric part of invoice_number
     invoice_date = models.DateField()
     
     # Optional fields
@@ -90,6 +556,7 @@ class Invoice(models.Model):
     # Tax details
     cgst = models.FloatField(blank=True, null=True, default=0.0)
     sgst = models.FloatField(blank=True, null=True, default=0.0)
+    igst = models.FloatField(blank=True, null=True, default=0.0)
     total_with_gst = models.FloatField()
     amount_in_words = models.CharField(max_length=255, blank=True, null=True)
     taxtotal = models.FloatField(blank=True, null=True, default=0.0)
@@ -100,91 +567,140 @@ class Invoice(models.Model):
     exchange_rate = models.FloatField(blank=True, null=True, default=1.0)
     inr_equivalent = models.FloatField(blank=True, null=True)
 
+    # Sum of the payments linked to this invoice (CompanyBill.linked_invoice)
+    # and what is left to pay, in the invoice currency; kept current by
+    # every payment save and delete
+    amount_received = models.FloatField(default=0.0, editable=False)
+    outstanding = models.FloatField(default=0.0, editable=False)
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     country_flag = models.URLField(max_length=300, blank=True, null=True)
 
+    objects = InvoiceManager()
+
+    def search_document(self):
+        return (f"{self.invoice_number or ''} {self.buyer_name}",
+                ' '.join(filter(None, [self.buyer_address, self.Particulars, self.remark])),
+                self.invoice_date)
+
+    def journal_entries(self):
+        # Booked in INR at the invoice's exchange rate; invoices saved before
+        # the INR equivalent was stored are booked at face value
+        inr = self.inr_equivalent if self.inr_equivalent is not None else self.total_with_gst
+        total = as_money(inr)
+        rate = inr / self.total_with_gst if self.total_with_gst else 1
+        gst = as_money((self.taxtotal or 0) * rate)
+        return [(self.invoice_date, RECEIVABLE_ACCOUNT, total, 0, self.buyer_name),
+                (self.invoice_date, SALES_ACCOUNT, 0, total - gst, ''),
+                (self.invoice_date, GST_ACCOUNT, 0, gst, '')]
+
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'financial_year', 'invoice_number'],
+                name='unique_invoice_number_per_year',
+            ),
+        ]
+        # Access paths of the invoice list filters; the unique constraint
+        # above already covers (user, financial_year)
+        indexes = [
+            # Also covers the monthly invoiced totals of the income and expenditure statement
+            models.Index(fields=['user', 'invoice_date', 'inr_equivalent', 'total_with_gst'],
+                         name='invoice_user_date_billed_idx'),
+            models.Index(fields=['user', 'buyer_name'], name='invoice_user_buyer_idx'),
+            models.Index(fields=['user', 'buyer_gst', 'invoice_date'], name='invoice_user_gst_date_idx'),
+            models.Index(fields=['user', 'total_with_gst'], name='invoice_user_total_idx'),
+            # Payments name their invoice by number alone
+            models.Index(fields=['user', 'invoice_number'], name='invoice_user_number_idx'),
+            # Unpaid / paid invoice lists
+            models.Index(fields=['user', 'outstanding'], name='invoice_user_outstanding_idx'),
+            # Covers the receivables aging report, grouped in index order
+            models.Index(fields=['user', 'client', 'currency', 'invoice_date', 'total_with_gst'],
+                         name='invoice_user_aging_idx'),
+            # Covers the dashboard's per-year totals
+            models.Index(fields=['user', 'financial_year', 'inr_equivalent', 'total_with_gst'],
+                         name='invoice_user_year_billed_idx'),
+        ]
 
     def _str_(self):
         return self.invoice_number
 
     def save(self, *args, **kwargs):
-        # Only generate invoice number for new records
-        if not self.pk:
-            # Use invoice_date to determine financial year, fallback to current year
-            if self.invoice_date:
-                # Financial year logic: April 1st to March 31st
-                # If date is April (4) or later, financial year starts that year
-                # If date is January (1), February (2), or March (3), financial year started the previous year
-                if self.invoice_date.month >= 4:  # April or later
-                    financial_year_start = self.invoice_date.year
-                else:  # January, February, or March
-                    financial_year_start = self.invoice_date.year - 1
-                
-                financial_year_end = financial_year_start + 1
-                self.financial_year = f"{financial_year_start}/{financial_year_end}"
-            else:
-                # Fallback to current date logic
-                current_date = datetime.now().date()
-                if current_date.month >= 4:  # April or later
-                    financial_year_start = current_date.year
-                else:  # January, February, or March
-                    financial_year_start = current_date.year - 1
-                
-                financial_year_end = financial_year_start + 1
-                self.financial_year = f"{financial_year_start}/{financial_year_end}"
-            
-            # Find the last invoice for this financial year and user
-            last_invoice = Invoice.objects.filter(
-                financial_year=self.financial_year,
-                user=self.user
-            ).order_by('-invoice_number').first()
-            
-            if last_invoice:
-                try:
-                    # Extract number part (format "01-2025/2026")
-                    num_part = last_invoice.invoice_number.split('-')[0]
-                    next_num = int(num_part) + 1
-                except (ValueError, IndexError):
-                    next_num = 1
-            else:
-                next_num = 1
-            
-            self.invoice_number = f"{next_num:02d}-{self.financial_year}"
-        
-        # Calculate totals
-        self.calculate_totals()
-        
-          # Calculate INR equivalent if currency is not INR
-        if self.currency != 'INR':
-            if hasattr(self, 'exchange_rate') and self.exchange_rate:
-                # Use the provided exchange rate if available
-                self.inr_equivalent = self.total_with_gst * self.exchange_rate
-            else:
-                # Fallback to default conversion if no rate provided
-                self.inr_equivalent = self.total_with_gst * 1  # Adjust this if you have a default rate
-        
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Only generate invoice number for new records
+            if not self.pk:
+                # Use invoice_date to determine financial year, fallback to current year
+                self.financial_year = get_financial_year(self.invoice_date)
+                self.sequence = InvoiceSequence.objects.allocate(self.user, self.financial_year)
+                self.invoice_number = format_invoice_number(self.sequence, self.financial_year)
+
+            # Calculate totals
+            self.calculate_totals()
+
+            adding = self._state.adding
+            previous_client_id = self.client_id
+            Client.objects.attach([self])
+            super().save(*args, **kwargs)
+            Client.objects.refresh([previous_client_id, self.client_id])
+            if not adding:
+                # The total may have changed, and this instance's
+                # amount_received may predate the latest payment
+                Invoice.objects.refresh_payments([self.pk])
+                # Payments are booked at the invoice's exchange rate
+                payments = list(self.payments.all())
+                for payment in payments:
+                    payment.linked_invoice = self
+                JournalLine.objects.post(payments)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            payments = list(self.payments.all())
+            deleted = super().delete(*args, **kwargs)
+            Client.objects.refresh([self.client_id])
+            # SET_NULL unlinked them without touching updated_at, which the company list ETag is built from
+            CompanyBill.objects.filter(pk__in=[payment.pk for payment in payments]).update(updated_at=Now())
+            # Unlinked, the payments are advances booked at their face value
+            for payment in payments:
+                payment.linked_invoice = None
+            JournalLine.objects.post(payments)
+            return deleted
 
     def calculate_totals(self):
-        """Calculate financial fields"""
+        """Calculate financial fields; serializers read these columns as stored"""
         if not self.base_amount and self.total_hours and self.rate:
             self.base_amount = self.total_hours * self.rate
-        
-        if self.country == 'India' and self.base_amount:
-            self.cgst = (self.base_amount * 9) / 100
-            self.sgst = (self.base_amount * 9) / 100
-            self.taxtotal = self.cgst + self.sgst
-            self.total_with_gst = self.base_amount + self.taxtotal
+        base_amount = self.base_amount or 0
+
+        self.cgst = 0
+        self.sgst = 0
+        self.igst = 0
+        if self.country == 'India':
+            # Supplies within the seller's state pay CGST + SGST, other states pay IGST
+            if self.state == SELLER_STATE:
+                self.cgst = base_amount * 0.09
+                self.sgst = base_amount * 0.09
+            else:
+                self.igst = base_amount * 0.18
+        self.taxtotal = self.cgst + self.sgst + self.igst
+        self.total_with_gst = base_amount + self.taxtotal
+
+        self.outstanding = self.total_with_gst - (self.amount_received or 0)
+
+        # Calculate INR equivalent if currency is not INR
+        if self.currency != 'INR' and self.exchange_rate:
+            self.inr_equivalent = self.total_with_gst * self.exchange_rate
         else:
-            self.cgst = 0
-            self.sgst = 0
-            self.taxtotal = 0
-            self.total_with_gst = self.base_amount
+            self.inr_equivalent = self.total_with_gst
+
+        try:
+            self.amount_in_words = amount_in_words(self.total_with_gst, self.currency) + " Only"
+        except (OverflowError, ValueError):
+            # Amount too large, or no words for this currency
+            self.amount_in_words = None
 
 class Setting(models.Model):
     # Seller Info
@@ -206,6 +722,7 @@ class Setting(models.Model):
     HSN_codes = models.JSONField(default=list)
     logo = models.ImageField(upload_to='company_logos/', null=True, blank=True)
     last_invoice_number = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     
     # Link to user (one-to-one relationship)
     user = models.OneToOneField(
@@ -239,7 +756,8 @@ class Deposit(models.Model):
     def _str_(self):
         return f"₹{self.amount} on {self.deposit_date} for Statement {self.statement.id}"
 
-class Buyer(models.Model):
+class Buyer(Journaled, SearchIndexed):
+    search_kind = 'buyer'
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     PAYMENT_CHOICES = [
         ('Cash', 'Cash'),
@@ -252,6 +770,20 @@ class Buyer(models.Model):
     notice = models.TextField(default="No remarks")
     payment_method = models.CharField(max_length=100, null=False, default='Cash')
     bank_name = models.CharField(max_length=100, null=True, blank=True,default=None)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Covers the income and expenditure statement's daily totals
+        indexes = [
+            models.Index(fields=['user', 'transaction_date', 'amount'], name='buyer_user_date_amount_idx'),
+        ]
+
+    def search_document(self):
+        return self.buyer_name, self.notice, self.transaction_date
+
+    def journal_entries(self):
+        return [(self.transaction_date, BUYER_ACCOUNT, self.amount, 0, self.buyer_name),
+                (self.transaction_date, settlement_account(self.payment_method, self.bank_name), 0, self.amount, '')]
 
     def __str__(self):
         return f"{self.buyer_name} - {self.transaction_date}"
@@ -262,7 +794,8 @@ class Bank(models.Model):
     def _str_(self):
         return self.name
 
-class CompanyBill(models.Model):
+class CompanyBill(Journaled, SearchIndexed):
+    search_kind = 'company'
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     PAYMENT_CHOICES = [
         ('Cash', 'Cash'),
@@ -270,17 +803,63 @@ class CompanyBill(models.Model):
     ]
 
     company_name = models.CharField(max_length=255, null=True, blank=True)  # Changed from buyer_name
-    invoice_id = models.CharField(max_length=50, null=True, blank=True)
+    invoice_id = models.CharField(max_length=50, null=True, blank=True)  # Invoice number as typed
+    # The invoice this payment settles, resolved from invoice_id on save;
+    # indexed by companybill_invoice_date_idx below
+    linked_invoice = models.ForeignKey(Invoice, on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name='payments', db_index=False, editable=False)
     transaction_date = models.DateField(null=True, blank=True)
     notice = models.CharField(max_length=255, null=False, default="")
     amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)  # Changed from deposit_amount
     payment_method = models.CharField(max_length=10, choices=PAYMENT_CHOICES, null=True, blank=True)
     bank_name = models.CharField(max_length=100, null=True, blank=True)
+    # When the payment was entered: the date of an undated payment, unlike
+    # updated_at, which every edit moves
+    recorded_on = models.DateField(default=timezone.localdate, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Deposits against one invoice, in date order (company balance), and
+        # the income and expenditure statement's daily receipts
+        indexes = [
+            models.Index(fields=['linked_invoice', 'transaction_date'], name='companybill_invoice_date_idx'),
+            models.Index(fields=['user', 'transaction_date', 'amount'], name='companybill_user_date_idx'),
+        ]
+
+    def search_document(self):
+        return self.company_name, ' '.join(filter(None, [self.invoice_id, self.notice])), self.transaction_date
+
+    def journal_entries(self):
+        # Undated payments are booked on the day they were recorded
+        day = self.transaction_date or self.recorded_on
+        # The amount is in the invoice's currency; the receivable was booked in INR at its rate
+        invoice, amount = self.linked_invoice, self.amount
+        if invoice is not None and invoice.total_with_gst and invoice.inr_equivalent:
+            amount = as_money(float(amount or 0) * invoice.inr_equivalent / invoice.total_with_gst)
+        # Owed by the invoice's buyer; without one, an advance from the company
+        party = invoice.buyer_name if invoice is not None else self.company_name
+        return [(day, settlement_account(self.payment_method, self.bank_name), amount, 0, ''),
+                (day, RECEIVABLE_ACCOUNT, 0, amount, party)]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous_invoice_id = self.linked_invoice_id
+            self.linked_invoice_id = Invoice.objects.filter(
+                user_id=self.user_id, invoice_number=self.invoice_id
+            ).order_by('-pk').values_list('pk', flat=True).first() if self.invoice_id else None
+            super().save(*args, **kwargs)
+            Invoice.objects.refresh_payments([previous_invoice_id, self.linked_invoice_id])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            Invoice.objects.refresh_payments([self.linked_invoice_id])
+            return deleted
 
     def _str_(self):
         return f"{self.company_name} - {self.invoice_id or 'No Invoice'}"
     
-class Salary(models.Model):
+class Salary(Journaled):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     PAYMENT_CHOICES = [
         ('Cash', 'Cash'),
@@ -293,11 +872,24 @@ class Salary(models.Model):
     salary_date = models.DateField()
     payment_method = models.CharField(max_length=10, choices=PAYMENT_CHOICES, null=True, blank=True)
     bank_name = models.CharField(max_length=100, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Covers the income and expenditure statement's daily totals
+        indexes = [
+            models.Index(fields=['user', 'salary_date', 'salary_amount'], name='salary_user_date_amount_idx'),
+        ]
+
+    def journal_entries(self):
+        return [(self.salary_date, SALARY_ACCOUNT, self.salary_amount, 0, self.salary_name),
+                (self.salary_date, settlement_account(self.payment_method, self.bank_name), 0, self.salary_amount,
+                 '')]
 
     def _str_(self):
         return f"{self.salary_name} Salary"
 
-class Other(models.Model):
+class Other(Journaled, SearchIndexed):
+    search_kind = 'other'
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     TRANSACTION_TYPE_CHOICES = [
         ('credit', 'Credit'),
@@ -322,16 +914,39 @@ class Other(models.Model):
     payment_method = models.CharField(max_length=10, choices=PAYMENT_CHOICES, null=True, blank=True)
     bank_name = models.CharField(max_length=100, null=True, blank=True)
     partner = models.ForeignKey('Partner', null=True, blank=True, on_delete=models.SET_NULL)
-    
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'other_type'], name='other_user_type_idx'),
+            # Covers the income and expenditure statement's daily totals per type
+            models.Index(fields=['user', 'other_date', 'other_type', 'transaction_type', 'other_amount'],
+                         name='other_user_date_type_idx'),
+        ]
+
+    def search_document(self):
+        return self.other_type, self.other_notice, self.other_date
+
+    def journal_entries(self):
+        # save() has signed the amount: money in for credits, out for debits
+        account, money = f'Other:{self.other_type}', settlement_account(self.payment_method, self.bank_name)
+        amount = abs(self.other_amount)
+        if self.other_amount < 0:
+            return [(self.other_date, account, amount, 0, self.other_notice), (self.other_date, money, 0, amount, '')]
+        return [(self.other_date, money, amount, 0, ''), (self.other_date, account, 0, amount, self.other_notice)]
+
     def _str_(self):  
         return f"{self.other_type} ({self.transaction_type}) - {self.other_date} - ${abs(self.other_amount)}"
     
-    def save(self, *args, **kwargs):
+    def sign_amount(self):
         # Ensure amount is negative for debits and positive for credits
         if self.transaction_type == 'debit':
             self.other_amount = -abs(self.other_amount)
         else:
             self.other_amount = abs(self.other_amount)
+
+    def save(self, *args, **kwargs):
+        self.sign_amount()
         super().save(*args, **kwargs)
 
 
@@ -342,14 +957,19 @@ class BankingDeposit(models.Model):
     def _str_(self):
         return f"{self.amount} on {self.date}"
     
-class Employee(models.Model):
+class Employee(SearchIndexed):
+    search_kind = 'employee'
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
     joining_date = models.DateField()
     salary = models.DecimalField(max_digits=10, decimal_places=2)
     email = models.EmailField()
     number = models.CharField(max_length=15)
+    updated_at = models.DateTimeField(auto_now=True)
     
+    def search_document(self):
+        return self.name, f"{self.email} {self.number}", self.joining_date
+
     def _str_(self):
         return self.name
 
@@ -379,22 +999,218 @@ class BankAccount(models.Model):
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     is_deleted = models.BooleanField(default=False)
 
+    class Meta:
+        # Active and soft-deleted lists
+        indexes = [
+            models.Index(fields=['user', 'is_deleted'], name='bankaccount_user_deleted_idx'),
+        ]
+
     def __str__(self):
         return f"{self.bank_name} - {self.account_number}"
-    
 
-class CashEntry(models.Model):
+
+class BankStatement(models.Model):
+    """
+    An uploaded statement of a bank account. Its lines are matched to the
+    company, buyer, salary and other transactions carrying the account's
+    bank_name (see reconcile.py).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    bank_account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='statements')
+    filename = models.CharField(max_length=255)
+    date_from = models.DateField(null=True, blank=True)
+    date_to = models.DateField(null=True, blank=True)
+    # As printed on the statement, when it has one
+    closing_balance = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.bank_account})"
+
+
+class StatementLine(models.Model):
+    STATUS_CHOICES = [
+        ('unmatched', 'Unmatched'),
+        ('suggested', 'Suggested'),
+        ('confirmed', 'Confirmed'),
+        ('ignored', 'Ignored'),
+    ]
+
+    statement = models.ForeignKey(BankStatement, on_delete=models.CASCADE, related_name='lines')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    date = models.DateField()
+    # Money in positive, money out negative
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    description = models.TextField(blank=True, default='')
+    reference = models.CharField(max_length=255, blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='unmatched')
+    # The matched transaction, by model name and pk like JournalLine's source
+    source_type = models.CharField(max_length=20, blank=True, default='')
+    source_id = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Review lists by status
+            models.Index(fields=['statement', 'status', 'id'], name='statementline_status_idx'),
+            # Transactions already matched, left out of later statements
+            models.Index(fields=['user', 'source_type', 'source_id'], name='statementline_source_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.amount} ({self.status})"
+
+
+class ImportJobManager(models.Manager):
+    # A live import saves its counts every chunk, a few seconds apart
+    STALE_AFTER = timedelta(minutes=10)
+
+    def fail_stale(self, user):
+        """
+        Fail the user's unfinished imports that have not moved for
+        STALE_AFTER: the process running them has died, taking the
+        thread with it. The chunks already imported are kept.
+        """
+        now = timezone.now()
+        stale = self.filter(user=user, status__in=['pending', 'running'], updated_at__lt=now - self.STALE_AFTER)
+        for job in stale:
+            job.status, job.finished_at = 'failed', now
+            job.message = (f'The import stopped unexpectedly after {job.rows} rows; the {job.imported} '
+                           f'imported rows were kept. Import the rest of the file again.')
+            job.save(update_fields=['status', 'message', 'finished_at', 'updated_at'])
+
+
+class ImportJob(models.Model):
+    """
+    One bulk import of a CSV or XLSX file into a dataset (see imports.py),
+    with its progress; rows that could not be imported are its row_errors.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    dataset = models.CharField(max_length=20)
+    filename = models.CharField(max_length=255)
+    # The upload, until the import has read it; the import command reads its file in place
+    file = models.FileField(upload_to='imports/', blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    rows = models.PositiveIntegerField(default=0)
+    imported = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # Share of the file read, 0 to 1
+    progress = models.FloatField(default=0.0)
+    # Why a failed import stopped
+    message = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Moves with every chunk; an unfinished job whose updated_at stops moving has died
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ImportJobManager()
+
+    def __str__(self):
+        return f"{self.dataset} import of {self.filename} ({self.status})"
+
+
+class ImportRowError(models.Model):
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name='row_errors')
+    # Line of the file (the header is line 1), or row of the sheet
+    row = models.PositiveIntegerField()
+    errors = models.JSONField()
+
+    def __str__(self):
+        return f"row {self.row}: {self.errors}"
+
+
+class CashEntry(Journaled):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     date = models.DateField()
     description = models.TextField(blank=True, null=True)
     is_deleted = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_deleted'], name='cashentry_user_deleted_idx'),
+            # The live entries by date, as the transaction feed reads them
+            models.Index(fields=['user', 'date'], condition=models.Q(is_deleted=False),
+                         name='cashentry_user_live_date_idx'),
+        ]
+
+    def journal_entries(self):
+        if self.is_deleted:
+            return []
+        if self.amount < 0:
+            return [(self.date, CASH_ADJUSTMENT_ACCOUNT, -self.amount, 0, ''), (self.date, CASH_ACCOUNT, 0, -self.amount, '')]
+        return [(self.date, CASH_ACCOUNT, self.amount, 0, ''), (self.date, CASH_ADJUSTMENT_ACCOUNT, 0, self.amount, '')]
 
     def __str__(self):
         return f"Cash: {self.amount} on {self.date}"
 
-class Partner(models.Model):
+
+def month_start(day):
+    if isinstance(day, str):
+        day = date.fromisoformat(day[:10])
+    return day.replace(day=1)
+
+
+def previous_month(month):
+    return (month - timedelta(days=1)).replace(day=1)
+
+
+class LedgerSnapshotManager(models.Manager):
+    def invalidate(self, user_id, day):
+        """
+        Reopen the periods from the month of day on, after an entry dated
+        then was written; earlier snapshots stay as they are.
+        """
+        if user_id is None or day is None:
+            return
+        boundary = previous_month(month_start(day))
+        reopened = CustomUser.objects.filter(
+            pk=user_id, ledger_closed_through__gt=boundary).update(ledger_closed_through=boundary)
+        # Snapshots only exist up to ledger_closed_through
+        if reopened:
+            self.filter(user_id=user_id, period__gt=boundary).delete()
+
+
+class LedgerSnapshot(models.Model):
+    """
+    Closing totals of one journal account and party at the end of a month:
+    debits and credits of every line dated up to then. Every account the
+    user had by that month has a row, so an as-of balance is one month's
+    rows plus the lines since (see ledger.py).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    period = models.DateField()  # First day of the month closed
+    account = models.CharField(max_length=255)
+    party = models.TextField(blank=True, default='')
+    debit = models.FloatField(default=0.0)
+    credit = models.FloatField(default=0.0)
+
+    objects = LedgerSnapshotManager()
+
+    class Meta:
+        # Also the access path: one user's rows for one month
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'period', 'account', 'party'],
+                                    name='unique_ledger_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"{self.account} {self.party} at {self.period}"
+
+class Partner(SearchIndexed):
+    search_kind = 'partner'
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def search_document(self):
+        return self.name, '', None
 
     def __str__(self):
         return self.name
@@ -414,4 +1230,8 @@ class OTP(models.Model):
         return f"OTP for {self.email}"
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        # Latest code sent to an address
+        indexes = [
+            models.Index(fields=['email', 'created_at'], name='otp_email_created_idx'),
+        ]
\ No newline at end of file
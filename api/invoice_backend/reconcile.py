@@ -0,0 +1,334 @@
+"""
+Bank statement import and reconciliation.
+
+A statement (CSV or OFX) is parsed as a stream of lines, each a date, a
+signed amount (money in positive), a description and a reference. The
+transactions of the account's bank in the statement's dates, widened by
+the matching window, are read as plain tuples into a hash index:
+amount in paise -> that amount's transactions sorted by date, leaving
+out amounts no line has. A line looks up its amount and bisects to the
+dates within the window, so matching is one dictionary probe and a short
+scan per line rather than lines x transactions. Lines are matched and
+stored a chunk at a time as they are parsed, each chunk reading the
+transactions of its own dates.
+
+Among the candidates a line prefers one whose reference (invoice number,
+party name, notice) appears in its description or reference, then the
+nearest date. Each transaction matches at most one line, across
+statements too. Matches are stored as suggestions to confirm or correct.
+"""
+import csv
+import io
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Sum
+from django.db.models.functions import Cast, Round
+from rest_framework.exceptions import ParseError
+
+from .models import (BankAccount, BankStatement, Buyer, CompanyBill, CustomUser, JournalLine, Other, Salary,
+                     StatementLine, bank_account as bank_journal_account)
+
+DEFAULT_WINDOW = 3
+# Statement lines matched and inserted at a time
+CHUNK_SIZE = 2000
+CENT = Decimal('0.01')
+
+# Header spellings banks use, lower-cased
+DATE_COLUMNS = ('date', 'transaction date', 'txn date', 'value date', 'posting date')
+DESCRIPTION_COLUMNS = ('description', 'narration', 'particulars', 'details', 'remarks')
+REFERENCE_COLUMNS = ('reference', 'ref', 'ref no', 'chq/ref no', 'chq./ref.no.', 'cheque no')
+AMOUNT_COLUMNS = ('amount',)
+WITHDRAWAL_COLUMNS = ('withdrawal', 'withdrawal amt.', 'debit', 'dr')
+DEPOSIT_COLUMNS = ('deposit', 'deposit amt.', 'credit', 'cr')
+BALANCE_COLUMNS = ('balance', 'closing balance')
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%b-%Y', '%d %b %Y')
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value):
+    # A statement repeats a few hundred dates over thousands of lines
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _date(value, where):
+    day = _parse_date(value.strip())
+    if day is None:
+        raise ParseError(f'{where}: unrecognised date {value!r}')
+    return day
+
+
+def _amount(value, where):
+    value = value.strip().replace(',', '')
+    if not value:
+        return Decimal(0)
+    try:
+        return Decimal(value).quantize(CENT)
+    except InvalidOperation:
+        raise ParseError(f'{where}: unrecognised amount {value!r}')
+
+
+def _column(header, names):
+    return next((header[name] for name in names if name in header), None)
+
+
+def parse_csv(stream):
+    """
+    Yield (date, amount, description, reference, balance) per row of a
+    CSV statement, with either an amount column or withdrawal and deposit
+    columns.
+    """
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    header = {name.strip().lower(): index for index, name in enumerate(next(reader, []))}
+    day, amount = _column(header, DATE_COLUMNS), _column(header, AMOUNT_COLUMNS)
+    withdrawal, deposit = _column(header, WITHDRAWAL_COLUMNS), _column(header, DEPOSIT_COLUMNS)
+    description, reference = _column(header, DESCRIPTION_COLUMNS), _column(header, REFERENCE_COLUMNS)
+    balance = _column(header, BALANCE_COLUMNS)
+    if day is None or (amount is None and (withdrawal is None or deposit is None)):
+        raise ParseError('CSV statement needs a date column and an amount or withdrawal and deposit columns')
+
+    for number, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        where = f'line {number}'
+        cell = lambda index: row[index] if index is not None and index < len(row) else ''
+        value = (_amount(cell(amount), where) if amount is not None
+                 else _amount(cell(deposit), where) - _amount(cell(withdrawal), where))
+        yield (_date(cell(day), where), value, cell(description).strip(), cell(reference).strip(),
+               _amount(cell(balance), where) if cell(balance).strip() else None)
+
+
+def _ofx_date(value, where):
+    # YYYYMMDD, optionally followed by a time and a [zone]
+    try:
+        return datetime.strptime(value[:8], '%Y%m%d').date()
+    except ValueError:
+        raise ParseError(f'{where}: unrecognised date {value!r}')
+
+
+def _ofx_tags(stream):
+    """(TAG, value) of an OFX file, SGML (one tag a line) or XML alike"""
+    for line in io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace'):
+        for piece in line.split('<')[1:]:
+            tag, _, value = piece.partition('>')
+            yield tag.strip().upper(), value.strip()
+
+
+def parse_ofx(stream):
+    """Yield (date, amount, description, reference, balance) per STMTTRN of an OFX statement"""
+    transaction_fields, closing, in_balance = None, None, False
+    for tag, value in _ofx_tags(stream):
+        if tag == 'STMTTRN':
+            transaction_fields = {}
+        elif tag == '/STMTTRN' and transaction_fields is not None:
+            where = f"transaction {transaction_fields.get('FITID', '')}".strip()
+            if 'DTPOSTED' not in transaction_fields or 'TRNAMT' not in transaction_fields:
+                raise ParseError(f'{where}: no DTPOSTED or TRNAMT')
+            yield (_ofx_date(transaction_fields['DTPOSTED'], where),
+                   _amount(transaction_fields['TRNAMT'], where),
+                   ' '.join(filter(None, (transaction_fields.get('NAME'), transaction_fields.get('MEMO')))),
+                   transaction_fields.get('CHECKNUM') or transaction_fields.get('REFNUM')
+                   or transaction_fields.get('FITID', ''),
+                   None)
+            transaction_fields = None
+        elif tag == 'LEDGERBAL':
+            in_balance = True
+        elif tag == 'BALAMT' and in_balance:
+            closing, in_balance = _amount(value, 'LEDGERBAL'), False
+        elif transaction_fields is not None and value:
+            transaction_fields[tag] = value
+    if closing is not None:
+        # The balance comes last; hand it on as the balance after the final line
+        yield None, None, None, None, closing
+
+
+PARSERS = {'csv': parse_csv, 'ofx': parse_ofx, 'qfx': parse_ofx}
+
+
+def statement_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension not in PARSERS:
+        raise ParseError(f"Unsupported statement format {extension!r}; upload a .csv or .ofx file")
+    return extension
+
+
+# Transactions a line can be matched to: (source_type as in StatementLine,
+# model, date field, amount field, reference fields, sign of the amount)
+SOURCES = [
+    ('companybill', CompanyBill, 'transaction_date', 'amount', ('invoice_id', 'company_name'), 1),
+    ('buyer', Buyer, 'transaction_date', 'amount', ('buyer_name', 'notice'), -1),
+    ('salary', Salary, 'salary_date', 'salary_amount', ('salary_name',), -1),
+    # Other amounts are stored signed already
+    ('other', Other, 'other_date', 'other_amount', ('other_notice', 'other_type'), 1),
+]
+SOURCE_MODELS = {source_type: model for source_type, model, *_ in SOURCES}
+
+
+def candidates(user, bank_name, start, end, amounts):
+    """
+    (source_type, pk, day, paise, references) of the user's transactions
+    through bank_name dated start..end, signed like statement lines, of
+    the amounts in paise given. Amounts come out of SQL as integers so
+    the rows need no Decimal conversion.
+    """
+    for source_type, model, date_field, amount_field, reference_fields, sign in SOURCES:
+        rows = (model.objects.filter(user=user, bank_name=bank_name, **{f'{date_field}__range': (start, end)})
+                .annotate(paise=Cast(Round(F(amount_field) * 100), IntegerField()))
+                .values_list('pk', date_field, 'paise', *reference_fields))
+        for pk, day, paise, *references in rows.iterator(chunk_size=5000):
+            if sign * paise in amounts:
+                yield source_type, pk, day, sign * paise, [
+                    reference.lower() for reference in references if reference and len(reference) >= 3]
+
+
+class Matcher:
+    """Hash index of candidate transactions by amount, each bucket sorted by date"""
+
+    def __init__(self, rows, taken=()):
+        buckets = defaultdict(list)
+        for source_type, pk, day, amount, references in rows:
+            if (source_type, pk) not in taken:
+                buckets[amount].append((day, source_type, pk, references))
+        self.buckets = {}
+        for amount, bucket in buckets.items():
+            bucket.sort(key=lambda row: (row[0], row[2]))
+            self.buckets[amount] = ([row[0] for row in bucket], bucket)
+        self.taken = set()
+
+    def match(self, day, amount, text, window, by_reference=False):
+        """
+        (source_type, pk) of the best untaken transaction for a line, taken
+        from now on, or None; by_reference, only one its text names
+        """
+        days, bucket = self.buckets.get(amount, ((), ()))
+        best, best_key = None, None
+        for index in range(bisect_left(days, day - window), bisect_right(days, day + window)):
+            when, source_type, pk, references = bucket[index]
+            if (source_type, pk) in self.taken:
+                continue
+            named = any(reference in text for reference in references)
+            if by_reference and not named:
+                continue
+            key = (not named, abs((when - day).days))
+            if best_key is None or key < best_key:
+                best, best_key = (source_type, pk), key
+        if best is not None:
+            self.taken.add(best)
+        return best
+
+
+def _match(account, lines, span, taken):
+    """
+    StatementLine rows of a statement's lines, matched to the transactions
+    not in taken; adds the ones matched to taken
+    """
+    start, end = min(line[0] for line in lines), max(line[0] for line in lines)
+    paise = [int(amount * 100) for _, amount, _, _ in lines]
+    matcher = Matcher(candidates(account.user_id, account.bank_name, start - span, end + span, set(paise)), taken)
+    texts = [f'{description} {reference}'.lower() for _, _, description, reference in lines]
+    # Lines naming their transaction first, so a line that doesn't can't take it from them
+    matches = [matcher.match(day, amount, text, span, by_reference=True)
+               for (day, _, _, _), amount, text in zip(lines, paise, texts)]
+    matches = [match or matcher.match(day, amount, text, span)
+               for match, (day, _, _, _), amount, text in zip(matches, lines, paise, texts)]
+    taken |= matcher.taken
+    return [StatementLine(user_id=account.user_id, date=day, amount=amount, description=description,
+                          reference=reference[:255], status='suggested' if match else 'unmatched',
+                          source_type=match[0] if match else '', source_id=match[1] if match else None)
+            for (day, amount, description, reference), match in zip(lines, matches)]
+
+
+def import_statement(account, filename, stream, window=DEFAULT_WINDOW, chunk_size=CHUNK_SIZE):
+    """
+    Parse a statement upload into a BankStatement of account, match its
+    lines and store them; returns the statement.
+
+    Lines are matched and inserted chunk_size at a time as they are parsed,
+    so a statement of any length holds one chunk in memory. Lines naming
+    their transaction are preferred within a chunk; a transaction matched
+    by one chunk is not offered to the next.
+    """
+    parse = PARSERS[statement_format(filename)]
+    span = timedelta(days=window)
+    closing, closing_day = None, None
+
+    def dated_lines():
+        nonlocal closing, closing_day
+        for day, amount, description, reference, balance in parse(stream):
+            # The balance after the latest line, whichever order the bank lists them in
+            if balance is not None and (day is None or closing_day is None or day >= closing_day):
+                closing, closing_day = balance, day or date.max
+            if day is not None:
+                yield day, amount, description, reference
+
+    with transaction.atomic():
+        statement = BankStatement.objects.create(user_id=account.user_id, bank_account=account, filename=filename)
+        taken = set(StatementLine.objects.filter(user=account.user_id, status__in=['suggested', 'confirmed'])
+                    .values_list('source_type', 'source_id').iterator())
+        lines = dated_lines()
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if not chunk:
+                break
+            rows = _match(account, chunk, span, taken)
+            for row in rows:
+                row.statement = statement
+            StatementLine.objects.bulk_create(rows, batch_size=1000)
+            days = [line[0] for line in chunk] + [day for day in (statement.date_from, statement.date_to) if day]
+            statement.date_from, statement.date_to = min(days), max(days)
+        if statement.date_from is None:
+            # Rolls the statement back
+            raise ParseError('The statement has no transactions')
+        statement.closing_balance = closing
+        statement.save(update_fields=['date_from', 'date_to', 'closing_balance'])
+    return statement
+
+
+def confirm_suggestions(statement):
+    """
+    Confirm every suggested match of a statement. The latest statement's
+    closing balance becomes the bank account's balance. Returns the count.
+    """
+    with transaction.atomic():
+        confirmed = statement.lines.filter(status='suggested').update(status='confirmed')
+        if statement.closing_balance is not None and not BankStatement.objects.filter(
+                bank_account=statement.bank_account_id, date_to__gt=statement.date_to).exists():
+            BankAccount.objects.filter(pk=statement.bank_account_id).update(amount=statement.closing_balance)
+            # update() sends no post_save, which is what touches the user elsewhere
+            CustomUser.objects.touch(statement.user_id)
+    return confirmed
+
+
+def summary(statement):
+    """Line counts by status, and the statement's closing balance against the journal's bank balance"""
+    counts = dict(statement.lines.values_list('status').order_by().annotate(count=Count('id')))
+    book = None
+    if statement.date_to is not None:
+        book = JournalLine.objects.filter(
+            user=statement.user_id, account=bank_journal_account(statement.bank_account.bank_name),
+            date__lte=statement.date_to,
+        ).aggregate(debits=Sum('debit'), credits=Sum('credit'))
+        book = float((book['debits'] or 0) - (book['credits'] or 0))
+    closing = float(statement.closing_balance) if statement.closing_balance is not None else None
+    return {
+        'id': statement.pk,
+        'bank_account': statement.bank_account_id,
+        'filename': statement.filename,
+        'date_from': statement.date_from,
+        'date_to': statement.date_to,
+        'uploaded_at': statement.uploaded_at,
+        'lines': {status: counts.get(status, 0) for status, _ in StatementLine.STATUS_CHOICES},
+        'closing_balance': closing,
+        'book_balance': book,
+        'difference': closing - book if closing is not None and book is not None else None,
+    }
@@ -0,0 +1,98 @@
+"""
+Faster encodings for the REST API, picked by content negotiation.
+
+ORJSONRenderer answers application/json, so every existing client gets
+it, and its output is byte-for-byte what rest_framework's JSONRenderer
+would have produced: payloads orjson would write differently (floats in
+exponent form, requested indentation, non-default JSON settings, values
+it cannot encode) go to JSONRenderer instead. MessagePack is served for
+Accept: application/msgpack and read from request bodies of that type.
+
+One deliberate difference: NaN and infinite floats, which JSONRenderer
+refuses with a 500 under the default STRICT_JSON, come out as null.
+"""
+import io
+import re
+
+import msgpack
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+# An exponent as orjson writes it (1e16, 1.2e-7). Anchored on the literal
+# 'e' so the scan skips ahead instead of testing every byte for a digit.
+_EXPONENT = re.compile(rb'e(?<=\de)[-\d]')
+# orjson reads integers beyond 64 bits as floats; json keeps them exact
+_LONG_INTEGER = re.compile(rb'\d{19}')
+
+
+def _may_differ(ret):
+    """
+    Whether orjson output may contain a float that float.__repr__, and so
+    JSONRenderer, writes differently: 1e16 vs 1e+16, 0.00001 vs 1e-05.
+    Lookalikes inside strings only cost a fallback, never a wrong byte.
+    """
+    return b'0.0000' in ret or _EXPONENT.search(ret) is not None
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (data is None or not self.compact or self.ensure_ascii
+                or not self.strict or self.get_indent(accepted_media_type or '', renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        except (TypeError, ValueError):
+            return super().render(data, accepted_media_type, renderer_context)
+        if _may_differ(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        # The same escapes JSONRenderer applies for JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8').lower().replace('_', '-')
+        if encoding not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if not _LONG_INTEGER.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        # Long integers, NaN under STRICT_JSON=False, malformed bodies: let
+        # JSONParser accept or reject them exactly as before
+        return super().parse(io.BytesIO(body), media_type, parser_context)
+
+
+def _msgpack_default(obj):
+    # Dates, Decimals and the like become what they would be in JSON
+    return JSONRenderer.encoder_class().default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True, datetime=False)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
+
@@ -0,0 +1,418 @@
+"""
+Reports that summarise many invoices or transactions per row, computed
+by the database in one grouped query rather than assembled in Python.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import connection as default_connection
+from django.db.models import F, Sum
+from django.db.models.functions import Abs
+
+from . import ledger
+from .models import (BILLED_INR, BUYER_ACCOUNT, CASH_ACCOUNT, RECEIVABLE_ACCOUNT, SALARY_ACCOUNT, Buyer, CashEntry,
+                     Client, CompanyBill, Invoice, JournalLine, Other, Salary, get_financial_year)
+
+DEFAULT_AGING_BUCKETS = (30, 60, 90)
+
+# Invoices whose payments leave less than this are settled, not open
+SETTLED_TOLERANCE = 0.005
+
+
+def aging_labels(edges):
+    """'0-30', '31-60', '61-90', '90+' for edges (30, 60, 90)"""
+    lower = [0] + [edge + 1 for edge in edges[:-1]]
+    return [f'{start}-{end}' for start, end in zip(lower, edges)] + [f'{edges[-1]}+']
+
+
+AGING_COLUMNS = ['client', 'buyer_name', 'buyer_gst', 'currency', 'invoice_count', 'total_outstanding']
+
+
+def receivables_aging(user, as_of, edges=DEFAULT_AGING_BUCKETS, limit=None, offset=0,
+                      connection=default_connection):
+    """
+    Open invoice amounts per client and currency as of a date, split by age
+    in days into the buckets the edges describe; largest balance first.
+
+    An invoice is open by its total less the payments linked to it dated
+    on or before as_of (undated payments count as made). Amounts stay in
+    the invoice currency, which is why a client billed in two currencies
+    has two rows. Returns tuples in AGING_COLUMNS order followed by one
+    amount per bucket.
+    """
+    invoice, payment, client = Invoice._meta.db_table, CompanyBill._meta.db_table, Client._meta.db_table
+    # Bucket i holds invoices dated on or after as_of - edges[i] days; the
+    # last one everything older than the last edge
+    cutoffs = [as_of - timedelta(days=edge) for edge in edges]
+    buckets, params = [], []
+    newer = None
+    for cutoff in cutoffs + [None]:
+        condition = []
+        if cutoff is not None:
+            condition.append('o.invoice_date >= %s')
+            params.append(cutoff)
+        if newer is not None:
+            condition.append('o.invoice_date < %s')
+            params.append(newer)
+        buckets.append(f"SUM(CASE WHEN {' AND '.join(condition)} THEN o.outstanding ELSE 0 END) AS bucket{len(buckets)}")
+        newer = cutoff
+
+    # Payments are summed per invoice first, so each invoice joins at most
+    # one row; invoice_user_aging_idx covers the invoice columns and groups
+    # them in index order; clients are looked up once per result row
+    sql = f"""
+        WITH paid AS (
+            SELECT p.linked_invoice_id AS invoice_id, SUM(p.amount) AS amount
+            FROM {payment} p
+            WHERE p.user_id = %s AND p.linked_invoice_id IS NOT NULL
+                AND (p.transaction_date <= %s OR p.transaction_date IS NULL)
+            GROUP BY p.linked_invoice_id
+        ), o AS (
+            SELECT i.client_id, i.currency, i.invoice_date, i.total_with_gst - COALESCE(paid.amount, 0) AS outstanding
+            FROM {invoice} i LEFT JOIN paid ON paid.invoice_id = i.id
+            WHERE i.user_id = %s AND i.invoice_date <= %s
+        ), g AS (
+            SELECT o.client_id, o.currency, COUNT(*) AS invoice_count, SUM(o.outstanding) AS total,
+                {', '.join(buckets)}
+            FROM o WHERE o.outstanding > %s
+            GROUP BY o.client_id, o.currency
+        )
+        SELECT c.id, c.name, c.gst, g.currency, g.invoice_count, g.total,
+            {', '.join(f'g.bucket{index}' for index in range(len(buckets)))}
+        FROM g LEFT JOIN {client} c ON c.id = g.client_id
+        ORDER BY g.total DESC, g.client_id, g.currency"""
+    params = [user.pk, as_of, user.pk, as_of] + params + [SETTLED_TOLERANCE]
+    if limit is not None:
+        sql += ' LIMIT %s OFFSET %s'
+        params += [limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(*row[:5], *(float(amount or 0) for amount in row[5:])) for row in cursor.fetchall()]
+
+
+# other_type values with a section of their own, matched case-insensitively
+# like the balance sheet screen always did; any other type is a custom section
+CAPITAL_TYPE = 'partner'
+LOAN_TYPE = 'loan'
+FIXED_ASSET_TYPE = 'fixed assets'
+
+
+def _entries(amounts, keep=lambda amount: True):
+    """[name, amount] pairs sorted by name, the shape the balance sheet renders"""
+    return [[name, amount] for name, amount in sorted(amounts.items(), key=lambda item: str(item[0]))
+            if keep(amount)]
+
+
+def _other_sections(accounts):
+    """Capital, loan, fixed asset and custom sections from the other transaction accounts"""
+    capital, loans, fixed_assets = {}, {}, {}
+    custom = defaultdict(dict)  # type -> name -> (debit, credit)
+    for (account, name), (debit, credit) in accounts.items():
+        group, _, kind = account.partition(':')
+        if group != 'Other':
+            continue
+        if kind.lower() == CAPITAL_TYPE:
+            capital[name] = capital.get(name, 0.0) + credit - debit
+        elif kind.lower() == LOAN_TYPE:
+            loans[name] = loans.get(name, 0.0) + credit - debit
+        elif kind.lower() == FIXED_ASSET_TYPE:
+            # Bought or sold, an asset's amount adds to its value here
+            fixed_assets[name] = fixed_assets.get(name, 0.0) + debit + credit
+        else:
+            custom[kind][name] = (debit, credit)
+    custom_credit, custom_debit = {}, {}
+    for kind, names in sorted(custom.items()):
+        credit = _entries({name: c - d for name, (d, c) in names.items()}, lambda net: net > 0)
+        # Nets of zero still show on the debit side when something was paid out
+        debit = [[name, abs(c - d)] for name, (d, c) in sorted(names.items(), key=lambda item: str(item[0]))
+                 if c - d <= 0 and d > 0]
+        if credit:
+            custom_credit[kind] = credit
+        if debit:
+            custom_debit[kind] = debit
+    return {
+        'capital': _entries(capital),
+        'loan_credit': _entries(loans, lambda net: net > 0),
+        'loan_debit': [[name, -net] for name, net in _entries(loans, lambda net: net < 0)],
+        'fixed_assets': _entries(fixed_assets),
+        'custom_credit': custom_credit,
+        'custom_debit': custom_debit,
+    }
+
+
+def _sundry_sections(accounts):
+    """
+    What each buyer still owes (sundry debtors) or has paid in advance
+    (sundry creditors), in INR: invoices less the payments linked to them,
+    both at the invoice's rate. Payments that name no invoice of the user
+    are advances from the company they came from.
+    """
+    named = {party: debit - credit
+             for (account, party), (debit, credit) in accounts.items() if account == RECEIVABLE_ACCOUNT}
+    return {
+        'sundry_debtors': _entries(named, lambda balance: balance > SETTLED_TOLERANCE),
+        'sundry_creditors': [[name, -balance] for name, balance
+                             in _entries(named, lambda balance: balance < -SETTLED_TOLERANCE)],
+    }
+
+
+def balance_sheet(user, as_of):
+    """
+    The balance sheet screen's sections as of a date, each a list of
+    [name, amount] pairs sorted by name, from the ledger balances of the
+    journal the trial balance sums. Custom sections are keyed by their
+    other_type.
+    """
+    accounts = ledger.balances(user, as_of)
+    sections = _other_sections(accounts)
+    for section, account in (('salary', SALARY_ACCOUNT), ('buyer', BUYER_ACCOUNT)):
+        sections[section] = _entries({party: debit for (kind, party), (debit, _) in accounts.items()
+                                      if kind == account})
+    sections.update(_sundry_sections(accounts))
+
+    totals = {name: sum(amount for _, amount in entries) for name, entries in sections.items()
+              if isinstance(entries, list)}
+    return {'as_of': as_of.isoformat(), **sections, 'totals': totals}
+
+
+# How the income and expenditure statement can split its date range
+PERIODS = ('month', 'quarter', 'year')
+
+# Other types that move capital, loans or assets rather than earn or spend
+BALANCE_SHEET_TYPES = (CAPITAL_TYPE, LOAN_TYPE, FIXED_ASSET_TYPE)
+
+
+def period_label(month, period):
+    """'2025-04', '2025/2026 Q1' or '2025/2026' for the month starting on that date"""
+    if period == 'month':
+        return month.strftime('%Y-%m')
+    financial_year = get_financial_year(month)
+    if period == 'year':
+        return financial_year
+    return f'{financial_year} Q{(month.month - 4) % 12 // 3 + 1}'
+
+
+def _daily(queryset, date_field, amount_field, *group_by):
+    """
+    Sums of amount_field per day (and group_by columns), in SQL. Grouping by
+    the bare date reads the (user, date, amount) covering indexes in order;
+    truncating to months in SQL would run a function per row on SQLite.
+    """
+    return queryset.values(date_field, *group_by).order_by().annotate(total=Sum(amount_field))
+
+
+def _statement_row(label):
+    return {'period': label, 'invoiced': 0.0, 'receipts': 0.0, 'other_income': defaultdict(float),
+            'salaries': 0.0, 'buyer_payments': 0.0, 'other_expenditure': defaultdict(float)}
+
+
+def _close_row(row):
+    row['other_income'] = dict(sorted(row['other_income'].items()))
+    row['other_expenditure'] = dict(sorted(row['other_expenditure'].items()))
+    row['total_income'] = row['invoiced'] + sum(row['other_income'].values())
+    row['total_expenditure'] = row['salaries'] + row['buyer_payments'] + sum(row['other_expenditure'].values())
+    row['surplus'] = row['total_income'] - row['total_expenditure']
+    return row
+
+
+def income_expenditure(user, date_from, date_to, period='month'):
+    """
+    Income and expenditure between two dates, one row per period in date
+    order followed by the totals.
+
+    Income is what was invoiced (in INR) plus other credits; expenditure
+    is salaries, buyer payments and other debits. Other transactions are
+    split by other_type, leaving out the partner, loan and fixed asset
+    types that belong on the balance sheet. Receipts, the company payments
+    received, are reported alongside but not added to income, which
+    already counts them when invoiced.
+
+    Each table is summed per day in SQL; days are then rolled up into
+    months, quarters or financial years, so the Python side never sees
+    more than one row per day, table and other_type.
+    """
+    months = {}
+
+    def add(day, field, amount, kind=None):
+        month = day.replace(day=1)
+        row = months.setdefault(month, _statement_row(period_label(month, period)))
+        if kind is None:
+            row[field] += float(amount or 0)
+        else:
+            row[field][kind] += float(amount or 0)
+
+    for row in _daily(Invoice.objects.filter(user=user, invoice_date__range=(date_from, date_to)),
+                      'invoice_date', BILLED_INR):
+        add(row['invoice_date'], 'invoiced', row['total'])
+    for row in _daily(CompanyBill.objects.filter(user=user, transaction_date__range=(date_from, date_to)),
+                      'transaction_date', 'amount'):
+        add(row['transaction_date'], 'receipts', row['total'])
+    for row in _daily(Salary.objects.filter(user=user, salary_date__range=(date_from, date_to)),
+                      'salary_date', 'salary_amount'):
+        add(row['salary_date'], 'salaries', row['total'])
+    for row in _daily(Buyer.objects.filter(user=user, transaction_date__range=(date_from, date_to)),
+                      'transaction_date', 'amount'):
+        add(row['transaction_date'], 'buyer_payments', row['total'])
+    others = Other.objects.filter(user=user, other_date__range=(date_from, date_to),
+                                  transaction_type__in=['credit', 'debit'])
+    for row in _daily(others, 'other_date', Abs('other_amount'), 'other_type', 'transaction_type'):
+        if row['other_type'].lower() not in BALANCE_SHEET_TYPES:
+            field = 'other_income' if row['transaction_type'] == 'credit' else 'other_expenditure'
+            add(row['other_date'], field, row['total'], row['other_type'])
+
+    periods, totals = {}, _statement_row('total')
+    for month in sorted(months):
+        row = months[month]
+        merged = periods.setdefault(row['period'], _statement_row(row['period']))
+        for target in (merged, totals):
+            for field in ('invoiced', 'receipts', 'salaries', 'buyer_payments'):
+                target[field] += row[field]
+            for field in ('other_income', 'other_expenditure'):
+                for kind, amount in row[field].items():
+                    target[field][kind] += amount
+    return {
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'period': period,
+        'periods': [_close_row(row) for row in periods.values()],
+        'totals': _close_row(totals),
+    }
+
+
+def trial_balance(user, as_of, prefix=None):
+    """
+    Debit and credit totals of every journal account up to a date, in
+    account order; with a prefix, of the accounts starting with it. One
+    range of journal_user_account_date_idx, which covers the sums.
+    """
+    lines = JournalLine.objects.filter(user=user, date__lte=as_of)
+    if prefix:
+        # A range rather than LIKE, which SQLite can't serve from the index
+        lines = lines.filter(account__gte=prefix, account__lt=prefix + '\U0010ffff')
+    accounts = [{
+        'account': row['account'],
+        'debit': float(row['debits']),
+        'credit': float(row['credits']),
+        'balance': float(row['debits'] - row['credits']),
+    } for row in lines.values('account').order_by('account').annotate(debits=Sum('debit'), credits=Sum('credit'))]
+    return {
+        'as_of': as_of.isoformat(),
+        'accounts': accounts,
+        'totals': {'debit': sum(row['debit'] for row in accounts), 'credit': sum(row['credit'] for row in accounts)},
+    }
+
+
+def account_ledger(user, account, date_from, date_to):
+    """
+    One account's journal lines between two dates with a running balance,
+    after the opening balance of everything before date_from.
+    """
+    lines = JournalLine.objects.filter(user=user, account=account)
+    opening = lines.filter(date__lt=date_from).aggregate(balance=Sum(F('debit') - F('credit')))['balance'] or 0
+    balance = float(opening)
+    rows = []
+    for line in (lines.filter(date__range=(date_from, date_to)).order_by('date', 'pk')
+                 .values('date', 'debit', 'credit', 'source_type', 'source_id', 'reversal')):
+        balance += float(line['debit'] - line['credit'])
+        rows.append({**line, 'debit': float(line['debit']), 'credit': float(line['credit']), 'balance': balance})
+    return {
+        'account': account,
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'opening_balance': float(opening),
+        'lines': rows,
+        'closing_balance': balance,
+    }
+
+
+# What a cash book entry says, by journal source_type
+CASH_BOOK_DESCRIPTIONS = {
+    'companybill': (CompanyBill, 'company_name'),
+    'buyer': (Buyer, 'buyer_name'),
+    'salary': (Salary, 'salary_name'),
+    'other': (Other, 'other_notice'),
+    'cashentry': (CashEntry, 'description'),
+}
+
+
+def cash_balances(user, date_from, date_to):
+    """Cash in hand before date_from and at the end of date_to, from journal_user_account_date_idx"""
+    lines = JournalLine.objects.filter(user=user, account=CASH_ACCOUNT)
+    net = Sum(F('debit') - F('credit'))
+    opening = float(lines.filter(date__lt=date_from).aggregate(balance=net)['balance'] or 0)
+    return opening, opening + float(lines.filter(date__range=(date_from, date_to)).aggregate(balance=net)['balance'] or 0)
+
+
+def cash_book(user, date_from, date_to, after=None, limit=100, balances=None, connection=default_connection):
+    """
+    Cash receipts (debit) and payments (credit) of every source between two
+    dates, with the balance after each, and the opening and closing balances.
+
+    Entries are the journal's Cash lines netted per source and day, so an
+    edited or deleted transaction shows as it is now rather than as its
+    reversals. The running balance is a window SUM over one page plus the
+    balance the previous page ended on (carried in the cursor);
+    journal_user_account_date_idx yields the lines in entry order, so a
+    page reads only its own rows wherever it falls in the window.
+
+    after is the position the previous page ended on and balances
+    cash_balances(), computed when not given; returns the report and the
+    position this page ends on, None on the last page.
+    """
+    opening, closing = balances or cash_balances(user, date_from, date_to)
+
+    position, params = 'j.date BETWEEN %s AND %s', [date_from, date_to]
+    balance = opening
+    if after is not None:
+        day, source_type, source_id, balance = after
+        position = ('j.date BETWEEN %s AND %s AND (j.date > %s OR (j.date = %s AND '
+                    '(j.source_type > %s OR (j.source_type = %s AND j.source_id > %s))))')
+        params = [max(day, date_from), date_to, day, day, source_type, source_type, source_id]
+    sql = f"""
+        WITH entry AS (
+            SELECT j.date, j.source_type, j.source_id, SUM(j.debit) - SUM(j.credit) AS amount
+            FROM {JournalLine._meta.db_table} j
+            WHERE j.user_id = %s AND j.account = %s AND {position}
+            GROUP BY j.date, j.source_type, j.source_id
+            HAVING SUM(j.debit) <> SUM(j.credit)
+            ORDER BY j.date, j.source_type, j.source_id
+            LIMIT %s
+        )
+        SELECT date, source_type, source_id, amount,
+            %s + SUM(amount) OVER (ORDER BY date, source_type, source_id ROWS UNBOUNDED PRECEDING)
+        FROM entry ORDER BY date, source_type, source_id"""
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user.pk, CASH_ACCOUNT, *params, limit + 1, balance])
+        rows = cursor.fetchall()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    descriptions = {}
+    sources = defaultdict(list)
+    for _, source_type, source_id, _, _ in rows:
+        sources[source_type].append(source_id)
+    for source_type, ids in sources.items():
+        model, field = CASH_BOOK_DESCRIPTIONS[source_type]
+        for pk, text in model.objects.filter(pk__in=ids).values_list('pk', field):
+            descriptions[(source_type, pk)] = text or ''
+
+    entries = []
+    for day, source_type, source_id, amount, running in rows:
+        amount = float(amount)
+        entries.append({
+            'date': day if isinstance(day, date) else date.fromisoformat(str(day)[:10]),
+            'source_type': source_type,
+            'source_id': source_id,
+            'description': descriptions.get((source_type, source_id), ''),
+            'debit': max(amount, 0.0),
+            'credit': max(-amount, 0.0),
+            'balance': float(running),
+        })
+    last = entries[-1] if more else None
+    return {
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'opening_balance': opening,
+        'entries': entries,
+        'closing_balance': closing,
+    }, last and (last['date'], last['source_type'], last['source_id'], last['balance'])
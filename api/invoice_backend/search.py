@@ -0,0 +1,186 @@
+"""
+Full-text index over SearchDocument.
+
+SQLite: an FTS5 table with external content, kept in step by triggers.
+The content is a view that adds two tag columns, owner ("u<user id>" or
+"shared") and kind, so a query for one user intersects posting lists
+inside the index instead of filtering every match afterwards. Prefix
+indexes up to eight characters keep the half-typed last word a single
+posting-list walk rather than a merge of every term it starts.
+
+Matches are ranked by FTS5's bm25(), title hits weighted TITLE_WEIGHT,
+and paged with LIMIT/OFFSET in the same statement, so every match is
+ranked, however old. The owner and kind columns weigh nothing.
+
+PostgreSQL: a generated tsvector column with a GIN index, ranked by ts_rank.
+
+install() is idempotent. It runs from the migration and from
+post_migrate, which covers test databases built without migrations.
+"""
+import re
+import unicodedata
+
+from django.db import connection as default_connection
+
+TABLE = 'invoice_backend_searchdocument'
+FTS_TABLE = 'invoice_backend_searchdocument_fts'
+FTS_SOURCE = 'invoice_backend_searchdocument_fts_source'
+
+SQLITE_SCHEMA = [
+    f"""CREATE VIEW IF NOT EXISTS {FTS_SOURCE} AS
+        SELECT id, COALESCE('u' || user_id, 'shared') AS owner, kind, title, body FROM {TABLE}""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        owner, kind, title, body,
+        content='{FTS_SOURCE}', content_rowid='id', prefix='2 3 4 5 6 7 8',
+        tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, owner, kind, title, body)
+        VALUES (new.id, COALESCE('u' || new.user_id, 'shared'), new.kind, new.title, new.body);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, owner, kind, title, body)
+        VALUES ('delete', old.id, COALESCE('u' || old.user_id, 'shared'), old.kind, old.title, old.body);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLE}_au AFTER UPDATE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, owner, kind, title, body)
+        VALUES ('delete', old.id, COALESCE('u' || old.user_id, 'shared'), old.kind, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, owner, kind, title, body)
+        VALUES (new.id, COALESCE('u' || new.user_id, 'shared'), new.kind, new.title, new.body);
+    END""",
+]
+
+SQLITE_DROP = [
+    f'DROP TRIGGER IF EXISTS {TABLE}_au',
+    f'DROP TRIGGER IF EXISTS {TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {TABLE}_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+    f'DROP VIEW IF EXISTS {FTS_SOURCE}',
+]
+
+POSTGRES_SCHEMA = [
+    f"""ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(body, '')), 'B')
+        ) STORED""",
+    f'CREATE INDEX IF NOT EXISTS {TABLE}_vector_idx ON {TABLE} USING GIN (search_vector)',
+]
+
+POSTGRES_DROP = [
+    f'DROP INDEX IF EXISTS {TABLE}_vector_idx',
+    f'ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector',
+]
+
+KINDS = ('invoice', 'company', 'buyer', 'other', 'employee', 'partner')
+
+TITLE_WEIGHT = 10.0
+
+
+def _run(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(connection=default_connection):
+    if TABLE not in connection.introspection.table_names():
+        return
+    if connection.vendor == 'sqlite':
+        _run(connection, SQLITE_SCHEMA)
+    elif connection.vendor == 'postgresql':
+        _run(connection, POSTGRES_SCHEMA)
+
+
+def uninstall(connection=default_connection):
+    if connection.vendor == 'sqlite':
+        _run(connection, SQLITE_DROP)
+    elif connection.vendor == 'postgresql':
+        _run(connection, POSTGRES_DROP)
+
+
+def rebuild(connection=default_connection):
+    """Re-read the whole FTS index from SearchDocument (SQLite only; Postgres columns are always current)"""
+    if connection.vendor == 'sqlite':
+        _run(connection, [f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')"])
+
+
+def optimize(connection=default_connection):
+    """Merge the FTS index segments left by incremental writes into one (SQLite only)"""
+    if connection.vendor == 'sqlite':
+        _run(connection, [f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('optimize')"])
+
+
+def _fold(text):
+    # Same folding as the unicode61 tokenizer with remove_diacritics
+    return ''.join(c for c in unicodedata.normalize('NFKD', text.lower()) if not unicodedata.combining(c))
+
+
+def terms(text):
+    """Words of a free-text query, lower-cased; punctuation and query syntax are dropped"""
+    return re.findall(r'\w+', _fold(text))[:10]
+
+
+def _sqlite_search(cursor, user, words, kinds, date_from, date_to, limit, offset):
+    match = 'owner : (u%d OR shared) AND {title body} : (%s)' % (
+        user.pk, ' '.join([f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*']))
+    if kinds:
+        match += ' AND kind : (%s)' % ' OR '.join(kinds)
+    # bm25() is lower for better matches; newest first among equals
+    sql = [f"""SELECT d.kind, d.object_id, d.title, d.date,
+                      -bm25({FTS_TABLE}, 0.0, 0.0, {TITLE_WEIGHT}, 1.0) AS score
+               FROM {FTS_TABLE} JOIN {TABLE} d ON d.id = {FTS_TABLE}.rowid
+               WHERE {FTS_TABLE} MATCH %s"""]
+    params = [match]
+    if date_from:
+        sql.append('AND d.date >= %s')
+        params.append(date_from)
+    if date_to:
+        sql.append('AND d.date <= %s')
+        params.append(date_to)
+    sql.append(f'ORDER BY score DESC, {FTS_TABLE}.rowid DESC LIMIT %s OFFSET %s')
+    cursor.execute(' '.join(sql), params + [limit, offset])
+    return cursor.fetchall()
+
+
+def _postgres_search(cursor, user, words, kinds, date_from, date_to, limit, offset):
+    sql = [f"""SELECT d.kind, d.object_id, d.title, d.date, ts_rank(d.search_vector, q) AS rank
+               FROM {TABLE} d, to_tsquery('simple', %s) q
+               WHERE d.search_vector @@ q AND (d.user_id = %s OR d.user_id IS NULL)"""]
+    params = [' & '.join(words[:-1] + [f'{words[-1]}:*']), user.pk]
+    if kinds:
+        sql.append('AND d.kind = ANY(%s)')
+        params.append(list(kinds))
+    if date_from:
+        sql.append('AND d.date >= %s')
+        params.append(date_from)
+    if date_to:
+        sql.append('AND d.date <= %s')
+        params.append(date_to)
+    sql.append('ORDER BY rank DESC, d.id LIMIT %s OFFSET %s')
+    cursor.execute(' '.join(sql), params + [limit, offset])
+    return cursor.fetchall()
+
+
+def search(user, text, kinds=(), date_from=None, date_to=None, limit=20, offset=0, connection=default_connection):
+    """
+    Ranked matches for text among the user's documents and shared ones, best
+    first. Every word must match; the last one may be a prefix, as it is
+    often still being typed. Returns a list of dicts with kind, id, title,
+    date and rank.
+    """
+    words = terms(text)
+    if not words:
+        return []
+    if connection.vendor == 'sqlite':
+        run = _sqlite_search
+    elif connection.vendor == 'postgresql':
+        run = _postgres_search
+    else:
+        raise NotImplementedError(f'No full-text search for {connection.vendor}')
+    with connection.cursor() as cursor:
+        rows = run(cursor, user, words, kinds, date_from, date_to, limit, offset)
+    return [
+        {'kind': kind, 'id': object_id, 'title': title,
+         'date': when.isoformat() if hasattr(when, 'isoformat') else when, 'rank': round(rank, 6)}
+        for kind, object_id, title, when, rank in rows
+    ]
@@ -1,7 +1,10 @@
 from rest_framework import serializers
-from .models import Invoice
+from .models import Invoice, Client
 from .models import Setting,Deposit
 from .models import CompanyBill, Buyer, Salary, Other,BankingDeposit,Employee,BankAccount,CashEntry
+from .models import StatementLine, ImportJob, ImportRowError
+from .reconcile import DEFAULT_WINDOW, SOURCE_MODELS
+from .exports import DATASETS as EXPORT_DATASETS
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.models import User
@@ -9,10 +12,18 @@ from .models import UserProfile, Partner, OTP
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import ModelViewSet
-from num2words import num2words
 
 User = get_user_model()    #Django's built-in User model
 
+class SparseFieldsMixin:
+    """Takes an optional fields=[...] argument and drops every other field from the output"""
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -63,45 +74,13 @@ class RegisterSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(**validated_data)
         return user
 
-class InvoiceSerializer(serializers.ModelSerializer):
-    total_with_gst = serializers.SerializerMethodField()
-    cgst = serializers.SerializerMethodField()
-    sgst = serializers.SerializerMethodField()
-    igst = serializers.SerializerMethodField()
-    taxtotal = serializers.SerializerMethodField()
-    amount_in_words = serializers.SerializerMethodField()
-    inr_equivalent = serializers.SerializerMethodField()
-
+class InvoiceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Invoice
         fields = '__all__'
-
-    def get_total_with_gst(self, obj):
-        # Your calculation logic here
-        return obj.base_amount + obj.cgst + obj.sgst  # Example
-
-    def get_cgst(self, obj):
-        # Your calculation logic here
-        return (obj.base_amount * 0.09) if obj.country == "India" and obj.state == "Gujarat" else 0
-
-    def get_sgst(self, obj):
-        return (obj.base_amount * 0.09) if obj.country == "India" and obj.state == "Gujarat" else 0
-
-    def get_igst(self, obj):
-        return (obj.base_amount * 0.18) if obj.country == "India" and obj.state != "Gujarat" else 0
-
-    def get_taxtotal(self, obj):
-        return self.get_cgst(obj) + self.get_sgst(obj) + self.get_igst(obj)
-
-    def get_amount_in_words(self, obj):
-        # Use a utility to convert numbers to words
-        return num2words(obj.total_with_gst, to='currency', lang='en_IN').replace('INR', '').strip() + " Only"
-
-    def get_inr_equivalent(self, obj):
-        # Example: for foreign currency
-        if obj.currency != "INR":
-            return obj.total_with_gst * obj.exchange_rate
-        return obj.total_with_gst
+        # Computed by Invoice.calculate_totals() on every save
+        read_only_fields = ['cgst', 'sgst', 'igst', 'taxtotal', 'total_with_gst',
+                            'amount_in_words', 'inr_equivalent', 'client']
 
     def validate(self, data):
         # Custom validation for required fields
@@ -123,6 +102,12 @@ class InvoiceSerializer(serializers.ModelSerializer):
         
         return data
 
+class ClientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Client
+        fields = ['id', 'name', 'address', 'gst', 'invoice_count', 'total_billed', 'last_invoice_date']
+
+
 class SettingSerializer(serializers.ModelSerializer):
     HSN_codes = serializers.JSONField(required=False)
     
@@ -143,19 +128,19 @@ class DepositSerializer(serializers.ModelSerializer):
         model = Deposit
         fields = ['id', 'deposit_date', 'amount']
 
-class CompanyBillSerializer(serializers.ModelSerializer):
+class CompanyBillSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CompanyBill
-        fields = '__all__'       
+        fields = '__all__'
 
 
-class BuyerSerializer(serializers.ModelSerializer):
+class BuyerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Buyer
         fields = '__all__'
         
 
-class SalarySerializer(serializers.ModelSerializer):
+class SalarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Salary
         fields = '__all__'
@@ -171,7 +156,7 @@ class PartnerSerializer(serializers.ModelSerializer):
         model = Partner
         fields = ['id', 'name']
 
-class OtherSerializer(serializers.ModelSerializer):
+class OtherSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     partner = PartnerSerializer(read_only=True)
     partner_id = serializers.PrimaryKeyRelatedField(
         queryset=Partner.objects.all(), source='partner', write_only=True, required=False
@@ -192,7 +177,7 @@ class BankingDepositSerializer(serializers.ModelSerializer):
 
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Employee
         fields = '__all__'
@@ -222,12 +207,68 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return None
 
 
-class BankAccountSerializer(serializers.ModelSerializer):
+class BankAccountSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = BankAccount
         fields = '__all__'
 
-class CashEntrySerializer(serializers.ModelSerializer):
+class StatementUploadSerializer(serializers.Serializer):
+    file = serializers.FileField(help_text='CSV or OFX bank statement')
+    window = serializers.IntegerField(min_value=0, max_value=31, default=DEFAULT_WINDOW,
+                                      help_text='Days a transaction may be dated away from its statement line')
+
+class StatementLineSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = StatementLine
+        fields = ['id', 'date', 'amount', 'description', 'reference', 'status', 'source_type', 'source_id']
+
+class StatementLineReviewSerializer(serializers.ModelSerializer):
+    """
+    Confirm, correct, ignore or unmatch one statement line. Confirming
+    with a source_type and source_id matches the line to that transaction
+    instead of the suggested one.
+    """
+    status = serializers.ChoiceField(['confirmed', 'ignored', 'unmatched'])
+    source_type = serializers.ChoiceField(sorted(SOURCE_MODELS), required=False)
+    source_id = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = StatementLine
+        fields = ['status', 'source_type', 'source_id']
+
+    def validate(self, attrs):
+        line = self.instance
+        if attrs['status'] != 'confirmed':
+            return {**attrs, 'source_type': '', 'source_id': None}
+        if ('source_type' in attrs) != ('source_id' in attrs):
+            raise serializers.ValidationError('Give both source_type and source_id, or neither')
+        source_type = attrs.get('source_type', line.source_type)
+        source_id = attrs.get('source_id', line.source_id)
+        if not source_type:
+            raise serializers.ValidationError('The line has no match to confirm; give source_type and source_id')
+        if not SOURCE_MODELS[source_type].objects.filter(pk=source_id, user=line.user_id).exists():
+            raise serializers.ValidationError({'source_id': 'No such transaction'})
+        if StatementLine.objects.filter(user=line.user_id, source_type=source_type, source_id=source_id,
+                                        status__in=['suggested', 'confirmed']).exclude(pk=line.pk).exists():
+            raise serializers.ValidationError({'source_id': 'Already matched to another statement line'})
+        return {**attrs, 'source_type': source_type, 'source_id': source_id}
+
+class ImportUploadSerializer(serializers.Serializer):
+    dataset = serializers.ChoiceField(sorted(EXPORT_DATASETS), help_text='What the rows are, as exports name them')
+    file = serializers.FileField(help_text='CSV or XLSX file with a header row of field names')
+
+class ImportJobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = ['id', 'dataset', 'filename', 'status', 'rows', 'imported', 'failed', 'progress', 'message',
+                  'created_at', 'updated_at', 'finished_at']
+
+class ImportRowErrorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ImportRowError
+        fields = ['id', 'row', 'errors']
+
+class CashEntrySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CashEntry
         fields = ['id', 'amount', 'description', 'date', 'is_deleted']
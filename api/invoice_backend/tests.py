@@ -1,3 +1,1684 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import zipfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from num2words import num2words
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .amount_words import CURRENCY_FORMS, amount_in_words
+from . import exports, imports, reconcile, renderers, reports, search, serializers
+from .models import (Bank, BankAccount, BankStatement, Buyer, CashEntry, Client, CompanyBill, CustomUser, Employee,
+                     ImportJob, Invoice, InvoiceSequence, JournalLine, LedgerSnapshot, OTP, Other, Partner, Salary,
+                     SearchDocument, StatementLine)
+from .values_serializer import compile_plan
+
+
+def make_user(email='owner@example.com'):
+    return CustomUser.objects.create_user(email=email, first_name='Owner', mobile='9999999999', password='secret')
+
+
+def invoice_payload(**overrides):
+    payload = {
+        'buyer_name': 'Acme Corp',
+        'buyer_address': 'Ahmedabad',
+        'buyer_gst': '24ABCDE1234F1Z5',
+        'invoice_date': '2025-05-10',
+        'hsn_sac_code': '9983',
+        'base_amount': 1000,
+        'country': 'India',
+        'state': 'Gujarat',
+    }
+    payload.update(overrides)
+    return payload
+
+
+class InvoiceNumberingTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_numbers_are_numeric_not_string_sorted(self):
+        InvoiceSequence.objects.create(user=self.user, financial_year='2025/2026', last_number=99)
+        response = self.client.post('/api/create/', invoice_payload(), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['invoice_number'], '100-2025/2026')
+
+        response = self.client.post('/api/create/', invoice_payload(), format='json')
+        self.assertEqual(response.data['invoice_number'], '101-2025/2026')
+        self.assertEqual(Invoice.objects.get(invoice_number='101-2025/2026').sequence, 101)
+
+    def test_posted_invoice_number_is_ignored_for_new_invoices(self):
+        for expected in ('01-2025/2026', '02-2025/2026'):
+            response = self.client.post('/api/create/', invoice_payload(invoice_number='01-2025/2026'), format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(response.data['invoice_number'], expected)
+
+    def test_sequence_is_seeded_from_existing_invoices(self):
+        Invoice.objects.create(user=self.user, buyer_name='A', buyer_address='B', invoice_date=date(2024, 6, 1),
+                               hsn_sac_code='9983', base_amount=10, total_with_gst=10)
+        InvoiceSequence.objects.all().delete()
+
+        response = self.client.get('/api/get_next_invoice_number_by_year/', {'year': 2024})
+        self.assertEqual(response.data['invoice_number'], '02-2024/2025')
+
+        invoice = Invoice.objects.create(user=self.user, buyer_name='A', buyer_address='B',
+                                         invoice_date=date(2025, 2, 1), hsn_sac_code='9983',
+                                         base_amount=10, total_with_gst=10)
+        self.assertEqual(invoice.invoice_number, '02-2024/2025')
+
+    def test_years_and_users_are_numbered_independently(self):
+        other = make_user('other@example.com')
+        first = Invoice.objects.create(user=self.user, buyer_name='A', buyer_address='B',
+                                       invoice_date=date(2025, 4, 1), hsn_sac_code='9983',
+                                       base_amount=10, total_with_gst=10)
+        second = Invoice.objects.create(user=self.user, buyer_name='A', buyer_address='B',
+                                        invoice_date=date(2025, 3, 31), hsn_sac_code='9983',
+                                        base_amount=10, total_with_gst=10)
+        third = Invoice.objects.create(user=other, buyer_name='A', buyer_address='B',
+                                       invoice_date=date(2025, 4, 1), hsn_sac_code='9983',
+                                       base_amount=10, total_with_gst=10)
+        self.assertEqual(first.invoice_number, '01-2025/2026')
+        self.assertEqual(second.invoice_number, '01-2024/2025')
+        self.assertEqual(third.invoice_number, '01-2025/2026')
+
+    def test_invoices_without_a_user_share_one_sequence(self):
+        self.assertEqual(InvoiceSequence.objects.allocate(None, '2025/2026'), 1)
+        self.assertEqual(InvoiceSequence.objects.allocate(None, '2025/2026', count=2), 2)
+        self.assertEqual(InvoiceSequence.objects.get(user=None).last_number, 3)
+        # A racing allocation cannot add a second row, which would break the lookup after the UPDATE
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            InvoiceSequence.objects.create(user=None, financial_year='2025/2026')
+
+
+class InvoiceTotalsTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_other_states_are_charged_igst(self):
+        response = self.client.post('/api/create/', invoice_payload(state='Maharashtra'), format='json')
+        invoice = Invoice.objects.get(pk=response.data['data']['id'])
+        self.assertEqual((invoice.cgst, invoice.sgst, invoice.igst), (0, 0, 180))
+        self.assertEqual(invoice.total_with_gst, 1180)
+        self.assertEqual(invoice.inr_equivalent, 1180)
+        self.assertEqual(invoice.amount_in_words, 'one thousand, one hundred and eighty rupees, zero paise Only')
+
+    def test_list_returns_stored_columns(self):
+        self.client.post('/api/create/', invoice_payload(country='USA', currency='USD', exchange_rate=83), format='json')
+        row = self.client.get('/api/invoices/').data[0]
+        self.assertEqual((row['cgst'], row['sgst'], row['igst'], row['taxtotal']), (0, 0, 0, 0))
+        self.assertEqual(row['total_with_gst'], 1000)
+        self.assertEqual(row['inr_equivalent'], 83000)
+
+    def test_backfill_command_recomputes_stale_rows(self):
+        self.client.post('/api/create/', invoice_payload(state='Kerala'), format='json')
+        Invoice.objects.update(cgst=90, sgst=90, igst=0, amount_in_words=None)
+
+        call_command('backfill_invoice_totals', chunk_size=1, stdout=io.StringIO())
+
+        invoice = Invoice.objects.get()
+        self.assertEqual((invoice.cgst, invoice.sgst, invoice.igst), (0, 0, 180))
+        self.assertTrue(invoice.amount_in_words)
+
+
+class AmountInWordsTests(SimpleTestCase):
+    def test_matches_num2words_on_random_amounts(self):
+        rng = random.Random(20250401)
+        for _ in range(3000):
+            value = round(rng.uniform(0, 10 ** rng.randint(0, 9)), rng.choice([0, 2, 3]))
+            if rng.random() < 0.05:
+                value = -value
+            for currency in CURRENCY_FORMS:
+                with self.subTest(value=value, currency=currency):
+                    self.assertEqual(amount_in_words(value, currency),
+                                     num2words(value, to='currency', lang='en_IN', currency=currency))
+
+    def test_indian_grouping(self):
+        self.assertEqual(amount_in_words(12345678.5),
+                         'one crore, twenty-three lakh, forty-five thousand, six hundred and '
+                         'seventy-eight rupees, fifty paise')
+        self.assertEqual(amount_in_words(100001.01, 'USD'), 'one lakh and one dollars, one cent')
+
+    def test_limits(self):
+        with self.assertRaises(OverflowError):
+            amount_in_words(10 ** 10)
+        with self.assertRaises(ValueError):
+            amount_in_words(1, 'XYZ')
+
+
+class BulkInvoiceCreationTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_numbers_are_reserved_as_contiguous_blocks_per_year(self):
+        Invoice.objects.create(user=self.user, buyer_name='A', buyer_address='B', invoice_date=date(2025, 5, 1),
+                               hsn_sac_code='9983', base_amount=10, total_with_gst=10)
+        rows = [invoice_payload(), invoice_payload(invoice_date='2025-01-15'), invoice_payload()]
+
+        response = self.client.post('/api/create/bulk/', rows, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        numbers = [row['invoice_number'] for row in response.data['results']]
+        self.assertEqual(numbers, ['02-2025/2026', '01-2024/2025', '03-2025/2026'])
+        created = Invoice.objects.get(pk=response.data['results'][0]['id'])
+        self.assertEqual(created.user, self.user)
+        self.assertEqual(created.total_with_gst, 1180)
+        self.assertEqual(InvoiceSequence.objects.get(user=self.user, financial_year='2025/2026').last_number, 3)
+
+    def test_invalid_row_rejects_the_whole_batch(self):
+        rows = [invoice_payload(), invoice_payload(buyer_name='')]
+
+        response = self.client.post('/api/create/bulk/', {'invoices': rows}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([row['index'] for row in response.data['results']], [1])
+        self.assertFalse(Invoice.objects.exists())
+        self.assertFalse(InvoiceSequence.objects.exists())
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        query_counts = []
+        # Each batch starts a new financial year and a new client
+        for size, invoice_date, buyer in ((2, '2025-05-10', 'Acme Corp'), (20, '2024-05-10', 'Beta Ltd')):
+            rows = [invoice_payload(invoice_date=invoice_date, buyer_name=buyer) for _ in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/api/create/bulk/', rows, format='json')
+            self.assertEqual(response.status_code, 201)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(Invoice.objects.filter(user=self.user).count(), 22)
+
+
+class ListPaginationTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/create/bulk/', [invoice_payload(buyer_name=f'Buyer {i}') for i in range(5)], format='json')
+
+    def test_plain_list_without_parameters(self):
+        response = self.client.get('/api/invoices/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 5)
+
+    def test_cursor_pages_walk_every_row_newest_first(self):
+        seen = []
+        url = '/api/invoices/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        expected = list(Invoice.objects.filter(user=self.user).order_by('-pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_fields_limits_keys_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/invoices/?fields=id,invoice_number,total_with_gst&page_size=10')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'invoice_number', 'total_with_gst'})
+        select = next(q['sql'] for q in queries if 'invoice_backend_invoice' in q['sql'])
+        self.assertNotIn('buyer_address', select)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/invoices/?fields=id,nope')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', str(response.data['fields']))
+
+
+class ValuesSerializationTests(TestCase):
+    endpoints = [
+        ('/api/invoices/', Invoice, serializers.InvoiceSerializer),
+        ('/api/banking/company/', CompanyBill, serializers.CompanyBillSerializer),
+        ('/api/banking/buyer/', Buyer, serializers.BuyerSerializer),
+        ('/api/banking/salary/', Salary, serializers.SalarySerializer),
+        ('/api/banking/other/', Other, serializers.OtherSerializer),
+        ('/api/banking/employee/', Employee, serializers.EmployeeSerializer),
+        ('/api/bank-accounts/', BankAccount, serializers.BankAccountSerializer),
+        ('/api/cash-entries/', CashEntry, serializers.CashEntrySerializer),
+    ]
+
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/create/bulk/', [invoice_payload(), invoice_payload(country='USA', currency='USD',
+                                                                                 exchange_rate=83.25)], format='json')
+        user = self.user
+        CompanyBill.objects.create(user=user, company_name='Acme', amount=Decimal('12.50'), payment_method='Cash',
+                                   transaction_date=date(2025, 4, 2))
+        CompanyBill.objects.create(user=user)
+        Buyer.objects.create(user=user, buyer_name='Acme', amount=Decimal('99.99'), bank_name='HDFC')
+        Salary.objects.create(user=user, salary_name='Asha', salary_amount=Decimal('25000'), salary_date=date(2025, 5, 1))
+        partner = Partner.objects.create(name='Ravi')
+        Other.objects.create(user=user, other_type='Rent', other_date=date(2025, 5, 3), other_notice='May',
+                             other_amount=Decimal('500'), partner=partner)
+        Other.objects.create(user=user, transaction_type='credit', other_type='Refund', other_date=date(2025, 5, 4),
+                             other_notice='', other_amount=Decimal('-7.10'))
+        Employee.objects.create(user=user, name='Asha', joining_date=date(2024, 1, 1), salary=Decimal('25000.00'),
+                                email='asha@example.com', number='9999999999')
+        BankAccount.objects.create(user=user, bank_name='HDFC', account_number='123', amount=Decimal('1000000.05'))
+        CashEntry.objects.create(user=user, amount=Decimal('3.00'), date=date(2025, 5, 5), description=None)
+
+    def test_every_list_serializer_has_a_plan(self):
+        for url, model, serializer_class in self.endpoints:
+            self.assertIsNotNone(compile_plan(serializer_class), url)
+
+    def test_output_is_byte_identical_to_serializer(self):
+        renderer = JSONRenderer()
+        for url, model, serializer_class in self.endpoints:
+            queryset = model.objects.filter(user=self.user)
+            if hasattr(model, 'is_deleted'):
+                queryset = queryset.filter(is_deleted=False)
+            expected = renderer.render(serializer_class(queryset, many=True).data)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response.content, expected, url)
+
+    def test_paginated_and_sparse_output_matches_serializer(self):
+        fields = ['id', 'partner', 'other_amount']
+        response = self.client.get('/api/banking/other/?page_size=1&fields=' + ','.join(fields))
+        first = Other.objects.filter(user=self.user).order_by('pk').first()
+        expected = serializers.OtherSerializer(first, fields=fields).data
+        self.assertEqual(response.data['results'], [expected])
+        self.assertIsNotNone(response.data['next'])
+
+    def test_serializers_with_method_fields_have_no_plan(self):
+        self.assertIsNone(compile_plan(serializers.UserProfileSerializer))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/create/', invoice_payload(), format='json')
+
+    def test_unchanged_list_is_answered_with_304_without_serializing(self):
+        response = self.client.get('/api/invoices/')
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/invoices/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_etag_changes_on_create_update_and_delete(self):
+        etags = [self.client.get('/api/invoices/')['ETag']]
+        created = self.client.post('/api/create/', invoice_payload(), format='json').data['data']
+        etags.append(self.client.get('/api/invoices/')['ETag'])
+        self.client.put(f"/api/update/{created['id']}/", invoice_payload(buyer_name='Renamed'), format='json')
+        etags.append(self.client.get('/api/invoices/')['ETag'])
+        self.client.delete(f"/api/delete/{created['id']}/")
+        response = self.client.get('/api/invoices/', HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertEqual(response.status_code, 200)
+        etags.append(response['ETag'])
+        self.assertEqual(len(set(etags[:3])), 3)
+        # Back to the original rows, so back to the original validator
+        self.assertEqual(etags[3], etags[0])
+
+    def test_etag_depends_on_user_and_query(self):
+        etag = self.client.get('/api/invoices/')['ETag']
+        self.assertEqual(self.client.get('/api/invoices/?fields=id', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        other = APIClient()
+        other.force_authenticate(make_user('other@example.com'))
+        self.assertEqual(other.get('/api/invoices/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_renaming_a_partner_invalidates_other_transactions(self):
+        partner = Partner.objects.create(name='Ravi')
+        Other.objects.create(user=self.user, other_type='Rent', other_date=date(2025, 5, 3), other_notice='',
+                             other_amount=Decimal('5'), partner=partner)
+        etag = self.client.get('/api/banking/other/')['ETag']
+        self.assertEqual(self.client.get('/api/banking/other/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        partner.name = 'Ravi Kumar'
+        partner.save()
+        self.assertEqual(self.client.get('/api/banking/other/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_deleting_an_invoice_invalidates_its_payments(self):
+        invoice = Invoice.objects.get()
+        CompanyBill.objects.create(user=self.user, company_name='Acme Corp', invoice_id=invoice.invoice_number,
+                                   amount=Decimal('100'), transaction_date=date(2025, 5, 20))
+        etag = self.client.get('/api/banking/company/')['ETag']
+        invoice.delete()
+        response = self.client.get('/api/banking/company/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_current_user_and_settings(self):
+        for url in ('/api/auth/me/', '/api/settings/'):
+            self.client.get(url)
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304, url)
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/me/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class InvoiceFilterTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/create/bulk/', [
+            invoice_payload(buyer_name='Acme Corp', invoice_date='2025-04-10', base_amount=1000),
+            invoice_payload(buyer_name='Acme Labs', invoice_date='2025-06-10', base_amount=5000, state='Maharashtra'),
+            invoice_payload(buyer_name='Beta Ltd', buyer_gst='27BETA1234F1Z5', invoice_date='2025-06-20', base_amount=200),
+            invoice_payload(buyer_name='Zeta Inc', country='USA', currency='USD', invoice_date='2024-12-01'),
+        ], format='json')
+
+    def buyers(self, query):
+        response = self.client.get('/api/invoices/?' + query)
+        self.assertEqual(response.status_code, 200, response.data)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        return sorted(row['buyer_name'] for row in rows)
+
+    def test_each_filter(self):
+        self.assertEqual(self.buyers('buyer=Acme'), ['Acme Corp', 'Acme Labs'])
+        self.assertEqual(self.buyers('gst=27BETA1234F1Z5'), ['Beta Ltd'])
+        self.assertEqual(self.buyers('date_from=2025-06-01&date_to=2025-06-15'), ['Acme Labs'])
+        self.assertEqual(self.buyers('amount_min=1000&amount_max=2000'), ['Acme Corp', 'Zeta Inc'])
+        self.assertEqual(self.buyers('currency=USD'), ['Zeta Inc'])
+        self.assertEqual(self.buyers('country=India&state=Maharashtra'), ['Acme Labs'])
+        self.assertEqual(self.buyers('year=2024/2025'), ['Zeta Inc'])
+
+    def test_filters_combine_with_pagination(self):
+        self.assertEqual(self.buyers('buyer=Acme&date_from=2025-05-01&page_size=1'), ['Acme Labs'])
+
+    def test_malformed_values_are_rejected(self):
+        response = self.client.get('/api/invoices/?date_from=yesterday&amount_min=lots')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'date_from', 'amount_min'})
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def found(self, query):
+        response = self.client.get('/api/search/', {'q': query} if isinstance(query, str) else query)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(row['kind'], row['title']) for row in response.data['results']]
+
+    def test_finds_invoices_by_prefix_across_fields(self):
+        self.client.post('/api/create/', invoice_payload(buyer_name='Acme Corp', Particulars='Consultancy services'),
+                         format='json')
+        self.client.post('/api/create/', invoice_payload(buyer_name='Beta Ltd', remark='hardware'), format='json')
+        self.assertEqual(self.found('acme consult'), [('invoice', '01-2025/2026 Acme Corp')])
+        self.assertEqual(self.found('HARDW'), [('invoice', '02-2025/2026 Beta Ltd')])
+        self.assertEqual(self.found('acme hardware'), [])
+
+    def test_other_users_documents_are_not_found(self):
+        other = make_user('other@example.com')
+        Employee.objects.create(user=other, name='Asha Patel', joining_date=date(2024, 1, 1),
+                                salary=Decimal('1'), email='asha@example.com', number='1')
+        Partner.objects.create(name='Asha Traders')
+        self.assertEqual(self.found('asha'), [('partner', 'Asha Traders')])
+
+    def test_index_follows_save_and_delete(self):
+        bill = CompanyBill.objects.create(user=self.user, company_name='Acme', notice='April retainer')
+        self.assertEqual(self.found('retainer'), [('company', 'Acme')])
+        bill.notice = 'May retainer'
+        bill.save()
+        self.assertEqual(self.found('april'), [])
+        self.assertEqual(self.found('may'), [('company', 'Acme')])
+        bill.delete()
+        self.assertEqual(self.found('retainer'), [])
+        self.assertFalse(SearchDocument.objects.exists())
+
+    def test_title_matches_rank_first_and_pages_follow(self):
+        Buyer.objects.create(user=self.user, buyer_name='Someone', notice='paid for acme order')
+        Buyer.objects.create(user=self.user, buyer_name='Acme', notice='advance')
+        self.client.post('/api/create/bulk/', [invoice_payload(buyer_name='Acme Corp')] * 3, format='json')
+        self.assertEqual(self.found({'q': 'acme', 'kind': 'buyer'}), [('buyer', 'Acme'), ('buyer', 'Someone')])
+
+        response = self.client.get('/api/search/', {'q': 'acme', 'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        seen = [(row['kind'], row['id']) for row in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += [(row['kind'], row['id']) for row in response.data['results']]
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_ranks_every_match_however_old(self):
+        oldest = SearchDocument.objects.create(user=self.user, kind='buyer', object_id=1, title='Acme', body='')
+        SearchDocument.objects.bulk_create([
+            SearchDocument(user=self.user, kind='buyer', object_id=i, title='Someone', body='paid for acme order')
+            for i in range(2, 1202)])
+        first = search.search(self.user, 'acme', limit=1)
+        self.assertEqual((first[0]['id'], first[0]['title']), (oldest.object_id, 'Acme'))
+        # Pages carry on past the first thousand matches
+        self.assertEqual(len(search.search(self.user, 'acme', limit=500, offset=1000)), 201)
+
+    def test_rejects_bad_parameters(self):
+        response = self.client.get('/api/search/', {'q': 'x', 'kind': 'invoice,salary'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.found('"* OR ('), [])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/create/bulk/', [
+            invoice_payload(buyer_name='Acme Corp', invoice_date='2025-04-10'),
+            invoice_payload(buyer_name='Beta, "Ltd"', invoice_date='2026-03-31'),
+            invoice_payload(buyer_name='Zeta Inc', invoice_date='2025-03-31'),
+        ], format='json')
+        Other.objects.create(user=self.user, other_type='Rent', other_date=date(2025, 5, 1),
+                             other_notice='May rent', other_amount=Decimal('1500.50'),
+                             partner=Partner.objects.create(name='Landlord'))
+        Other.objects.create(user=make_user('other@example.com'), other_type='Rent', other_date=date(2025, 5, 1),
+                             other_notice='Not mine', other_amount=Decimal('1'))
+
+    def download(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_csv_filters_by_financial_year(self):
+        rows = list(csv.DictReader(io.StringIO(self.download('/api/export/invoices/csv/?year=2025/2026').decode())))
+        self.assertEqual([row['buyer_name'] for row in rows], ['Acme Corp', 'Beta, "Ltd"'])
+        self.assertEqual(rows[0]['total_with_gst'], '1180.0')
+
+    def test_ndjson_has_one_object_per_row(self):
+        lines = self.download('/api/export/other/ndjson/?date_from=2025-04-01').decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{
+            'id': Other.objects.get(other_notice='May rent').pk, 'other_date': '2025-05-01',
+            'transaction_type': 'debit', 'other_type': 'Rent', 'other_notice': 'May rent',
+            'other_amount': '-1500.50', 'payment_method': None, 'bank_name': None, 'partner__name': 'Landlord',
+        }])
+
+    def test_xlsx_is_a_workbook(self):
+        workbook = zipfile.ZipFile(io.BytesIO(self.download('/api/export/invoices/xlsx/?date_to=2025-12-31')))
+        self.assertIn('xl/workbook.xml', workbook.namelist())
+        sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 3)
+        self.assertIn('<t xml:space="preserve">Zeta Inc</t>', sheet)
+        self.assertIn('<v>1180.0</v>', sheet)
+
+    def test_rejects_unknown_exports_and_bad_filters(self):
+        self.assertEqual(self.client.get('/api/export/users/csv/').status_code, 404)
+        self.assertEqual(self.client.get('/api/export/invoices/pdf/').status_code, 404)
+        self.assertEqual(self.client.get('/api/export/invoices/csv/?year=2025').status_code, 400)
+
+    def test_command_writes_the_same_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'invoices.csv')
+            call_command('export_data', 'invoices', 'csv', user=self.user.email, year='2025/2026', output=path)
+            with open(path, 'rb') as exported:
+                self.assertEqual(exported.read(), self.download('/api/export/invoices/csv/?year=2025/2026'))
+
+
+class RendererTests(TestCase):
+    payload = {
+        'text': 'Café ₹ \u2028 "quoted" \n \x01',
+        'numbers': [0, -1, 1180.0, 0.1, 1e16, 1e-05, 2 ** 40],
+        'amount': Decimal('1500.50'),
+        'when': datetime(2025, 6, 1, 10, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'day': date(2025, 6, 1),
+        'nested': [{'a': None, 'b': True}, ()],
+    }
+
+    def test_json_is_byte_identical(self):
+        for data in (self.payload, {'plain': [1, 2.5, 'x']}, [], None):
+            self.assertEqual(renderers.ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(renderers.ORJSONRenderer().render({'a': [1]}, 'application/json; indent=2'),
+                         JSONRenderer().render({'a': [1]}, 'application/json; indent=2'))
+
+    def test_list_endpoint_output_is_unchanged(self):
+        user = make_user()
+        client = APIClient()
+        client.force_authenticate(user)
+        client.post('/api/create/bulk/', [invoice_payload(buyer_name='Ācme ₹'), invoice_payload()], format='json')
+        response = client.get('/api/invoices/')
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_parser_falls_back_for_what_orjson_rejects(self):
+        parse = renderers.ORJSONParser().parse
+        self.assertEqual(parse(io.BytesIO('{"a": "₹", "b": [1.5]}'.encode())), {'a': '₹', 'b': [1.5]})
+        self.assertEqual(parse(io.BytesIO(b'{"n": 123456789012345678901234567890}')), {'n': 123456789012345678901234567890})
+        with self.assertRaises(ParseError):
+            parse(io.BytesIO(b'{"a": NaN}'))
+
+    def test_etag_depends_on_the_requested_encoding(self):
+        client = APIClient()
+        client.force_authenticate(make_user())
+        self.assertNotEqual(client.get('/api/invoices/', HTTP_ACCEPT='application/json')['ETag'],
+                            client.get('/api/invoices/', HTTP_ACCEPT='application/json; indent=2')['ETag'])
+
+    def test_msgpack_round_trip(self):
+        client = APIClient()
+        client.force_authenticate(make_user())
+        body = renderers.MessagePackRenderer().render(invoice_payload())
+        response = client.post('/api/create/', body, content_type='application/msgpack',
+                               HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(renderers.msgpack.unpackb(response.content)['data']['buyer_name'], 'Acme Corp')
+
+
+class ClientTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def stats(self):
+        return sorted(Client.objects.filter(user=self.user).values_list(
+            'name', 'invoice_count', 'total_billed', 'last_invoice_date'))
+
+    def test_aggregates_follow_invoice_writes(self):
+        self.client.post('/api/create/bulk/', [
+            invoice_payload(invoice_date='2025-05-10'), invoice_payload(invoice_date='2025-07-01'),
+            invoice_payload(buyer_name='Beta Ltd', buyer_gst=None),
+        ], format='json')
+        self.assertEqual(self.stats(), [('Acme Corp', 2, 2360.0, date(2025, 7, 1)),
+                                        ('Beta Ltd', 1, 1180.0, date(2025, 5, 10))])
+
+        latest = Invoice.objects.get(invoice_date=date(2025, 7, 1))
+        response = self.client.put(f'/api/update/{latest.pk}/', invoice_payload(
+            buyer_name='Beta Ltd', buyer_gst='', invoice_date='2025-07-01', base_amount=2000), format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.stats(), [('Acme Corp', 1, 1180.0, date(2025, 5, 10)),
+                                        ('Beta Ltd', 2, 3540.0, date(2025, 7, 1))])
+
+        Invoice.objects.get(buyer_name='Acme Corp').delete()
+        self.assertEqual(self.stats(), [('Beta Ltd', 2, 3540.0, date(2025, 7, 1))])
+
+    def test_clients_page_and_their_invoices_load_lazily(self):
+        self.client.post('/api/create/bulk/', [invoice_payload()] * 3 + [invoice_payload(buyer_name='Beta Ltd')],
+                         format='json')
+        response = self.client.get('/api/clients/?page_size=1&fields=name,invoice_count')
+        self.assertEqual(response.data['results'], [{'name': 'Acme Corp', 'invoice_count': 3}])
+        acme = Client.objects.get(name='Acme Corp')
+
+        response = self.client.get(f'/api/clients/{acme.pk}/invoices/?page_size=2&fields=invoice_number')
+        self.assertEqual(response.data['results'], [{'invoice_number': '03-2025/2026'},
+                                                    {'invoice_number': '02-2025/2026'}])
+        self.assertIsNotNone(response.data['next'])
+
+        other = APIClient()
+        other.force_authenticate(make_user('other@example.com'))
+        self.assertEqual(other.get(f'/api/clients/{acme.pk}/invoices/').status_code, 404)
+
+    def test_grouped_invoices_keeps_its_shape(self):
+        self.client.post('/api/create/bulk/', [
+            invoice_payload(invoice_date='2025-05-10'), invoice_payload(invoice_date='2025-07-01'),
+            invoice_payload(buyer_name='Beta Ltd'),
+        ], format='json')
+        groups = self.client.get('/api/grouped-invoices/').data
+        self.assertEqual([(group['serial_number'], group['buyer_name'], group['buyer_gst'],
+                           [invoice['invoice_date'] for invoice in group['invoices']]) for group in groups],
+                         [(1, 'Acme Corp', '24ABCDE1234F1Z5', ['2025-07-01', '2025-05-10']),
+                          (2, 'Beta Ltd', '24ABCDE1234F1Z5', ['2025-05-10'])])
+
+    def test_backfill_groups_existing_invoices(self):
+        self.client.post('/api/create/bulk/', [invoice_payload()] * 2 + [invoice_payload(buyer_address='Surat')],
+                         format='json')
+        Invoice.objects.update(client=None)
+        Client.objects.all().delete()
+
+        call_command('backfill_clients', chunk_size=2, stdout=io.StringIO())
+        self.assertEqual(sorted(Client.objects.values_list('address', 'invoice_count')),
+                         [('Ahmedabad', 2), ('Surat', 1)])
+        self.assertFalse(Invoice.objects.filter(client=None).exists())
+
+    def test_invoices_without_an_inr_equivalent_bill_at_face_value_until_backfilled(self):
+        self.client.post('/api/create/bulk/', [invoice_payload(),
+                                               invoice_payload(buyer_name='Globex', country='USA', currency='USD',
+                                                               exchange_rate=80)], format='json')
+        Invoice.objects.update(inr_equivalent=None)
+        call_command('backfill_clients', stdout=io.StringIO())
+        self.assertEqual(dict(Client.objects.values_list('name', 'total_billed')),
+                         {'Acme Corp': 1180.0, 'Globex': 1000.0})
+
+        call_command('backfill_invoice_totals', stdout=io.StringIO())
+        self.assertEqual(dict(Client.objects.values_list('name', 'total_billed')),
+                         {'Acme Corp': 1180.0, 'Globex': 80000.0})
+
+
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        # User ids repeat across rolled-back tests, and so would cache keys
+        cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_summary(self):
+        # force_authenticate keeps the user object, as authentication would load it fresh
+        self.user.refresh_from_db()
+        return self.client.get('/api/dashboard/summary/').data
+
+    def test_counters_and_totals(self):
+        self.client.post('/api/create/bulk/', [
+            invoice_payload(), invoice_payload(buyer_name='Beta Ltd', invoice_date='2025-02-01'),
+            invoice_payload(country='USA', currency='USD', exchange_rate=80, base_amount=100),
+        ], format='json')
+        usd = Invoice.objects.get(currency='USD')
+        CompanyBill.objects.create(user=self.user, invoice_id='01-2025/2026', amount=Decimal('180.00'))
+        CompanyBill.objects.create(user=self.user, invoice_id=usd.invoice_number, amount=Decimal('25.00'))
+        CompanyBill.objects.create(user=self.user, invoice_id='', amount=Decimal('70.00'))
+        CompanyBill.objects.create(user=self.user, invoice_id='99-2025/2026', amount=Decimal('40.00'))
+        Employee.objects.create(user=self.user, name='Asha', joining_date=date(2025, 1, 1), salary=Decimal('100'),
+                                email='asha@example.com', number='1')
+        BankAccount.objects.create(user=self.user, bank_name='HDFC', account_number='1', amount=Decimal('5000'))
+        CashEntry.objects.create(user=self.user, amount=Decimal('300'), date=date(2025, 5, 1))
+        CashEntry.objects.create(user=self.user, amount=Decimal('999'), date=date(2025, 5, 1), is_deleted=True)
+
+        summary = self.get_summary()
+        self.assertEqual(summary['financial_years'], [
+            {'financial_year': '2025/2026', 'invoice_count': 2, 'total_billed': 9180.0},
+            {'financial_year': '2024/2025', 'invoice_count': 1, 'total_billed': 1180.0},
+        ])
+        self.assertEqual((summary['clients'], summary['invoice_count'], summary['total_billed'],
+                          summary['outstanding_receivables']), (2, 3, 10360.0, 8180.0))
+        self.assertEqual((summary['employees'], summary['bank_accounts'], summary['bank_balance'],
+                          summary['cash_in_hand']), (1, 1, 5000.0, 300.0))
+
+    def test_cached_until_the_next_write(self):
+        self.client.post('/api/create/', invoice_payload(), format='json')
+        self.assertEqual(self.get_summary()['invoice_count'], 1)
+        with self.assertNumQueries(0):
+            self.client.get('/api/dashboard/summary/')
+
+        self.client.post('/api/create/bulk/', [invoice_payload()], format='json')
+        self.assertEqual(self.get_summary()['invoice_count'], 2)
+        Employee.objects.create(user=self.user, name='Asha', joining_date=date(2025, 1, 1), salary=Decimal('100'),
+                                email='asha@example.com', number='1')
+        self.assertEqual(self.get_summary()['employees'], 1)
+        Invoice.objects.filter(user=self.user).first().delete()
+        self.assertEqual(self.get_summary()['invoice_count'], 1)
+
+
+class CompanyBalanceTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_invoices(self, count):
+        self.client.post('/api/create/bulk/', [invoice_payload(invoice_date=f'2025-05-{day:02d}')
+                                               for day in range(1, count + 1)], format='json')
+        return list(Invoice.objects.filter(user=self.user).order_by('invoice_date'))
+
+    def pay(self, invoice_number, amount, day, notice=''):
+        return CompanyBill.objects.create(user=self.user, invoice_id=invoice_number, amount=Decimal(amount),
+                                          transaction_date=date(2025, 6, day), notice=notice)
+
+    def test_payments_link_to_their_invoice(self):
+        invoice = self.create_invoices(1)[0]
+        self.assertEqual(self.pay(invoice.invoice_number, '10', 1).linked_invoice, invoice)
+        self.assertIsNone(self.pay('99-2025/2026', '10', 1).linked_invoice)
+
+        other = make_user('other@example.com')
+        foreign = CompanyBill.objects.create(user=other, invoice_id=invoice.invoice_number, amount=Decimal('10'))
+        self.assertIsNone(foreign.linked_invoice)
+
+    def test_running_balances(self):
+        first, second = self.create_invoices(2)
+        self.pay(first.invoice_number, '500.00', 3, notice='Second part')
+        self.pay(first.invoice_number, '180.00', 1)
+
+        data = self.client.get('/api/company-balance/24ABCDE1234F1Z5/').data
+        self.assertEqual((data['buyer_name'], data['currency']), ('Acme Corp', 'INR'))
+        self.assertEqual(data['invoices'][0], {
+            'invoice_number': '01-2025/2026', 'invoice_date': '2025-05-01', 'invoice_amount': 1180.0,
+            'deposit_total': 680.0, 'remaining_balance': 500.0,
+            'transactions': [
+                {'date': '2025-05-01', 'type': 'invoice', 'description': '01-2025/2026',
+                 'debit': 1180.0, 'credit': None, 'balance': 1180.0},
+                {'date': '2025-06-01', 'type': 'deposit', 'description': 'Deposit',
+                 'debit': None, 'credit': 180.0, 'balance': 1000.0},
+                {'date': '2025-06-03', 'type': 'deposit', 'description': 'Second part',
+                 'debit': None, 'credit': 500.0, 'balance': 500.0},
+            ],
+        })
+        self.assertEqual([(invoice['deposit_total'], len(invoice['transactions'])) for invoice in data['invoices']],
+                         [(680.0, 3), (0.0, 1)])
+        self.assertEqual((data['total_invoice_amount'], data['total_deposit_amount'],
+                          data['total_remaining_balance']), (2360.0, 680.0, 1680.0))
+
+        empty = self.client.get('/api/company-balance/27ZZZZZ0000Z1Z0/').data
+        self.assertEqual(empty, {'buyer_gst': '27ZZZZZ0000Z1Z0', 'buyer_name': '', 'currency': '', 'invoices': []})
+
+    def test_payment_without_an_amount(self):
+        invoice = self.create_invoices(1)[0]
+        CompanyBill.objects.create(user=self.user, invoice_id=invoice.invoice_number, transaction_date=date(2025, 6, 1))
+        self.pay(invoice.invoice_number, '180.00', 2)
+
+        response = self.client.get('/api/company-balance/24ABCDE1234F1Z5/')
+        self.assertEqual(response.status_code, 200)
+        deposits = response.data['invoices'][0]['transactions'][1:]
+        self.assertEqual([(row['credit'], row['balance']) for row in deposits], [(0.0, 1180.0), (180.0, 1000.0)])
+
+    def test_query_count_is_constant(self):
+        invoices = self.create_invoices(12)
+        for day, invoice in enumerate(invoices, start=1):
+            self.pay(invoice.invoice_number, '100', day)
+            self.pay(invoice.invoice_number, '50', day)
+        with self.assertNumQueries(2):
+            data = self.client.get('/api/company-balance/24ABCDE1234F1Z5/').data
+        self.assertEqual(len(data['invoices']), 12)
+        self.assertEqual(data['total_deposit_amount'], 1800.0)
+
+
+class InvoicePaymentBalanceTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/create/bulk/', [invoice_payload(), invoice_payload(base_amount=2000)], format='json')
+        self.first, self.second = Invoice.objects.filter(user=self.user).order_by('sequence')
+
+    def balances(self):
+        return list(Invoice.objects.filter(user=self.user).order_by('sequence')
+                    .values_list('amount_received', 'outstanding'))
+
+    def test_balances_follow_payment_writes(self):
+        self.assertEqual(self.balances(), [(0.0, 1180.0), (0.0, 2360.0)])
+        response = self.client.post('/api/banking/company/', {
+            'company_name': 'Acme Corp', 'invoice_id': self.first.invoice_number, 'amount': '180.00',
+            'transaction_date': '2025-06-01', 'payment_method': 'Banking'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self.balances(), [(180.0, 1000.0), (0.0, 2360.0)])
+
+        payment = CompanyBill.objects.get(pk=response.data['id'])
+        payment.invoice_id = self.second.invoice_number
+        payment.save()
+        self.assertEqual(self.balances(), [(0.0, 1180.0), (180.0, 2180.0)])
+
+        # A new total keeps the payments already received
+        response = self.client.put(f'/api/update/{self.second.pk}/', invoice_payload(base_amount=3000),
+                                   format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.balances(), [(0.0, 1180.0), (180.0, 3360.0)])
+
+        self.client.delete(f'/api/banking/company/{payment.pk}/')
+        self.assertEqual(self.balances(), [(0.0, 1180.0), (0.0, 3540.0)])
+
+    def test_paid_and_unpaid_filters(self):
+        CompanyBill.objects.create(user=self.user, invoice_id=self.first.invoice_number, amount=Decimal('1180.00'))
+        unpaid = self.client.get('/api/invoices/?status=unpaid&fields=invoice_number').data
+        self.assertEqual(unpaid, [{'invoice_number': self.second.invoice_number}])
+        paid = self.client.get('/api/invoices/?status=paid&fields=invoice_number').data
+        self.assertEqual(paid, [{'invoice_number': self.first.invoice_number}])
+        self.assertEqual(self.client.get('/api/invoices/?status=overdue').status_code, 400)
+
+    def test_repair_command_fixes_drift(self):
+        CompanyBill.objects.create(user=self.user, invoice_id=self.first.invoice_number, amount=Decimal('100.00'))
+        Invoice.objects.filter(pk=self.first.pk).update(amount_received=0, outstanding=1180)
+        out = io.StringIO()
+        call_command('repair_invoice_balances', '--dry-run', stdout=out)
+        self.assertIn('1 of 2 invoices would be repaired', out.getvalue())
+        self.assertEqual(self.balances()[0], (0.0, 1180.0))
+
+        version = CustomUser.objects.get(pk=self.user.pk).data_version
+        call_command('repair_invoice_balances', chunk_size=1, stdout=out)
+        self.assertIn('1 of 2 invoices repaired', out.getvalue())
+        self.assertEqual(self.balances(), [(100.0, 1080.0), (0.0, 2360.0)])
+        # Cached reports of the owner are rebuilt
+        self.assertEqual(CustomUser.objects.get(pk=self.user.pk).data_version, version + 1)
+
+
+class ReceivablesAgingTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/create/bulk/', [
+            invoice_payload(invoice_date='2025-12-20'), invoice_payload(invoice_date='2025-11-15'),
+            invoice_payload(invoice_date='2025-08-01'), invoice_payload(invoice_date='2026-01-10'),
+            invoice_payload(buyer_name='Beta Ltd', invoice_date='2025-10-15'),
+            invoice_payload(buyer_name='Beta Ltd', invoice_date='2025-10-01'),
+            invoice_payload(country='USA', currency='USD', exchange_rate=80, base_amount=100, invoice_date='2025-12-01'),
+        ], format='json')
+        self.pay('2025-08-01', '180', date(2025, 9, 1))
+        self.pay('2025-12-20', '500', date(2026, 1, 5))  # after the report date
+        self.pay('2025-10-01', '1180', None)
+
+    def pay(self, invoice_date, amount, when):
+        invoice = Invoice.objects.get(invoice_date=invoice_date, buyer_gst='24ABCDE1234F1Z5', currency__in=['INR'])
+        CompanyBill.objects.create(user=self.user, invoice_id=invoice.invoice_number, amount=Decimal(amount),
+                                   transaction_date=when)
+
+    def test_buckets_per_client_and_currency(self):
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/reports/receivables-aging/?as_of=2025-12-31').data
+        self.assertEqual(data['buckets'], ['0-30', '31-60', '61-90', '90+'])
+        self.assertEqual([(row['buyer_name'], row['currency'], row['invoice_count'], row['total_outstanding'],
+                           list(row['buckets'].values())) for row in data['results']], [
+            ('Acme Corp', 'INR', 3, 3360.0, [1180.0, 1180.0, 0.0, 1000.0]),
+            ('Beta Ltd', 'INR', 1, 1180.0, [0.0, 0.0, 1180.0, 0.0]),
+            ('Acme Corp', 'USD', 1, 100.0, [100.0, 0.0, 0.0, 0.0]),
+        ])
+        self.assertEqual(data['results'][0]['client'], Client.objects.get(name='Acme Corp').pk)
+
+    def test_custom_buckets_and_pages(self):
+        data = self.client.get('/api/reports/receivables-aging/?as_of=2025-12-31&buckets=45&page_size=1').data
+        self.assertEqual(data['buckets'], ['0-45', '45+'])
+        self.assertEqual(data['results'][0]['buckets'], {'0-45': 1180.0, '45+': 2180.0})
+        self.assertIsNotNone(data['next'])
+        last = self.client.get('/api/reports/receivables-aging/?as_of=2025-12-31&buckets=45&page_size=1&page=3').data
+        self.assertEqual((last['results'][0]['currency'], last['next']), ('USD', None))
+
+        for buckets in ('60,30', 'abc', '0,30'):
+            response = self.client.get(f'/api/reports/receivables-aging/?buckets={buckets}')
+            self.assertEqual(response.status_code, 400, buckets)
+
+    def test_csv(self):
+        response = self.client.get('/api/reports/receivables-aging/csv/?as_of=2025-12-31')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['client', 'buyer_name', 'buyer_gst', 'currency', 'invoice_count',
+                                   'total_outstanding', '0-30', '31-60', '61-90', '90+'])
+        self.assertEqual(rows[2][1:], ['Beta Ltd', '24ABCDE1234F1Z5', 'INR', '1', '1180.0', '0.0', '0.0', '1180.0', '0.0'])
+        self.assertEqual(len(rows), 4)
+
+
+class BalanceSheetTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for kind, notice, direction, amount, day in [
+            ('Partner', 'Ravi', 'credit', 5000, 1), ('partner', 'Ravi', 'debit', 1000, 2),
+            ('Loan', 'SBI', 'credit', 3000, 3), ('loan', 'HDFC', 'debit', 700, 4),
+            ('Fixed Assets', 'Laptop', 'debit', 900, 5), ('Fixed Assets', 'Laptop', 'credit', 100, 6),
+            ('Rent', 'Office', 'debit', 400, 7), ('Rent', 'Office', 'credit', 400, 8),
+            ('Commission', 'Agent', 'credit', 250, 9), ('Commission', 'Agent', 'credit', 50, 10),
+            ('Rent', 'Later', 'debit', 80, 25),
+        ]:
+            Other.objects.create(user=self.user, other_type=kind, other_notice=notice, transaction_type=direction,
+                                 other_amount=Decimal(amount), other_date=date(2025, 12, day))
+        Salary.objects.create(user=self.user, salary_name='Asha', salary_amount=Decimal('200'), salary_date=date(2025, 12, 1))
+        Salary.objects.create(user=self.user, salary_name='Asha', salary_amount=Decimal('300'), salary_date=date(2025, 12, 2))
+        Buyer.objects.create(user=self.user, buyer_name='Acme', amount=Decimal('60'), transaction_date=date(2025, 12, 3))
+        self.client.post('/api/create/bulk/', [
+            invoice_payload(invoice_date='2025-12-01'), invoice_payload(buyer_name='Beta Ltd', invoice_date='2025-12-02'),
+        ], format='json')
+        beta = Invoice.objects.get(buyer_name='Beta Ltd')
+        CompanyBill.objects.create(user=self.user, invoice_id=beta.invoice_number, amount=Decimal('1200'),
+                                   transaction_date=date(2025, 12, 5))
+        CompanyBill.objects.create(user=self.user, company_name='Gamma', amount=Decimal('75'),
+                                   transaction_date=date(2025, 12, 6))
+
+    def test_sections(self):
+        data = self.client.get('/api/reports/balance-sheet/?as_of=2025-12-20').json()
+        self.assertEqual(data['as_of'], '2025-12-20')
+        self.assertEqual(data['capital'], [['Ravi', 4000.0]])
+        self.assertEqual((data['loan_credit'], data['loan_debit']), ([['SBI', 3000.0]], [['HDFC', 700.0]]))
+        self.assertEqual(data['fixed_assets'], [['Laptop', 1000.0]])
+        self.assertEqual(data['custom_credit'], {'Commission': [['Agent', 300.0]]})
+        self.assertEqual(data['custom_debit'], {'Rent': [['Office', 0.0]]})
+        self.assertEqual((data['salary'], data['buyer']), ([['Asha', 500.0]], [['Acme', 60.0]]))
+        self.assertEqual(data['sundry_debtors'], [['Acme Corp', 1180.0]])
+        self.assertEqual(data['sundry_creditors'], [['Beta Ltd', 20.0], ['Gamma', 75.0]])
+        self.assertEqual(data['totals']['sundry_creditors'], 95.0)
+
+    def test_as_of_leaves_out_later_rows(self):
+        data = self.client.get('/api/reports/balance-sheet/?as_of=2025-12-01').json()
+        self.assertEqual((data['capital'], data['salary'], data['buyer']), ([['Ravi', 5000.0]], [['Asha', 200.0]], []))
+        self.assertEqual((data['sundry_debtors'], data['sundry_creditors']), ([['Acme Corp', 1180.0]], []))
+        self.assertEqual(self.client.get('/api/reports/balance-sheet/?as_of=someday').status_code, 400)
+
+    def test_agrees_with_the_trial_balance(self):
+        sheet = self.client.get('/api/reports/balance-sheet/?as_of=2025-12-20').json()
+        accounts = {row['account']: row['balance'] for row in
+                    self.client.get('/api/reports/trial-balance/?as_of=2025-12-20').json()['accounts']}
+        totals = sheet['totals']
+        self.assertEqual(totals['sundry_debtors'] - totals['sundry_creditors'], accounts['Accounts Receivable'])
+        self.assertEqual((totals['salary'], totals['buyer']), (accounts['Salaries'], accounts['Buyer Payments']))
+        self.assertEqual(totals['capital'], -accounts['Other:Partner'] - accounts['Other:partner'])
+
+
+class IncomeExpenditureTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/create/bulk/', [
+            invoice_payload(invoice_date='2025-04-10'), invoice_payload(invoice_date='2025-07-05'),
+            invoice_payload(invoice_date='2026-04-02'),
+        ], format='json')
+        CompanyBill.objects.create(user=self.user, company_name='Acme Corp', amount=Decimal('500'),
+                                   transaction_date=date(2025, 4, 20))
+        Salary.objects.create(user=self.user, salary_name='Asha', salary_amount=Decimal('200'), salary_date=date(2025, 5, 1))
+        Buyer.objects.create(user=self.user, buyer_name='Acme', amount=Decimal('60'), transaction_date=date(2025, 7, 10))
+        for kind, direction, amount, day in [('Commission', 'credit', 300, date(2025, 4, 15)),
+                                             ('Rent', 'debit', 400, date(2025, 7, 1)),
+                                             ('Partner', 'credit', 5000, date(2025, 4, 1))]:
+            Other.objects.create(user=self.user, other_type=kind, other_notice='x', transaction_type=direction,
+                                 other_amount=Decimal(amount), other_date=day)
+
+    def get_statement(self, query):
+        # force_authenticate keeps the user object, as authentication would load it fresh
+        self.user.refresh_from_db()
+        return self.client.get('/api/reports/income-expenditure/?' + query).data
+
+    def test_quarters_of_a_financial_year(self):
+        data = self.get_statement('year=2025/2026&period=quarter')
+        self.assertEqual((data['date_from'], data['date_to']), ('2025-04-01', '2026-03-31'))
+        first, second = data['periods']
+        self.assertEqual((first['period'], first['invoiced'], first['receipts'], first['other_income'],
+                          first['salaries'], first['total_income'], first['surplus']),
+                         ('2025/2026 Q1', 1180.0, 500.0, {'Commission': 300.0}, 200.0, 1480.0, 1280.0))
+        self.assertEqual((second['period'], second['buyer_payments'], second['other_expenditure'],
+                          second['total_expenditure']), ('2025/2026 Q2', 60.0, {'Rent': 400.0}, 460.0))
+        self.assertEqual((data['totals']['invoiced'], data['totals']['surplus']), (2360.0, 2000.0))
+
+    def test_months_and_dates(self):
+        data = self.get_statement('date_from=2025-05-01&date_to=2026-12-31')
+        self.assertEqual([row['period'] for row in data['periods']], ['2025-05', '2025-07', '2026-04'])
+        years = self.get_statement('date_from=2025-01-01&date_to=2026-12-31&period=year')
+        self.assertEqual([row['period'] for row in years['periods']], ['2025/2026', '2026/2027'])
+        for query in ('period=week', 'date_from=2025-05-01&date_to=2025-04-01', 'year=2025'):
+            self.assertEqual(self.client.get('/api/reports/income-expenditure/?' + query).status_code, 400, query)
+
+    def test_cached_until_the_next_write(self):
+        self.assertEqual(self.get_statement('year=2025/2026')['totals']['salaries'], 200.0)
+        with self.assertNumQueries(0):
+            self.client.get('/api/reports/income-expenditure/?year=2025/2026')
+        Salary.objects.create(user=self.user, salary_name='Asha', salary_amount=Decimal('50'), salary_date=date(2025, 6, 1))
+        self.assertEqual(self.get_statement('year=2025/2026')['totals']['salaries'], 250.0)
+
+
+class LedgerSnapshotTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for year in range(2016, 2026):
+            Salary.objects.create(user=self.user, salary_name='Asha', salary_amount=Decimal('100'),
+                                  salary_date=date(year, 1, 15))
+        CashEntry.objects.create(user=self.user, amount=Decimal('500'), date=date(2025, 3, 1))
+        CashEntry.objects.create(user=self.user, amount=Decimal('-200'), date=date(2025, 11, 20))
+
+    def balances(self, as_of):
+        data = self.client.get(f'/api/reports/ledger/?as_of={as_of}').data
+        return {(row['account'], row['party']): (row['debit'], row['credit']) for row in data['accounts']}
+
+    def closed_through(self):
+        self.user.refresh_from_db()
+        return self.user.ledger_closed_through
+
+    def test_rolls_snapshots_up_to_the_month_before(self):
+        self.assertEqual(self.balances('2025-12-10'), {
+            ('Salaries', 'Asha'): (1000.0, 0.0), ('Cash', ''): (500.0, 1200.0), ('Cash Adjustments', ''): (200.0, 500.0),
+        })
+        self.assertEqual(self.closed_through(), date(2025, 11, 1))
+        periods = LedgerSnapshot.objects.filter(user=self.user).values_list('period', flat=True).distinct()
+        self.assertEqual((min(periods), len(periods)), (date(2016, 1, 1), 119))
+
+        # Ten years back or ten days back, an as-of read is the same queries
+        counts = []
+        for as_of in ('2025-12-10', '2016-01-20'):
+            with CaptureQueriesContext(connection) as queries:
+                self.balances(as_of)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(self.balances('2016-01-20'), {('Salaries', 'Asha'): (100.0, 0.0), ('Cash', ''): (0.0, 100.0)})
+
+    def test_back_dated_edits_reopen_only_later_periods(self):
+        self.balances('2025-12-10')
+        salary = Salary.objects.get(salary_date=date(2020, 1, 15))
+        salary.salary_amount = Decimal('250')
+        salary.save()
+        self.assertEqual(self.closed_through(), date(2019, 12, 1))
+        self.assertFalse(LedgerSnapshot.objects.filter(user=self.user, period__gt=date(2019, 12, 1)).exists())
+        self.assertTrue(LedgerSnapshot.objects.filter(user=self.user, period=date(2019, 12, 1)).exists())
+        # Gross of the reversal: paid 250 that year, not 100 paid, refunded and 250 paid again
+        self.assertEqual(self.balances('2025-12-10')[('Salaries', 'Asha')], (1150.0, 0.0))
+
+        # Moving an entry reopens its old month as well as the new one
+        moved = Salary.objects.get(salary_date=date(2024, 1, 15))
+        moved.salary_date = date(2025, 6, 1)
+        moved.save()
+        self.assertEqual(self.closed_through(), date(2023, 12, 1))
+        self.assertEqual(self.balances('2024-12-31')[('Salaries', 'Asha')], (950.0, 0.0))
+
+    def test_deleting_an_invoice_reopens_its_month(self):
+        self.client.post('/api/create/', invoice_payload(invoice_date='2025-06-10'), format='json')
+        invoice = Invoice.objects.get()
+        CompanyBill.objects.create(user=self.user, invoice_id=invoice.invoice_number, company_name='Acme Corp',
+                                   amount=Decimal('500'), transaction_date=date(2025, 5, 1))
+        # A payment is booked on its own date, before the invoice as an advance
+        self.assertEqual(self.balances('2025-05-31')[('Accounts Receivable', 'Acme Corp')], (0.0, 500.0))
+        self.assertEqual(self.balances('2025-12-31')[('Accounts Receivable', 'Acme Corp')], (1180.0, 500.0))
+
+        invoice.delete()
+        self.assertEqual(self.closed_through(), date(2025, 5, 1))
+        self.assertEqual(self.balances('2025-12-31')[('Accounts Receivable', 'Acme Corp')], (0.0, 500.0))
+
+
+
+class JournalTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/create/', invoice_payload(), format='json')
+        self.invoice = Invoice.objects.get()
+        CompanyBill.objects.create(user=self.user, company_name='Acme Corp', invoice_id=self.invoice.invoice_number,
+                                   amount=Decimal('500'), transaction_date=date(2025, 5, 20),
+                                   payment_method='Banking', bank_name='HDFC')
+        Buyer.objects.create(user=self.user, buyer_name='Acme Corp', amount=Decimal('200'),
+                             transaction_date=date(2025, 5, 21))
+        Salary.objects.create(user=self.user, salary_name='Asha', salary_amount=Decimal('300'),
+                              salary_date=date(2025, 5, 25), payment_method='Banking', bank_name='HDFC')
+        Other.objects.create(user=self.user, transaction_type='debit', other_type='Rent', other_date=date(2025, 5, 26),
+                             other_notice='May', other_amount=Decimal('50'))
+        CashEntry.objects.create(user=self.user, amount=Decimal('1000'), date=date(2025, 5, 1))
+
+    def balances(self, as_of='2025-12-31', account=''):
+        data = self.client.get(f'/api/reports/trial-balance/?as_of={as_of}&account={account}').data
+        if not account:
+            self.assertEqual(data['totals']['debit'], data['totals']['credit'])
+        return {row['account']: row['balance'] for row in data['accounts']}
+
+    def test_every_write_path_posts_balanced_lines(self):
+        self.assertEqual(self.balances(), {
+            'Accounts Receivable': 680.0, 'Bank:HDFC': 200.0, 'Buyer Payments': 200.0, 'Cash': 750.0,
+            'Cash Adjustments': -1000.0, 'GST Payable': -180.0, 'Other:Rent': 50.0, 'Salaries': 300.0,
+            'Sales': -1000.0,
+        })
+        self.assertEqual(self.balances(account='Bank:'), {'Bank:HDFC': 200.0})
+        self.assertEqual(self.balances(as_of='2025-05-20', account='Cash'), {'Cash': 1000.0, 'Cash Adjustments': -1000.0})
+        with self.assertNumQueries(1):
+            reports.trial_balance(self.user, date(2025, 12, 31))
+
+    def test_foreign_currency_payments_settle_the_receivable(self):
+        self.client.post('/api/create/', invoice_payload(buyer_name='Globex', country='USA', currency='USD',
+                                                         exchange_rate=80, base_amount=100), format='json')
+        invoice = Invoice.objects.get(currency='USD')
+        CompanyBill.objects.create(user=self.user, company_name='Globex', invoice_id=invoice.invoice_number,
+                                   amount=Decimal('100'), transaction_date=date(2025, 5, 30),
+                                   payment_method='Banking', bank_name='HDFC')
+        balances = self.balances()
+        self.assertEqual((balances['Accounts Receivable'], balances['Bank:HDFC']), (680.0, 8200.0))
+
+        # A new rate rebooks the invoice and its payments alike
+        invoice.exchange_rate = 82
+        invoice.save()
+        balances = self.balances()
+        self.assertEqual((balances['Accounts Receivable'], balances['Bank:HDFC']), (680.0, 8400.0))
+
+        # Without its invoice the payment is an advance at face value
+        invoice.delete()
+        balances = self.balances()
+        self.assertEqual((balances['Accounts Receivable'], balances['Bank:HDFC']), (580.0, 300.0))
+
+    def test_invoices_without_an_inr_equivalent_post_at_face_value(self):
+        Invoice.objects.filter(pk=self.invoice.pk).update(inr_equivalent=None)
+        self.invoice.refresh_from_db()
+        JournalLine.objects.post([self.invoice])
+        self.assertEqual(self.balances()['Accounts Receivable'], 680.0)
+
+    def test_undated_payments_stay_on_the_day_recorded(self):
+        payment = CompanyBill.objects.create(user=self.user, company_name='Acme Corp', amount=Decimal('40'))
+        CompanyBill.objects.filter(pk=payment.pk).update(recorded_on=date(2025, 6, 2))
+        payment.refresh_from_db()
+        JournalLine.objects.post([payment])
+        lines = JournalLine.objects.count()
+
+        # An edit moves updated_at, not the day the payment is booked on
+        payment.notice = 'corrected'
+        payment.save()
+        self.assertEqual(JournalLine.objects.count(), lines)
+        self.assertEqual(self.balances(as_of='2025-06-01')['Cash'], 750.0)
+        self.assertEqual(self.balances(as_of='2025-06-02')['Cash'], 790.0)
+
+    def test_edits_and_deletes_append_reversals(self):
+        lines = JournalLine.objects.count()
+        salary = Salary.objects.get()
+        salary.save()
+        self.assertEqual(JournalLine.objects.count(), lines)
+
+        salary.salary_date = date(2025, 6, 5)
+        salary.salary_amount = Decimal('350')
+        salary.save()
+        self.assertEqual(JournalLine.objects.filter(reversal=True).count(), 2)
+        self.assertEqual(self.balances(as_of='2025-05-31')['Bank:HDFC'], 500.0)
+        self.assertEqual(self.balances()['Bank:HDFC'], 150.0)
+
+        CashEntry.objects.get().delete()
+        self.assertEqual(self.balances()['Cash Adjustments'], 0.0)
+        self.assertEqual(JournalLine.objects.count(), lines + 6)
+
+    def test_account_ledger_runs_a_balance(self):
+        data = self.client.get('/api/reports/account-ledger/?account=Bank:HDFC'
+                               '&date_from=2025-05-21&date_to=2025-12-31').data
+        self.assertEqual((data['opening_balance'], data['closing_balance']), (500.0, 200.0))
+        self.assertEqual([(row['source_type'], row['balance']) for row in data['lines']], [('salary', 200.0)])
+        self.assertEqual(self.client.get('/api/reports/account-ledger/').status_code, 400)
+
+    def test_backfill_reposts_history_once(self):
+        expected = self.balances()
+        JournalLine.objects.all().delete()
+        Salary.objects.filter(pk=Salary.objects.get().pk).update(salary_amount=Decimal('400'))
+        call_command('backfill_journal', stdout=io.StringIO())
+        self.assertEqual(self.balances(), {**expected, 'Bank:HDFC': 100.0, 'Salaries': 400.0})
+        lines = JournalLine.objects.count()
+        call_command('backfill_journal', stdout=io.StringIO())
+        self.assertEqual(JournalLine.objects.count(), lines)
+
+
+class CashBookTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        CashEntry.objects.create(user=self.user, amount=Decimal('1000'), date=date(2025, 3, 20))
+        Buyer.objects.create(user=self.user, buyer_name='Acme Corp', amount=Decimal('200'),
+                             transaction_date=date(2025, 4, 5))
+        self.salary = Salary.objects.create(user=self.user, salary_name='Asha', salary_amount=Decimal('300'),
+                                            salary_date=date(2025, 4, 10), payment_method='Cash')
+        Salary.objects.create(user=self.user, salary_name='Ravi', salary_amount=Decimal('300'),
+                              salary_date=date(2025, 4, 10), payment_method='Banking', bank_name='HDFC')
+        Other.objects.create(user=self.user, transaction_type='credit', other_type='Refund', other_notice='Deposit',
+                             other_amount=Decimal('50'), other_date=date(2025, 4, 10), payment_method='Cash')
+        CompanyBill.objects.create(user=self.user, company_name='Acme Corp', amount=Decimal('400'),
+                                   transaction_date=date(2025, 4, 12), payment_method='Cash')
+        CashEntry.objects.create(user=self.user, amount=Decimal('-100'), date=date(2025, 5, 1))
+
+    def book(self, query='from=2025-04-01&to=2025-04-30'):
+        return self.client.get(f'/api/reports/cash-book/?{query}').data
+
+    def test_opening_running_and_closing_balances(self):
+        data = self.book()
+        self.assertEqual((data['opening_balance'], data['closing_balance'], data['next']), (1000.0, 950.0, None))
+        self.assertEqual([(row['source_type'], row['description'], row['debit'], row['credit'], row['balance'])
+                          for row in data['entries']], [
+            ('buyer', 'Acme Corp', 0.0, 200.0, 800.0),
+            ('other', 'Deposit', 50.0, 0.0, 850.0),
+            ('salary', 'Asha', 0.0, 300.0, 550.0),
+            ('companybill', 'Acme Corp', 400.0, 0.0, 950.0),
+        ])
+
+        # An edit shows as the entry it is now, not as its reversal
+        self.salary.salary_amount = Decimal('250')
+        self.salary.save()
+        self.user.refresh_from_db()
+        data = self.book()
+        self.assertEqual(data['closing_balance'], 1000.0)
+        salaries = [row for row in data['entries'] if row['source_type'] == 'salary']
+        self.assertEqual([(row['credit'], row['balance']) for row in salaries], [(250.0, 600.0)])
+
+    def test_pages_continue_the_running_balance(self):
+        full = self.book('date_from=2025-04-01&date_to=2025-05-31')['entries']
+        entries, url = [], '/api/reports/cash-book/?from=2025-04-01&to=2025-05-31&page_size=2'
+        while url:
+            page = self.client.get(url).data
+            entries += page['entries']
+            url = page['next']
+        self.assertEqual(entries, full)
+        self.assertEqual(full[-1]['balance'], 850.0)
+        self.assertEqual(self.client.get('/api/reports/cash-book/?cursor=nonsense').status_code, 400)
+
+
+class TransactionFeedTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        CashEntry.objects.create(user=self.user, amount=Decimal('-100'), date=date(2025, 4, 10), description='Tea')
+        Buyer.objects.create(user=self.user, buyer_name='Acme Corp', amount=Decimal('200'),
+                             transaction_date=date(2025, 4, 5), payment_method='Cash')
+        Salary.objects.create(user=self.user, salary_name='Ravi', salary_amount=Decimal('300'),
+                              salary_date=date(2025, 4, 10), payment_method='Banking', bank_name='HDFC')
+        Other.objects.create(user=self.user, transaction_type='debit', other_type='Rent', other_notice='Office',
+                             other_amount=Decimal('-50'), other_date=date(2025, 3, 31), bank_name='SBI')
+        CompanyBill.objects.create(user=self.user, company_name='Acme Corp', amount=Decimal('400'),
+                                   transaction_date=date(2025, 4, 12), bank_name='HDFC')
+
+    def feed(self, query=''):
+        response = self.client.get(f'/api/transactions/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_rows_of_every_type_newest_first(self):
+        data = self.feed()
+        self.assertIsNone(data['next'])
+        self.assertEqual([(row['type'], row['date'], row['party'], row['amount'], row['direction'], row['method'],
+                           row['bank']) for row in data['results']], [
+            ('company', date(2025, 4, 12), 'Acme Corp', 400.0, 'in', 'Banking', 'HDFC'),
+            ('cash', date(2025, 4, 10), '', 100.0, 'out', 'Cash', None),
+            ('salary', date(2025, 4, 10), 'Ravi', 300.0, 'out', 'Banking', 'HDFC'),
+            ('buyer', date(2025, 4, 5), 'Acme Corp', 200.0, 'out', 'Cash', None),
+            ('other', date(2025, 3, 31), 'Office', 50.0, 'out', 'Banking', 'SBI'),
+        ])
+
+    def test_pages_and_filters(self):
+        full = self.feed()['results']
+        rows, url = [], '/api/transactions/?page_size=2'
+        while url:
+            page = self.client.get(url).data
+            rows += page['results']
+            url = page['next']
+        self.assertEqual(rows, full)
+
+        kinds = lambda query: [row['type'] for row in self.feed(query)['results']]
+        self.assertEqual(kinds('bank=HDFC'), ['company', 'salary'])
+        self.assertEqual(kinds('method=Cash'), ['cash', 'buyer'])
+        self.assertEqual(kinds('type=buyer,other'), ['buyer', 'other'])
+        self.assertEqual(kinds('year=2024/2025'), ['other'])
+        self.assertEqual(kinds('date_from=2025-04-06&date_to=2025-04-10'), ['cash', 'salary'])
+        for query in ('type=invoice', 'method=Cheque', 'cursor=nonsense'):
+            self.assertEqual(self.client.get(f'/api/transactions/?{query}').status_code, 400, query)
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.account = BankAccount.objects.create(user=self.user, bank_name='HDFC', account_number='1',
+                                                  amount=Decimal('0'))
+        self.client.post('/api/create/', invoice_payload(), format='json')
+        self.invoice = Invoice.objects.get()
+        banked = {'payment_method': 'Banking', 'bank_name': 'HDFC'}
+        self.payment = CompanyBill.objects.create(user=self.user, company_name='Acme Corp', amount=Decimal('1180'),
+                                                  invoice_id=self.invoice.invoice_number,
+                                                  transaction_date=date(2025, 5, 20), **banked)
+        self.asha = Salary.objects.create(user=self.user, salary_name='Asha', salary_amount=Decimal('300'),
+                                          salary_date=date(2025, 5, 25), **banked)
+        self.ravi = Salary.objects.create(user=self.user, salary_name='Ravi', salary_amount=Decimal('300'),
+                                          salary_date=date(2025, 5, 26), **banked)
+        self.interest = Other.objects.create(user=self.user, transaction_type='credit', other_type='Interest',
+                                             other_notice='Q1', other_amount=Decimal('50'),
+                                             other_date=date(2025, 5, 28), **banked)
+        self.elsewhere = Buyer.objects.create(user=self.user, buyer_name='Beta', amount=Decimal('200'),
+                                              transaction_date=date(2025, 5, 30), payment_method='Banking',
+                                              bank_name='SBI')
+        self.csv = (
+            'Date,Narration,Chq/Ref No,Withdrawal Amt.,Deposit Amt.,Closing Balance\n'
+            f'20/05/2025,NEFT ACME {self.invoice.invoice_number},N123,,"1,180.00",1180.00\n'
+            '25/05/2025,SALARY RAVI,,300.00,,880.00\n'
+            '26/05/2025,SALARY ASHA,,300.00,,580.00\n'
+            '28/05/2025,INT CREDIT,,,50.00,630.00\n'
+            '30/05/2025,CHQ 881,,200.00,,430.00\n'
+        ).encode()
+
+    def upload(self, content=None, name='may.csv'):
+        statement = SimpleUploadedFile(name, self.csv if content is None else content)
+        return self.client.post(f'/api/bank-accounts/{self.account.pk}/statements/', {'file': statement},
+                                format='multipart')
+
+    def lines(self, statement_id):
+        data = self.client.get(f'/api/statements/{statement_id}/lines/').data
+        return [(row['status'], row['source_type'], row['source_id']) for row in data]
+
+    def test_matches_by_amount_date_and_reference(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['lines'], {'unmatched': 1, 'suggested': 4, 'confirmed': 0, 'ignored': 0})
+        self.assertEqual((response.data['closing_balance'], response.data['book_balance']), (430.0, 630.0))
+        # Ravi's salary is named, though Asha's is the one dated that day
+        self.assertEqual(self.lines(response.data['id']), [
+            ('suggested', 'companybill', self.payment.pk), ('suggested', 'salary', self.ravi.pk),
+            ('suggested', 'salary', self.asha.pk), ('suggested', 'other', self.interest.pk), ('unmatched', '', None),
+        ])
+
+    def test_review_and_confirm(self):
+        statement_id = self.upload().data['id']
+        line = StatementLine.objects.get(statement=statement_id, status='unmatched')
+        review = f'/api/statement-lines/{line.pk}/'
+        taken = self.client.patch(review, {'status': 'confirmed', 'source_type': 'salary', 'source_id': self.asha.pk},
+                                  format='json')
+        self.assertEqual(taken.status_code, 400)
+        response = self.client.patch(review, {'status': 'confirmed', 'source_type': 'buyer',
+                                              'source_id': self.elsewhere.pk}, format='json')
+        self.assertEqual((response.status_code, response.data['source_id']), (200, self.elsewhere.pk))
+
+        self.user.refresh_from_db()
+        version = self.user.data_version
+        response = self.client.post(f'/api/statements/{statement_id}/confirm/')
+        self.assertEqual((response.data['confirmed'], response.data['lines']['confirmed']), (4, 5))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.amount, Decimal('430'))
+        # The cached dashboard shows the new bank balance
+        self.user.refresh_from_db()
+        self.assertGreater(self.user.data_version, version)
+
+        # Matched transactions are not offered to the next statement
+        again = self.upload()
+        self.assertEqual(again.data['lines']['unmatched'], 5)
+
+    def test_matches_a_chunk_at_a_time(self):
+        statement = reconcile.import_statement(self.account, 'may.csv', io.BytesIO(self.csv), chunk_size=2)
+        self.assertEqual((statement.date_from, statement.date_to, statement.closing_balance),
+                         (date(2025, 5, 20), date(2025, 5, 30), Decimal('430.00')))
+        self.assertEqual(self.lines(statement.pk), [
+            ('suggested', 'companybill', self.payment.pk), ('suggested', 'salary', self.ravi.pk),
+            ('suggested', 'salary', self.asha.pk), ('suggested', 'other', self.interest.pk), ('unmatched', '', None),
+        ])
+
+    def test_ofx_and_bad_files(self):
+        ofx = (
+            'OFXHEADER:100\nDATA:OFXSGML\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+            '<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20250524120000[+5:30:IST]\n<TRNAMT>-300.00\n'
+            '<FITID>T1\n<NAME>SALARY ASHA\n</STMTTRN>\n'
+            '<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250521<TRNAMT>1180.00<FITID>T2<NAME>ACME</STMTTRN>\n'
+            '</BANKTRANLIST><LEDGERBAL><BALAMT>880.00<DTASOF>20250531</LEDGERBAL></STMTRS></STMTTRNRS>'
+            '</BANKMSGSRSV1></OFX>\n'
+        ).encode()
+        response = self.upload(ofx, 'may.ofx')
+        self.assertEqual((response.data['lines']['suggested'], response.data['closing_balance']), (2, 880.0))
+        self.assertEqual(self.lines(response.data['id']), [
+            ('suggested', 'salary', self.asha.pk), ('suggested', 'companybill', self.payment.pk)])
+
+        self.assertEqual(self.upload(b'when,what\n', 'bad.csv').status_code, 400)
+        self.assertEqual(self.upload(b'Date,Amount\n31/02/2025,10\n', 'bad.csv').status_code, 400)
+        self.assertEqual(self.upload(self.csv, 'may.pdf').status_code, 400)
+        self.assertFalse(BankStatement.objects.filter(filename='bad.csv').exists())
+
+# Shared lookup tables whose endpoints list every row on purpose
+FULL_LIST_TABLES = {Partner._meta.db_table, Bank._meta.db_table}
+
+
+def full_scans(sql, params):
+    """Tables the database would read in full to run the query"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # The planner prefers sequential scans of tiny test tables; only
+            # a scan it is left with when they are discouraged is a real one
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plans, found = [cursor.fetchone()[0][0]['Plan']], []
+            while plans:
+                plan = plans.pop()
+                if plan['Node Type'] == 'Seq Scan':
+                    found.append(plan['Relation Name'])
+                plans.extend(plan.get('Plans', []))
+            return [table for table in found if table not in FULL_LIST_TABLES]
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        details = [row[-1] for row in cursor.fetchall()]
+    # "SCAN t" and "SCAN t USING [COVERING] INDEX i" both visit every row;
+    # "SEARCH t USING INDEX i (user_id=?)" is what an access path looks like.
+    # Reading back a WITH query's rows (MATERIALIZE / CO-ROUTINE) is not a table scan.
+    derived = {detail.split()[1] for detail in details if detail.startswith(('MATERIALIZE ', 'CO-ROUTINE '))}
+    tables = [detail.split()[1] for detail in details
+              if detail.startswith('SCAN ') and 'VIRTUAL TABLE' not in detail
+              and not detail.startswith(('SCAN CONSTANT ROW', 'SCAN (subquery'))]
+    return [table for table in tables if table not in FULL_LIST_TABLES and table not in derived]
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def run_import(self, dataset, content, filename='rows.csv', chunk_size=imports.CHUNK_SIZE):
+        job = ImportJob.objects.create(user=self.user, dataset=dataset, filename=filename)
+        return imports.run(job, io.BytesIO(content), chunk_size)
+
+    def row_errors(self, job):
+        return {error.row: error.errors for error in job.row_errors.all()}
+
+    def test_invoices_keep_their_numbers_and_bad_rows_are_reported(self):
+        content = (
+            'Invoice_Number,invoice_date,buyer_name,buyer_address,buyer_gst,hsn_sac_code,base_amount,country,state\n'
+            '07-2025/2026,2025-05-10,Acme Corp,Ahmedabad,24ABCDE1234F1Z5,9983,1000,India,Gujarat\n'
+            ',2025-05-11,Beta Ltd,Pune,27BETA1234F1Z5,9983,500,India,Maharashtra\n'
+            ',not a date,Gamma,Surat,24GAMMA1234F1Z5,9983,1,India,Gujarat\n'
+            '07-2025/2026,2025-06-01,Acme Corp,Ahmedabad,24ABCDE1234F1Z5,9983,1,India,Gujarat\n'
+        ).encode()
+        # Two rows a chunk, so the repeated number is caught against the database
+        job = self.run_import('invoices', content, chunk_size=2)
+
+        self.assertEqual((job.status, job.rows, job.imported, job.failed, job.progress), ('done', 4, 2, 2, 1.0))
+        self.assertEqual(list(self.row_errors(job)), [4, 5])
+        self.assertIn('invoice_date', self.row_errors(job)[4])
+        self.assertEqual(self.row_errors(job)[5], {'invoice_number': ['07-2025/2026 is already used in 2025/2026']})
+        self.assertEqual(dict(Invoice.objects.values_list('buyer_name', 'invoice_number')),
+                         {'Acme Corp': '07-2025/2026', 'Beta Ltd': '08-2025/2026'})
+        self.assertEqual(Invoice.objects.get(buyer_name='Acme Corp').total_with_gst, Decimal('1180'))
+        self.assertEqual(SearchDocument.objects.count(), 2)
+        self.assertEqual(Client.objects.filter(user=self.user).count(), 2)
+        # Numbering carries on after the imported numbers
+        self.client.post('/api/create/', invoice_payload(), format='json')
+        self.assertTrue(Invoice.objects.filter(invoice_number='09-2025/2026').exists())
+
+    def test_other_transactions_are_signed_and_posted(self):
+        Partner.objects.create(name='Landlord')
+        content = (
+            'other_date,transaction_type,other_type,other_notice,other_amount,partner\n'
+            '2025-05-01,debit,Rent,May rent,100,Landlord\n'
+            '2025-05-02,credit,Interest,Q1,50,\n'
+            '2025-05-03,debit,Rent,June rent,100,Nobody\n'
+        ).encode()
+        job = self.run_import('other', content)
+
+        self.assertEqual((job.imported, job.failed), (2, 1))
+        self.assertEqual(self.row_errors(job), {4: {'partner': ["No partner named 'Nobody'"]}})
+        rent, interest = Other.objects.order_by('other_date')
+        self.assertEqual((rent.other_amount, rent.partner.name), (Decimal('-100'), 'Landlord'))
+        self.assertEqual(interest.other_amount, Decimal('50'))
+        self.assertEqual(JournalLine.objects.filter(source_type='other', source_id=rent.pk).count(), 2)
+
+    def test_reads_an_exported_workbook(self):
+        self.client.post('/api/create/bulk/', [
+            invoice_payload(invoice_date='2025-04-10'), invoice_payload(buyer_name='Beta Ltd'),
+        ], format='json')
+        response = self.client.get('/api/export/invoices/xlsx/')
+        workbook = b''.join(response.streaming_content)
+
+        self.user = make_user('copy@example.com')
+        job = self.run_import('invoices', workbook, filename='invoices.xlsx')
+        self.assertEqual((job.status, job.imported, job.failed), ('done', 2, 0))
+        self.assertEqual(sorted(Invoice.objects.filter(user=self.user).values_list('buyer_name', 'invoice_date')),
+                         [('Acme Corp', date(2025, 4, 10)), ('Beta Ltd', date(2025, 5, 10))])
+
+    def test_only_xlsx_numbers_in_range_are_day_counts(self):
+        columns = ['salary_name', 'salary_amount', 'salary_date']
+        workbook = b''.join(exports.xlsx_stream(columns, [[
+            ['Asha', 300, 45748], ['Ravi', 300, 99999999], ['Mira', 300, '2025-04-03'],
+        ]]))
+        job = self.run_import('salary', workbook, filename='salaries.xlsx')
+        self.assertEqual((job.status, job.imported, list(self.row_errors(job))), ('done', 2, [3]))
+        self.assertIn('salary_date', self.row_errors(job)[3])
+        self.assertEqual(sorted(Salary.objects.values_list('salary_name', 'salary_date')),
+                         [('Asha', date(2025, 4, 1)), ('Mira', date(2025, 4, 3))])
+
+        # A CSV cell is text, never a day count: a compact ISO date reads as one
+        Salary.objects.all().delete()
+        job = self.run_import('salary', b'salary_name,salary_amount,salary_date\nAsha,300,20250401\n')
+        self.assertEqual((job.status, job.imported), ('done', 1))
+        self.assertEqual(Salary.objects.get().salary_date, date(2025, 4, 1))
+
+    def test_a_job_that_stops_moving_is_failed_when_polled(self):
+        job = ImportJob.objects.create(user=self.user, dataset='salary', filename='may.csv', status='running',
+                                       rows=4000, imported=3990, failed=10)
+        self.assertEqual(self.client.get(f'/api/imports/{job.pk}/').data['status'], 'running')
+
+        ImportJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - ImportJob.objects.STALE_AFTER - timedelta(seconds=1))
+        data = self.client.get(f'/api/imports/{job.pk}/').data
+        self.assertEqual(data['status'], 'failed')
+        self.assertIn('after 4000 rows; the 3990 imported rows were kept', data['message'])
+        self.assertIsNotNone(data['finished_at'])
+
+    def test_upload_runs_after_commit_and_can_be_polled(self):
+        content = 'salary_name,salary_amount,salary_date\nAsha,300,2025-05-25\nRavi,abc,2025-05-26\n'.encode()
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post('/api/imports/', {
+                    'dataset': 'salary', 'file': SimpleUploadedFile('may.csv', content),
+                }, format='multipart')
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual((response.data['status'], len(callbacks)), ('pending', 1))
+            # Run the import here rather than in the thread the callback starts
+            imports.run_upload(response.data['id'])
+            self.assertEqual(os.listdir(os.path.join(media, 'imports')), [])
+
+        job = self.client.get(f"/api/imports/{response.data['id']}/").data
+        self.assertEqual((job['status'], job['rows'], job['imported'], job['failed']), ('done', 2, 1, 1))
+        errors = self.client.get(f"/api/imports/{response.data['id']}/errors/").data
+        self.assertEqual([(error['row'], list(error['errors'])) for error in errors], [(3, ['salary_amount'])])
+        self.assertEqual(Salary.objects.get().salary_name, 'Asha')
+        self.assertEqual([row['id'] for row in self.client.get('/api/imports/').data], [response.data['id']])
+
+    def test_rejects_unreadable_files(self):
+        response = self.client.post('/api/imports/', {
+            'dataset': 'salary', 'file': SimpleUploadedFile('may.pdf', b'%PDF'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ImportJob.objects.exists())
+
+        job = self.run_import('salary', b'name,amount\nAsha,300\n')
+        self.assertEqual((job.status, job.message), ('failed', 'The first row names no salary columns'))
+        job = self.run_import('salary', b'not a workbook', filename='may.xlsx')
+        self.assertEqual(job.status, 'failed')
+
+        other = APIClient()
+        other.force_authenticate(make_user('other@example.com'))
+        self.assertEqual(other.get(f'/api/imports/{job.pk}/').status_code, 404)
+
+    def test_command_imports_a_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'buyers.csv')
+            with open(path, 'w') as rows:
+                rows.write('buyer_name,amount,transaction_date\nAcme Corp,100,2025-05-01\n')
+            out = io.StringIO()
+            call_command('import_data', 'buyer', path, user=self.user.email, stdout=out)
+        self.assertIn('Imported 1 of 1 rows into buyer', out.getvalue())
+        self.assertEqual(Buyer.objects.get(user=self.user).amount, Decimal('100'))
+
+
+class QueryPlanTests(TestCase):
+    """Every query behind the read endpoints uses an index; none reads a whole table"""
+
+    def setUp(self):
+        # A cached dashboard summary would hide its queries
+        cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/create/bulk/', [
+            invoice_payload(), invoice_payload(buyer_name='Beta Ltd', buyer_gst='27BETA1234F1Z5'),
+        ], format='json')
+        self.invoice = Invoice.objects.filter(user=self.user).first()
+        CompanyBill.objects.create(user=self.user, company_name='Acme Corp', invoice_id=self.invoice.invoice_number,
+                                   transaction_date=date(2025, 5, 20), amount=Decimal('100'))
+        Buyer.objects.create(user=self.user, buyer_name='Acme Corp', notice='advance')
+        Salary.objects.create(user=self.user, salary_name='Asha', salary_amount=Decimal('10'),
+                              salary_date=date(2025, 5, 1))
+        Other.objects.create(user=self.user, other_type='Rent', other_date=date(2025, 5, 1),
+                             other_notice='May rent', other_amount=Decimal('10'))
+        Employee.objects.create(user=self.user, name='Asha', joining_date=date(2024, 1, 1),
+                                salary=Decimal('1'), email='asha@example.com', number='1')
+        self.account = BankAccount.objects.create(user=self.user, bank_name='HDFC', account_number='1',
+                                                  amount=Decimal('5'))
+        self.statement = BankStatement.objects.create(user=self.user, bank_account=self.account, filename='may.csv',
+                                                      date_from=date(2025, 5, 1), date_to=date(2025, 5, 31))
+        StatementLine.objects.create(statement=self.statement, user=self.user, date=date(2025, 5, 20),
+                                     amount=Decimal('100'))
+        CashEntry.objects.create(user=self.user, amount=Decimal('5'), date=date(2025, 5, 1))
+        OTP.objects.create(email='owner@example.com', otp_code='123456')
+
+    def assert_indexed(self, label, queries):
+        for query in queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue
+            # Logged SQL has the parameters inlined; plan the statement as the ORM runs it
+            with self.subTest(label, sql=sql):
+                self.assertEqual(full_scans(sql, ()), [])
+
+    def test_detects_a_full_scan(self):
+        self.assertEqual(full_scans('SELECT id FROM invoice_backend_invoice WHERE remark = %s', ['x']),
+                         ['invoice_backend_invoice'])
+        self.assertEqual(full_scans('SELECT id FROM invoice_backend_invoice WHERE user_id = %s', [1]), [])
+
+    def test_read_endpoints(self):
+        paths = [
+            '/api/invoices/', '/api/invoices/?page_size=1', '/api/invoices/?buyer=Acme',
+            '/api/invoices/?gst=24ABCDE1234F1Z5', '/api/invoices/?date_from=2025-04-01',
+            '/api/invoices/?amount_min=100', '/api/invoices/?year=2025/2026', '/api/invoices/?status=unpaid',
+            f'/api/invoices/{self.invoice.pk}/', '/api/invoices/by-gst/24ABCDE1234F1Z5/',
+            '/api/grouped-invoices/', '/api/clients/', f'/api/clients/{self.invoice.client_id}/invoices/?page_size=1',
+            '/api/dashboard/summary/', '/api/company-balance/24ABCDE1234F1Z5/',
+            '/api/reports/receivables-aging/', '/api/reports/receivables-aging/csv/', '/api/reports/balance-sheet/',
+            '/api/reports/income-expenditure/?date_from=2020-04-01&date_to=2026-03-31', '/api/reports/ledger/',
+            '/api/reports/trial-balance/', '/api/reports/trial-balance/?account=Bank:',
+            '/api/reports/account-ledger/?account=Cash', '/api/reports/cash-book/?from=2025-04-01&page_size=1',
+            '/api/transactions/', '/api/transactions/?method=Banking&bank=HDFC&year=2025/2026&page_size=1',
+            '/api/get_next_invoice_number/', '/api/get_next_invoice_number_by_year/?year=2025',
+            '/api/settings/', '/api/auth/me/', '/api/profile/',
+            '/api/banking/company/', '/api/banking/buyer/', '/api/banking/salary/', '/api/banking/other/',
+            '/api/banking/employee/', '/api/bank-accounts/', '/api/bank-accounts/deleted/',
+            '/api/cash-entries/', '/api/cash-entries/deleted/', '/api/partners/', '/api/search/?q=acme',
+            f'/api/bank-accounts/{self.account.pk}/statements/', f'/api/statements/{self.statement.pk}/lines/',
+            f'/api/statements/{self.statement.pk}/lines/?status=unmatched&page_size=10',
+            '/api/export/invoices/csv/?year=2025/2026', '/api/export/other/ndjson/', '/api/imports/',
+        ]
+        for path in paths:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(path)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertLess(response.status_code, 400, path)
+            self.assert_indexed(path, queries.captured_queries)
+
+    def test_latest_otp_lookup(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post('/api/auth/verify-otp/', {'email': 'owner@example.com', 'otp_code': '000000'},
+                             format='json')
+        self.assertTrue(any('invoice_backend_otp' in query['sql'] for query in queries.captured_queries))
+        self.assert_indexed('verify-otp', queries.captured_queries)
+
+
+class ConcurrentInvoiceCreationTests(TransactionTestCase):
+    threads = 8
+    invoices_per_thread = 5
+
+    def test_concurrent_creates_get_distinct_numbers(self):
+        user = make_user()
+        errors = []
+
+        def worker():
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                for _ in range(self.invoices_per_thread):
+                    response = client.post('/api/create/', invoice_payload(), format='json')
+                    if response.status_code != 201:
+                        errors.append(response.data)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        total = self.threads * self.invoices_per_thread
+        sequences = sorted(Invoice.objects.filter(user=user).values_list('sequence', flat=True))
+        self.assertEqual(sequences, list(range(1, total + 1)))
+        self.assertEqual(InvoiceSequence.objects.get(user=user).last_number, total)
@@ -12,11 +12,14 @@ urlpatterns = [
     path('invoices/', views.get_invoices, name='invoice-list'),
     path('invoices/<int:pk>/', InvoiceDetailView.as_view(), name='invoice-detail'),
     path('create/', views.create_invoice, name='create-invoice'),
+    path('create/bulk/', views.create_invoices_bulk, name='create-invoices-bulk'),
     path('update/<int:pk>/', views.invoice_detail, name='update-invoice'),
     path('delete/<int:pk>/', views.invoice_detail, name='delete-invoice'),
     path('get_next_invoice_number/', views.get_next_invoice_number, name='get_next_invoice_number'),
     path('invoices/by-gst/<str:gst_number>/', views.get_invoices_by_gst, name='get_invoices_by_gst'),
     path('grouped-invoices/', views.grouped_invoices, name='grouped-invoices'),
+    path('clients/', views.client_list, name='client-list'),
+    path('clients/<int:pk>/invoices/', views.client_invoices, name='client-invoices'),
 
     # Settings paths
     path('settings/', views.settings_list_create, name='settings-list-create'),
@@ -59,6 +62,10 @@ urlpatterns = [
     path('bank-accounts/deleted/', views.soft_deleted_bank_accounts, name='soft-deleted-bank-accounts'),
     path('bank-accounts/deleted/<int:pk>/', views.soft_deleted_bank_account_detail, name='soft-deleted-bank-account-detail'),
     path('bank-accounts/deleted/<int:pk>/permanent-delete/', views.permanently_delete_bank_account, name='permanently-delete-account'),
+    path('bank-accounts/<int:pk>/statements/', views.bank_statements, name='bank-statements'),
+    path('statements/<int:pk>/lines/', views.statement_lines, name='statement-lines'),
+    path('statements/<int:pk>/confirm/', views.confirm_statement, name='confirm-statement'),
+    path('statement-lines/<int:pk>/', views.review_statement_line, name='review-statement-line'),
 
     # Cash management
     path('cash-entries/', views.cash_entry_collection, name='cashentry-collection'),
@@ -73,5 +80,21 @@ urlpatterns = [
     path('partners/', views.partner_list_create, name='partner-list-create'),
     path('partners/<int:pk>/', views.partner_detail, name='partner-detail'),
 
+    path('search/', views.global_search, name='global-search'),
+    path('reports/receivables-aging/', views.receivables_aging, name='receivables-aging'),
+    path('reports/receivables-aging/csv/', views.receivables_aging_csv, name='receivables-aging-csv'),
+    path('reports/balance-sheet/', views.balance_sheet, name='balance-sheet'),
+    path('reports/income-expenditure/', views.income_expenditure, name='income-expenditure'),
+    path('reports/ledger/', views.ledger_balances, name='ledger-balances'),
+    path('reports/trial-balance/', views.trial_balance, name='trial-balance'),
+    path('reports/account-ledger/', views.account_ledger, name='account-ledger'),
+    path('reports/cash-book/', views.cash_book, name='cash-book'),
+    path('transactions/', views.transactions, name='transactions'),
+    path('dashboard/summary/', views.dashboard_summary, name='dashboard-summary'),
+    path('export/<str:dataset>/<str:export_format>/', views.export_data, name='export-data'),
+    path('imports/', views.import_jobs, name='import-jobs'),
+    path('imports/<int:pk>/', views.import_job_detail, name='import-job-detail'),
+    path('imports/<int:pk>/errors/', views.import_job_errors, name='import-job-errors'),
+
     path('get_next_invoice_number_by_year/', views.get_next_invoice_number_by_year, name='get_next_invoice_number_by_year'),
 ]
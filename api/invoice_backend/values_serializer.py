@@ -0,0 +1,168 @@
+"""
+Read-only serialization straight from QuerySet.values_list() rows.
+
+A ModelSerializer builds a model instance for every row and then walks
+its field objects attribute by attribute. The list endpoints only output
+column values, so compile_plan() works out once per serializer which
+column feeds each key and which conversion the DRF field would apply,
+and RowPlan turns plain tuples into the same dicts the serializer
+returns. Serializers with anything a column cannot answer (method
+fields, files, custom to_representation) get no plan and keep using the
+normal path.
+"""
+import datetime
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# DRF fields whose to_representation() returns database values unchanged
+_PASSTHROUGH = (
+    serializers.CharField.to_representation,
+    serializers.IntegerField.to_representation,
+    serializers.BooleanField.to_representation,
+)
+
+
+class RowPlan:
+    """Maps a values_list() row to the dict the serializer would produce"""
+
+    def __init__(self, names, columns, converters, nested):
+        self.names = names            # output keys, in serializer order
+        self.columns = columns        # values_list() lookups; the first len(names) line up with names
+        self.converters = converters  # (index, factory) for values that need converting
+        self.nested = nested          # (index, start, RowPlan) for nested serializers
+
+    def row_function(self):
+        """
+        A function turning one row into a dict. Converters are bound here
+        rather than when the plan is built because some, like the datetime
+        one, depend on the timezone active for the current request.
+        """
+        names = self.names
+        # (key, index, function of the row) of the values that are not the column as read
+        fixes = [(names[index], index, _converting(index, factory())) for index, factory in self.converters]
+        fixes.extend((names[index], index, _nesting(start, start + len(plan.columns), plan.row_function()))
+                     for index, start, plan in self.nested)
+        if not fixes:
+            # zip() stops at the last name, before any nested columns
+            return lambda row: dict(zip(names, row))
+
+        def to_dict(row):
+            data = dict(zip(names, row))
+            for name, index, fix in fixes:
+                if row[index] is not None:
+                    data[name] = fix(row)
+            return data
+        return to_dict
+
+    def serialize(self, rows):
+        to_dict = self.row_function()
+        return [to_dict(row) for row in rows]
+
+
+def _converting(index, convert):
+    return lambda row: convert(row[index])
+
+
+def _nesting(start, end, to_dict):
+    return lambda row: to_dict(row[start:end])
+
+
+def _returns(function):
+    return lambda: function
+
+
+def _datetime_factory(field):
+    """Same output as DateTimeField.to_representation() in ISO 8601, with the timezone looked up once"""
+    def factory():
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+
+        def convert(value):
+            if value.utcoffset() is None:
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
+    return factory
+
+
+def _iso_8601(field, default):
+    return (getattr(field, 'format', default) or '').lower() == ISO_8601
+
+
+def _converter(field, model_field):
+    """None when the column value is already the output, else a factory for the function to apply"""
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        # values_list('user') yields user_id, which is what the field returns
+        return None if field.pk_field is None else _returns(field.to_representation)
+    if isinstance(field, serializers.ChoiceField):
+        if all(isinstance(key, str) for key in field.choices):
+            return None
+        return _returns(field.to_representation)
+    if type(field).to_representation in _PASSTHROUGH:
+        return None
+    if isinstance(field, serializers.FloatField) and isinstance(model_field, models.FloatField):
+        # The database driver already returns a float
+        return None
+    if type(field) is serializers.DateTimeField and isinstance(model_field, models.DateTimeField) \
+            and _iso_8601(field, api_settings.DATETIME_FORMAT):
+        return _datetime_factory(field)
+    if type(field) is serializers.DateField and isinstance(model_field, models.DateField) \
+            and _iso_8601(field, api_settings.DATE_FORMAT):
+        return _returns(datetime.date.isoformat)
+    return _returns(field.to_representation)
+
+
+def _build_plan(serializer, prefix=''):
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+    model = serializer.Meta.model
+    names, columns, converters, nested_fields = [], [], [], []
+    for field in serializer._readable_fields:
+        if len(field.source_attrs) != 1:
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many or isinstance(model_field, models.FileField):
+            return None
+        if isinstance(field, serializers.ModelSerializer):
+            if not model_field.many_to_one and not model_field.one_to_one:
+                return None
+            nested_fields.append((len(names), field))
+        elif isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)):
+            return None
+        elif model_field.is_relation and not isinstance(field, serializers.PrimaryKeyRelatedField):
+            return None
+        else:
+            convert = _converter(field, model_field)
+            if convert is not None:
+                converters.append((len(names), convert))
+        names.append(field.field_name)
+        columns.append(prefix + field.source)
+
+    nested = []
+    for index, field in nested_fields:
+        plan = _build_plan(field, prefix=f'{prefix}{field.source}__')
+        if plan is None:
+            return None
+        nested.append((index, len(columns), plan))
+        columns.extend(plan.columns)
+    return RowPlan(tuple(names), tuple(columns), tuple(converters), tuple(nested))
+
+
+@lru_cache(maxsize=256)
+def _cached_plan(serializer_class, fields):
+    serializer = serializer_class() if fields is None else serializer_class(fields=list(fields))
+    return _build_plan(serializer)
+
+
+def compile_plan(serializer_class, fields=None):
+    """RowPlan for serializer_class limited to fields, or None if it cannot be served from values()"""
+    return _cached_plan(serializer_class, None if fields is None else tuple(fields))
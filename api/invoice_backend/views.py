@@ -3,12 +3,21 @@ from django.db import models
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework import status, generics, permissions
 from .models import Invoice, Setting, Deposit,CompanyBill, Buyer, Salary, Other,BankingDeposit,Employee,Bank,BankAccount,CashEntry, Partner, OTP
-from .serializers import InvoiceSerializer,SettingSerializer, DepositSerializer,CompanyBillSerializer, BuyerSerializer, SalarySerializer, OtherSerializer,BankingDepositSerializer,EmployeeSerializer,UserProfile,BankAccountSerializer,CashEntrySerializer, PartnerSerializer, OTPSerializer, SendOTPSerializer, VerifyOTPSerializer
+from .models import BankStatement, StatementLine, ImportJob
+from .models import Client, InvoiceSequence, get_financial_year, format_invoice_number
+from .pagination import list_response, next_link
+from .filters import filter_invoices, SearchQuerySerializer, ExportFilterSerializer, AgingQuerySerializer, ReportDateSerializer, StatementQuerySerializer, TrialBalanceQuerySerializer, AccountLedgerQuerySerializer, CashBookQuerySerializer, TransactionFeedQuerySerializer
+from . import dashboard, exports, feed, imports, ledger, reconcile, reports, search
+from .conditional import etag_on_changes, etag_on_current_user
+from .serializers import InvoiceSerializer,ClientSerializer,SettingSerializer, DepositSerializer,CompanyBillSerializer, BuyerSerializer, SalarySerializer, OtherSerializer,BankingDepositSerializer,EmployeeSerializer,UserProfile,BankAccountSerializer,CashEntrySerializer, PartnerSerializer, OTPSerializer, SendOTPSerializer, VerifyOTPSerializer
+from .serializers import StatementUploadSerializer, StatementLineSerializer, StatementLineReviewSerializer
+from .serializers import ImportUploadSerializer, ImportJobSerializer, ImportRowErrorSerializer
 from django.contrib.auth.models import User
 from datetime import datetime
-from django.http import JsonResponse,FileResponse,Http404,HttpResponseBadRequest
+from django.http import JsonResponse,FileResponse,Http404,HttpResponseBadRequest,StreamingHttpResponse
 from rest_framework import status
 from django.views.decorators.csrf import csrf_exempt
 from django.http import HttpResponse
@@ -22,7 +31,7 @@ from django.contrib.auth import get_user_model
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from .serializers import UserProfileSerializer
-from django.db.models import Sum, F
+from django.db.models import Sum, F, Prefetch, Window
 from decimal import Decimal
 from django.db.models import DecimalField
 from collections import defaultdict
@@ -375,6 +384,7 @@ def login_user(request):
       
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@etag_on_current_user
 def get_current_user(request):
     """Get current authenticated user"""
     serializer = UserSerializer(request.user)
@@ -390,44 +400,21 @@ def deposit_list(request, statement_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@etag_on_changes(Invoice)
 def get_invoices(request):
-    year_range = request.query_params.get('year', None)
-    if year_range:
-        invoices = Invoice.objects.filter(financial_year=year_range, user=request.user)
-    else:
-        invoices = Invoice.objects.filter(user=request.user)
-    serializer = InvoiceSerializer(invoices, many=True)
-    return Response(serializer.data)
+    # Optional filters: buyer, gst, date_from, date_to, amount_min, amount_max,
+    # currency, country, state and year (see filters.InvoiceFilterSerializer)
+    invoices = filter_invoices(Invoice.objects.filter(user=request.user), request.query_params)
+    return list_response(request, invoices, InvoiceSerializer, ordering='-pk')
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_next_invoice_number(request):
     # Financial year logic: April 1st to March 31st
-    current_date = datetime.now().date()
-    if current_date.month >= 4:  # April or later
-        financial_year_start = current_date.year
-    else:  # January, February, or March
-        financial_year_start = current_date.year - 1
-    
-    financial_year_end = financial_year_start + 1
-    financial_year = f"{financial_year_start}/{financial_year_end}"
-
-    # Only get the last invoice for this user and year
-    last_invoice = Invoice.objects.filter(
-        financial_year=financial_year,
-        user=request.user
-    ).order_by('-invoice_number').first()
-    
-    if last_invoice:
-        try:
-            num_part = last_invoice.invoice_number.split('-')[0]
-            next_num = int(num_part) + 1
-        except (ValueError, IndexError, AttributeError):
-            next_num = 1
-    else:
-        next_num = 1
-        
-    invoice_number = f"{next_num:02d}-{financial_year}"
+    financial_year = get_financial_year()
+
+    next_num = InvoiceSequence.objects.peek(request.user, financial_year)
+    invoice_number = format_invoice_number(next_num, financial_year)
     
     return Response({
         'invoice_number': invoice_number,
@@ -461,27 +448,14 @@ def get_next_invoice_number_by_year(request):
             'error': 'Invalid year format'
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Get the last invoice for this user and specific year
-    last_invoice = Invoice.objects.filter(
-        financial_year=financial_year,
-        user=request.user
-    ).order_by('-invoice_number').first()
-    
-    if last_invoice:
-        try:
-            num_part = last_invoice.invoice_number.split('-')[0]
-            next_num = int(num_part) + 1
-        except (ValueError, IndexError, AttributeError):
-            next_num = 1
-    else:
-        next_num = 1
-        
-    invoice_number = f"{next_num:02d}-{financial_year}"
+    next_num = InvoiceSequence.objects.peek(request.user, financial_year)
+    invoice_number = format_invoice_number(next_num, financial_year)
     
     return Response({
         'invoice_number': invoice_number,
         'financial_year': financial_year
     })
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_invoice(request):
@@ -511,6 +485,70 @@ def create_invoice(request):
             "message": str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+# Upper bound on invoices accepted by one bulk request
+BULK_INVOICE_LIMIT = 1000
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_invoices_bulk(request):
+    """
+    Create many invoices in one request.
+    Body: a list of invoices, or {"invoices": [...]}.
+    All rows are validated first; if any row is invalid nothing is created.
+    """
+    rows = request.data.get('invoices') if isinstance(request.data, dict) else request.data
+    if not isinstance(rows, list) or not rows:
+        return Response({
+            "status": "error",
+            "message": "Provide a non-empty list of invoices"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(rows) > BULK_INVOICE_LIMIT:
+        return Response({
+            "status": "error",
+            "message": f"At most {BULK_INVOICE_LIMIT} invoices can be created per request"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # The owner is set directly rather than through the serializer so each
+    # row doesn't look the user up again.
+    serializer = InvoiceSerializer(data=rows, many=True)
+    if not serializer.is_valid():
+        return Response({
+            "status": "error",
+            "results": [
+                {"index": index, "status": "error", "errors": errors}
+                for index, errors in enumerate(serializer.errors) if errors
+            ]
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    invoices = []
+    for validated in serializer.validated_data:
+        validated.pop('user', None)
+        invoices.append(Invoice(user=request.user, **validated))
+
+    try:
+        Invoice.objects.bulk_create_numbered(invoices)
+    except Exception as e:
+        return Response({
+            "status": "error",
+            "message": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        "status": "success",
+        "count": len(invoices),
+        "results": [
+            {
+                "index": index,
+                "status": "success",
+                "id": invoice.pk,
+                "invoice_number": invoice.invoice_number,
+                "financial_year": invoice.financial_year,
+            }
+            for index, invoice in enumerate(invoices)
+        ]
+    }, status=status.HTTP_201_CREATED)
+
    
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
@@ -599,6 +637,7 @@ def delete_setting(request, pk):
 
 @api_view(['POST', 'GET'])
 @permission_classes([IsAuthenticated])
+@etag_on_changes(CompanyBill)
 def create_company_transaction(request):
     if request.method == 'POST':
         data = request.data.copy()
@@ -611,8 +650,7 @@ def create_company_transaction(request):
     
     elif request.method == 'GET':
         transactions = CompanyBill.objects.filter(user=request.user)
-        serializer = CompanyBillSerializer(transactions, many=True)
-        return Response(serializer.data)
+        return list_response(request, transactions, CompanyBillSerializer)
 
 
 # Function to retrieve an individual Company Transaction
@@ -635,6 +673,7 @@ def company_transaction_detail(request, pk):
 # Function to create a Buyer Transaction
 @api_view(['POST', 'GET'])
 @permission_classes([IsAuthenticated])
+@etag_on_changes(Buyer)
 def create_buyer_transaction(request):
     if request.method == 'POST':
         data = request.data.copy()
@@ -647,8 +686,7 @@ def create_buyer_transaction(request):
 
     elif request.method == 'GET':
         transactions = Buyer.objects.filter(user=request.user)
-        serializer = BuyerSerializer(transactions, many=True)
-        return Response(serializer.data)
+        return list_response(request, transactions, BuyerSerializer)
     
 # Function to retrieve an individual Buyer Transaction
 @api_view(['GET', 'DELETE'])
@@ -692,6 +730,7 @@ def bank_list(request):
 # Function to create a Salary Transaction
 @api_view(['POST', 'GET'])
 @permission_classes([IsAuthenticated])
+@etag_on_changes(Salary)
 def create_salary_transaction(request):
     if request.method == 'POST':
         data = request.data.copy()
@@ -704,8 +743,7 @@ def create_salary_transaction(request):
     
     elif request.method == 'GET':
         transactions = Salary.objects.filter(user=request.user)
-        serializer = SalarySerializer(transactions, many=True)
-        return Response(serializer.data)
+        return list_response(request, transactions, SalarySerializer)
     
 # Function to retrieve an individual Salary Transaction
 @api_view(['GET', 'DELETE'])
@@ -727,6 +765,7 @@ def salary_transaction_detail(request, pk):
 # Function to create an Other Transaction
 @api_view(['POST', 'GET'])
 @permission_classes([IsAuthenticated])
+@etag_on_changes(Other, Partner)
 def create_other_transaction(request):
     if request.method == 'POST':
         data = request.data.copy()
@@ -739,8 +778,7 @@ def create_other_transaction(request):
     
     elif request.method == 'GET':
         transactions = Other.objects.filter(user=request.user)
-        serializer = OtherSerializer(transactions, many=True)
-        return Response(serializer.data)
+        return list_response(request, transactions, OtherSerializer, select_related=['partner'])
 
 # Keep the detail view the same
 @api_view(['GET', 'DELETE'])
@@ -775,11 +813,11 @@ def add_bankingdeposit(request):
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@etag_on_changes(Employee)
 def employee_list_create(request):
     if request.method == 'GET':
         employees = Employee.objects.filter(user=request.user)
-        serializer = EmployeeSerializer(employees, many=True)
-        return Response(serializer.data)
+        return list_response(request, employees, EmployeeSerializer)
     
     elif request.method == 'POST':
         serializer = EmployeeSerializer(data=request.data)
@@ -870,6 +908,7 @@ def get_invoices_by_gst(request, gst_number):
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@etag_on_changes(Setting)
 def settings_list_create(request):
     if request.method == 'GET':
         # Get settings for current user or create default if none exists
@@ -890,91 +929,73 @@ def settings_list_create(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def company_balance(request, buyer_gst):
-    try:
-        # Get invoices ordered by date
-        invoices = Invoice.objects.filter(buyer_gst=buyer_gst, user=request.user).order_by('invoice_date')
-        first_invoice = invoices.first()
-        
-        # Initialize response data
-        response_data = {
-            "buyer_gst": buyer_gst,
-            "buyer_name": first_invoice.buyer_name if first_invoice else "",
-            "currency": first_invoice.currency if first_invoice else "",
-            "invoices": []
-        }
-
-        # Process each invoice individually
-        for invoice in invoices:
-            # Get deposits for this specific invoice
-            deposits = CompanyBill.objects.filter(
-                invoice_id=invoice.invoice_number,
-                user=request.user
-            ).order_by('transaction_date')
-
-            # Calculate totals for this invoice
-            invoice_amount = invoice.total_with_gst or Decimal('0.00')
-            deposit_total = deposits.aggregate(
-                total=Sum('amount', output_field=DecimalField(max_digits=20, decimal_places=2))
-            )['total'] or Decimal('0.00')
-            
-            remaining_balance = invoice_amount - deposit_total
-
-            # Build transaction history with running balances for this invoice
-            transactions = []
-            running_balance = invoice_amount  # Start with full invoice amount
-            
-            # Add the invoice itself as first transaction
+    """
+    Each of a buyer's invoices with its deposits and the balance left after each one.
+    Two queries whatever the number of invoices: the invoices, then every
+    deposit against them with its running total computed by the database.
+    """
+    invoices = list(
+        Invoice.objects.filter(buyer_gst=buyer_gst, user=request.user).order_by('invoice_date')
+        .values('pk', 'invoice_number', 'invoice_date', 'buyer_name', 'currency', 'total_with_gst')
+    )
+    deposits = defaultdict(list)
+    rows = (
+        CompanyBill.objects.filter(user=request.user, linked_invoice__in=[invoice['pk'] for invoice in invoices])
+        .annotate(deposited=Window(Sum('amount'), partition_by=[F('linked_invoice')],
+                                   order_by=[F('transaction_date').asc(), F('pk').asc()]))
+        .order_by('linked_invoice', 'transaction_date', 'pk')
+        .values_list('linked_invoice', 'transaction_date', 'notice', 'amount', 'deposited')
+    )
+    for invoice_pk, *deposit in rows:
+        deposits[invoice_pk].append(deposit)
+
+    first_invoice = invoices[0] if invoices else None
+    response_data = {
+        "buyer_gst": buyer_gst,
+        "buyer_name": first_invoice['buyer_name'] if first_invoice else "",
+        "currency": first_invoice['currency'] if first_invoice else "",
+        "invoices": []
+    }
+    total_invoice_amount = total_deposit_amount = 0.0
+    for invoice in invoices:
+        invoice_amount = invoice['total_with_gst'] or 0.0
+        # The invoice itself opens the history at its full amount
+        transactions = [{
+            'date': invoice['invoice_date'].isoformat(),
+            'type': 'invoice',
+            'description': invoice['invoice_number'],
+            'debit': float(invoice_amount),
+            'credit': None,
+            'balance': float(invoice_amount)
+        }]
+        deposit_total = 0.0
+        for transaction_date, notice, amount, deposited in deposits[invoice['pk']]:
+            deposit_total = float(deposited or 0)
             transactions.append({
-                'date': invoice.invoice_date.isoformat(),
-                'type': 'invoice',
-                'description': invoice.invoice_number,
-                'debit': float(invoice_amount),
-                'credit': None,
-                'balance': float(running_balance)
+                'date': transaction_date.isoformat() if transaction_date else None,
+                'type': 'deposit',
+                'description': notice or "Deposit",
+                'debit': None,
+                'credit': float(amount or 0),
+                'balance': invoice_amount - deposit_total
             })
+        response_data['invoices'].append({
+            'invoice_number': invoice['invoice_number'],
+            'invoice_date': invoice['invoice_date'].isoformat(),
+            'invoice_amount': float(invoice_amount),
+            'deposit_total': deposit_total,
+            'remaining_balance': invoice_amount - deposit_total,
+            'transactions': transactions
+        })
+        total_invoice_amount += invoice_amount
+        total_deposit_amount += deposit_total
 
-            # Add each deposit
-            for deposit in deposits:
-                running_balance -= deposit.amount
-                transactions.append({
-                    'date': deposit.transaction_date.isoformat(),
-                    'type': 'deposit',
-                    'description': deposit.notice or "Deposit",
-                    'debit': None,
-                    'credit': float(deposit.amount),
-                    'balance': float(running_balance)
-                })
-
-            # Add invoice data to response
-            response_data['invoices'].append({
-                'invoice_number': invoice.invoice_number,
-                'invoice_date': invoice.invoice_date.isoformat(),
-                'invoice_amount': float(invoice_amount),
-                'deposit_total': float(deposit_total),
-                'remaining_balance': float(remaining_balance),
-                'transactions': transactions
-            })
-
-        # Calculate overall totals (optional - remove if not needed)
-        if invoices:
-            response_data['total_invoice_amount'] = float(invoices.aggregate(
-                total=Sum('total_with_gst', output_field=DecimalField(max_digits=20, decimal_places=2))
-            )['total'] or Decimal('0.00'))
-            
-            all_deposits = CompanyBill.objects.filter(
-                invoice_id__in=invoices.values_list('invoice_number', flat=True),
-                user=request.user
-            )
-            response_data['total_deposit_amount'] = float(all_deposits.aggregate(
-                total=Sum('amount', output_field=DecimalField(max_digits=20, decimal_places=2))
-            )['total'] or Decimal('0.00'))
-            
-            response_data['total_remaining_balance'] = response_data['total_invoice_amount'] - response_data['total_deposit_amount']
-
-        return Response(response_data)
+    if invoices:
+        response_data['total_invoice_amount'] = total_invoice_amount
+        response_data['total_deposit_amount'] = total_deposit_amount
+        response_data['total_remaining_balance'] = total_invoice_amount - total_deposit_amount
 
-    except Exception as e:
-        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
+    return Response(response_data)
     
 # @api_view(['POST'])
 # @permission_classes([IsAuthenticated])
@@ -1031,8 +1052,7 @@ def company_balance(request, buyer_gst):
 def bank_account_list_create(request):
     if request.method == 'GET':
         accounts = BankAccount.objects.filter(user=request.user, is_deleted=False)
-        serializer = BankAccountSerializer(accounts, many=True)
-        return Response(serializer.data)
+        return list_response(request, accounts, BankAccountSerializer)
 
     elif request.method == 'POST':
         data = request.data.copy()
@@ -1082,7 +1102,7 @@ def restore_bank_account(request, pk):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def soft_deleted_bank_accounts(request):
-    accounts = BankAccount.objects.filter(is_deleted=True)
+    accounts = BankAccount.objects.filter(user=request.user, is_deleted=True)
     serializer = BankAccountSerializer(accounts, many=True)
     return Response(serializer.data)
 
@@ -1107,39 +1127,133 @@ def soft_deleted_bank_account_detail(request, pk):
         return Response({"error": "Soft-deleted bank account not found."}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def bank_statements(request, pk):
+    """
+    GET: the account's uploaded statements with their reconciliation state.
+    POST (multipart): upload a CSV or OFX statement; its lines are matched
+    to the transactions of the account's bank and stored as suggestions.
+    """
+    try:
+        account = BankAccount.objects.get(pk=pk, user=request.user, is_deleted=False)
+    except BankAccount.DoesNotExist:
+        return Response({"error": "Bank account not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'GET':
+        statements = account.statements.order_by('-date_to', '-pk')
+        return Response([reconcile.summary(statement) for statement in statements])
+
+    upload = StatementUploadSerializer(data=request.data)
+    upload.is_valid(raise_exception=True)
+    statement_file = upload.validated_data['file']
+    statement = reconcile.import_statement(account, statement_file.name, statement_file.file,
+                                           upload.validated_data['window'])
+    return Response(reconcile.summary(statement), status=status.HTTP_201_CREATED)
+
+
+def _statement(request, pk):
+    return BankStatement.objects.filter(pk=pk, user=request.user).select_related('bank_account').first()
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+def statement_lines(request, pk):
+    """A statement's lines in file order; ?status=unmatched|suggested|confirmed|ignored to review one kind"""
+    statement = _statement(request, pk)
+    if statement is None:
+        return Response({"error": "Statement not found."}, status=status.HTTP_404_NOT_FOUND)
+    lines = statement.lines.order_by('pk')
+    line_status = request.query_params.get('status')
+    if line_status:
+        if line_status not in dict(StatementLine.STATUS_CHOICES):
+            return Response({"status": f"Unknown status {line_status!r}"}, status=status.HTTP_400_BAD_REQUEST)
+        lines = lines.filter(status=line_status)
+    return list_response(request, lines, StatementLineSerializer)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def confirm_statement(request, pk):
+    """Accept every suggested match of a statement"""
+    statement = _statement(request, pk)
+    if statement is None:
+        return Response({"error": "Statement not found."}, status=status.HTTP_404_NOT_FOUND)
+    confirmed = reconcile.confirm_suggestions(statement)
+    return Response({'confirmed': confirmed, **reconcile.summary(statement)})
+
+
+@api_view(['PATCH'])
+@permission_classes([IsAuthenticated])
+def review_statement_line(request, pk):
+    """Confirm, rematch, ignore or unmatch one statement line"""
+    try:
+        line = StatementLine.objects.get(pk=pk, user=request.user)
+    except StatementLine.DoesNotExist:
+        return Response({"error": "Statement line not found."}, status=status.HTTP_404_NOT_FOUND)
+    serializer = StatementLineReviewSerializer(line, data=request.data)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return Response(StatementLineSerializer(line).data)
+
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@etag_on_changes(Invoice)
 def grouped_invoices(request):
-    invoices = Invoice.objects.filter(user=request.user).order_by(
-        'buyer_name', 
-        'buyer_address', 
-        'buyer_gst',
-        '-invoice_date'
-    )
-    groups = defaultdict(list)
-    for invoice in invoices:
-        key = (invoice.buyer_name, invoice.buyer_address, invoice.buyer_gst)
-        groups[key].append(invoice)
+    """
+    Every client with all of its invoices nested, for the pages that still
+    want the whole tree; /api/clients/ is the paginated, aggregate-only view.
+    """
+    clients = Client.objects.filter(user=request.user).order_by('name', 'address', 'gst').prefetch_related(
+        Prefetch('invoices', queryset=Invoice.objects.order_by('-invoice_date')))
     result = []
-    for idx, (key, invoice_list) in enumerate(groups.items(), start=1):
+    for idx, client in enumerate(clients, start=1):
+        invoice_list = list(client.invoices.all())
         result.append({
             'serial_number': idx,
-            'buyer_name': key[0],
-            'buyer_address': key[1],
-            'buyer_gst': key[2],
+            'buyer_name': client.name,
+            'buyer_address': client.address,
+            'buyer_gst': invoice_list[0].buyer_gst if invoice_list else client.gst,
             'invoices': InvoiceSerializer(invoice_list, many=True).data
         })
     return Response(result)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@etag_on_changes(Client)
+def client_list(request):
+    """
+    The user's clients with invoice count, total billed (INR) and last
+    invoice date, without their invoices. Supports ?fields= and
+    ?cursor= / ?page_size= like the other lists.
+    """
+    clients = Client.objects.filter(user=request.user)
+    return list_response(request, clients, ClientSerializer)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@etag_on_changes(Invoice)
+def client_invoices(request, pk):
+    """One client's invoices, newest first; paginated like /api/invoices/"""
+    try:
+        client = Client.objects.get(pk=pk, user=request.user)
+    except Client.DoesNotExist:
+        return Response({'error': 'Client not found'}, status=status.HTTP_404_NOT_FOUND)
+    invoices = Invoice.objects.filter(user=request.user, client=client)
+    return list_response(request, invoices, InvoiceSerializer, ordering='-pk')
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@etag_on_changes(CashEntry)
 def cash_entry_collection(request):
     if request.method == 'GET':
         entries = CashEntry.objects.filter(user=request.user, is_deleted=False)
-        serializer = CashEntrySerializer(entries, many=True)
-        return Response(serializer.data)
+        return list_response(request, entries, CashEntrySerializer)
     elif request.method == 'POST':
         serializer = CashEntrySerializer(data=request.data)
         if serializer.is_valid():
@@ -1191,7 +1305,7 @@ def restore_cash_entry(request, pk):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def soft_deleted_cash_entries(request):
-    entries = CashEntry.objects.filter(is_deleted=True)
+    entries = CashEntry.objects.filter(user=request.user, is_deleted=True)
     serializer = CashEntrySerializer(entries, many=True)
     return Response(serializer.data)
 
@@ -1226,4 +1340,265 @@ def partner_detail(request, pk):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     elif request.method == 'DELETE':
         partner.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def global_search(request):
+    """
+    Ranked full-text search over the user's invoices, transactions,
+    employees and the shared partners.
+    GET /api/search/?q=acme consult&kind=invoice,other&date_from=2025-03-01&page=1&page_size=20
+    """
+    params = SearchQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    query = params.validated_data
+    page, page_size = query['page'], query['page_size']
+
+    # One extra row tells whether there is a next page without counting every match
+    results = search.search(
+        request.user, query['q'], kinds=query.get('kind', ()),
+        date_from=query.get('date_from'), date_to=query.get('date_to'),
+        limit=page_size + 1, offset=(page - 1) * page_size,
+    )
+    url = request.build_absolute_uri()
+    return Response({
+        'next': replace_query_param(url, 'page', page + 1) if len(results) > page_size else None,
+        'previous': replace_query_param(url, 'page', page - 1) if page > 1 else None,
+        'results': results[:page_size],
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_data(request, dataset, export_format):
+    """
+    Streamed full dump of invoices or one banking transaction type.
+    GET /api/export/<invoices|company|buyer|salary|other>/<csv|ndjson|xlsx>/?year=2025/2026&date_from=&date_to=
+    """
+    if dataset not in exports.DATASETS or export_format not in exports.FORMATS:
+        raise Http404
+    params = ExportFilterSerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+
+    content_type, content = exports.export(dataset, export_format, request.user, **params.validated_data)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    label = params.validated_data.get('year', '').replace('/', '-')
+    filename = '-'.join(filter(None, [dataset, label])) + '.' + export_format
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def import_jobs(request):
+    """
+    GET: the user's imports, newest first.
+    POST (multipart, dataset and file): import a CSV or XLSX file of invoices
+    or one banking transaction type in the background; poll the job returned.
+    Imports are not durable: one cut short by a server restart is not
+    resumed, but reported as failed after ten minutes without progress,
+    with the rows imported so far kept.
+    """
+    if request.method == 'GET':
+        ImportJob.objects.fail_stale(request.user)
+        return list_response(request, ImportJob.objects.filter(user=request.user).order_by('-pk'),
+                             ImportJobSerializer, ordering='-pk')
+
+    upload = ImportUploadSerializer(data=request.data)
+    upload.is_valid(raise_exception=True)
+    import_file = upload.validated_data['file']
+    imports.import_format(import_file.name)
+    job = ImportJob.objects.create(user=request.user, dataset=upload.validated_data['dataset'],
+                                   filename=import_file.name, file=import_file)
+    imports.start(job)
+    return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def import_job_detail(request, pk):
+    """An import's progress: rows read, imported and failed so far"""
+    ImportJob.objects.fail_stale(request.user)
+    job = ImportJob.objects.filter(pk=pk, user=request.user).first()
+    if job is None:
+        return Response({"error": "Import not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(ImportJobSerializer(job).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def import_job_errors(request, pk):
+    """The rows an import left out and why, in file order"""
+    job = ImportJob.objects.filter(pk=pk, user=request.user).first()
+    if job is None:
+        return Response({"error": "Import not found."}, status=status.HTTP_404_NOT_FOUND)
+    return list_response(request, job.row_errors.order_by('pk'), ImportRowErrorSerializer)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard_summary(request):
+    """
+    Counters and totals for the dashboard, cached per user until their next write.
+    GET /api/dashboard/summary/
+    """
+    return Response(dashboard.cached_summary(request.user))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def receivables_aging(request):
+    """
+    Open invoice amounts per client and currency, bucketed by age.
+    GET /api/reports/receivables-aging/?as_of=2025-12-31&buckets=30,60,90&page=1&page_size=50
+    """
+    params = AgingQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    query = params.validated_data
+    page, page_size = query['page'], query['page_size']
+    labels = reports.aging_labels(query['buckets'])
+
+    # One extra row tells whether there is a next page
+    rows = reports.receivables_aging(request.user, query['as_of'], query['buckets'],
+                                     limit=page_size + 1, offset=(page - 1) * page_size)
+    width = len(reports.AGING_COLUMNS)
+    url = request.build_absolute_uri()
+    return Response({
+        'as_of': query['as_of'].isoformat(),
+        'buckets': labels,
+        'next': replace_query_param(url, 'page', page + 1) if len(rows) > page_size else None,
+        'previous': replace_query_param(url, 'page', page - 1) if page > 1 else None,
+        'results': [
+            {**dict(zip(reports.AGING_COLUMNS, row[:width])), 'buckets': dict(zip(labels, row[width:]))}
+            for row in rows[:page_size]
+        ],
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def receivables_aging_csv(request):
+    """
+    The whole receivables aging report as CSV, one column per bucket.
+    GET /api/reports/receivables-aging/csv/?as_of=2025-12-31&buckets=30,60,90
+    """
+    params = AgingQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    query = params.validated_data
+    rows = reports.receivables_aging(request.user, query['as_of'], query['buckets'])
+    columns = reports.AGING_COLUMNS + reports.aging_labels(query['buckets'])
+    row_chunks = (rows[start:start + exports.CHUNK_SIZE] for start in range(0, len(rows), exports.CHUNK_SIZE))
+    response = StreamingHttpResponse(exports.csv_stream(columns, row_chunks), content_type=exports.FORMATS['csv'][1])
+    response['Content-Disposition'] = f'attachment; filename="receivables-aging-{query["as_of"].isoformat()}.csv"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def balance_sheet(request):
+    """
+    Every section of the balance sheet as of a date, already totalled.
+    GET /api/reports/balance-sheet/?as_of=2025-12-31
+    """
+    params = ReportDateSerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    return Response(reports.balance_sheet(request.user, params.validated_data['as_of']))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def income_expenditure(request):
+    """
+    Income and expenditure per month, quarter or financial year.
+    GET /api/reports/income-expenditure/?year=2025/2026&period=quarter
+    GET /api/reports/income-expenditure/?date_from=2021-04-01&date_to=2026-03-31&period=year
+    """
+    params = StatementQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    query = params.validated_data
+    return Response(dashboard.cached_for_user(request.user, 'income-expenditure', reports.income_expenditure,
+                                              query['date_from'], query['date_to'], query['period']))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def ledger_balances(request):
+    """
+    Debits, credits and balance of every journal account and party as of a date.
+    GET /api/reports/ledger/?as_of=2025-12-31
+    """
+    params = ReportDateSerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    as_of = params.validated_data['as_of']
+    accounts = ledger.balances(request.user, as_of)
+    return Response({
+        'as_of': as_of.isoformat(),
+        'accounts': [
+            {'account': account, 'party': party, 'debit': debit, 'credit': credit, 'balance': debit - credit}
+            for (account, party), (debit, credit) in sorted(accounts.items())
+        ],
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def trial_balance(request):
+    """
+    Journal account totals as of a date; ?account=Bank: for bank balances.
+    GET /api/reports/trial-balance/?as_of=2025-12-31&account=Bank:
+    """
+    params = TrialBalanceQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    query = params.validated_data
+    return Response(reports.trial_balance(request.user, query['as_of'], query.get('account')))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def account_ledger(request):
+    """
+    One journal account's lines with a running balance.
+    GET /api/reports/account-ledger/?account=Bank:HDFC&year=2025/2026
+    """
+    params = AccountLedgerQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    query = params.validated_data
+    return Response(reports.account_ledger(request.user, query['account'], query['date_from'], query['date_to']))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cash_book(request):
+    """
+    Cash receipts and payments of every source with a running balance.
+    GET /api/reports/cash-book/?from=2025-04-01&to=2026-03-31&page_size=100
+    """
+    params = CashBookQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    query = params.validated_data
+    # The opening and closing balances stay the same from page to page until the next write
+    balances = dashboard.cached_for_user(request.user, 'cash-balances', reports.cash_balances,
+                                         query['date_from'], query['date_to'])
+    report, cursor = reports.cash_book(request.user, query['date_from'], query['date_to'],
+                                       query.get('cursor'), query['page_size'], balances)
+    report['next'] = next_link(request, cursor)
+    return Response(report)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def transactions(request):
+    """
+    Every company payment, buyer payment, salary, other transaction and
+    cash entry in one feed, newest first, a page at a time.
+    GET /api/transactions/?type=buyer,salary&method=Banking&bank=HDFC&year=2025/2026
+    """
+    params = TransactionFeedQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    query = params.validated_data
+    page, position = feed.transactions(
+        request.user, query.get('type') or feed.TYPES, query.get('bank'), query.get('method'),
+        query.get('date_from'), query.get('date_to'), query.get('cursor'), query['page_size'])
+    return Response({'next': next_link(request, position), 'results': page})
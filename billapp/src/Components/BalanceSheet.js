@@ -3,16 +3,11 @@ import './style/balancesheet.css';
 import jsPDF from 'jspdf';
 import html2canvas from 'html2canvas';
 
-const API_URL = "http://localhost:8000/api/banking/other/";
-const SALARY_API_URL = "http://localhost:8000/api/banking/salary/";
-const BUYER_API_URL = "http://localhost:8000/api/banking/buyer/";
-const INVOICE_API_URL = "http://localhost:8000/api/invoices/";
-const COMPANY_API_URL = "http://localhost:8000/api/banking/company/";
+const BALANCE_SHEET_API_URL = "http://localhost:8000/api/reports/balance-sheet/";
 
 const BalanceSheet = () => {
   const [capital, setCapital] = useState([]);
   const [fixedAssets, setFixedAssets] = useState([]);
-  const [loan, setLoan] = useState([]);
   const [loanCredit, setLoanCredit] = useState([]);
   const [loanDebit, setLoanDebit] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -20,17 +15,12 @@ const BalanceSheet = () => {
   const [salaryTotal, setSalaryTotal] = useState(0);
   const [buyer, setBuyer] = useState([]);
   const [buyerTotal, setBuyerTotal] = useState(0);
-  // New state for custom transaction types
-  const [customTypes, setCustomTypes] = useState({});
+  // Custom transaction types, keyed by type
   const [customTypesCredit, setCustomTypesCredit] = useState({});
   const [customTypesDebit, setCustomTypesDebit] = useState({});
-  // New state for invoices and company
-  const [invoiceDebits, setInvoiceDebits] = useState([]);
+  // Advances received (credit) and amounts still owed by clients (debit)
   const [companyCredit, setCompanyCredit] = useState([]);
-  const [companyDebit, setCompanyDebit] = useState([]);
-  // New: store invoice totals by company
-  const [invoiceTotalsByCompany, setInvoiceTotalsByCompany] = useState({});
-  const [companyAmounts, setCompanyAmounts] = useState({});
+  const [invoiceDebitsRemaining, setInvoiceDebitsRemaining] = useState([]);
   const sheetRef = React.useRef();
   const [countries, setCountries] = useState([]);
   const [selectedCountry, setSelectedCountry] = useState({
@@ -42,348 +32,42 @@ const BalanceSheet = () => {
   const [states, setStates] = useState([]);
   const [selectedState, setSelectedState] = useState("");
 
+  // Every section comes grouped and totalled from the server in one request
   useEffect(() => {
-    const fetchData = async () => {
+    const fetchBalanceSheet = async () => {
       try {
         const token = localStorage.getItem("access_token");
-        const response = await fetch(API_URL, {
+        const response = await fetch(BALANCE_SHEET_API_URL, {
           headers: {
             Authorization: `Bearer ${token}`,
             "Content-Type": "application/json"
           }
         });
+        if (!response.ok) throw new Error(`Balance sheet request failed: ${response.status}`);
         const data = await response.json();
-        console.log("API data:", data);
-
-        // Use data directly (should be an array)
-        const capitalData = {};
-        const fixedAssetsData = {};
-        const loanData = {};
-        const loanCreditData = {};
-        const loanDebitData = {};
-        // New: Track custom transaction types
-        const customTypesData = {};
-        const customTypesCreditData = {};
-        const customTypesDebitData = {};
-
-        // New: Track total credit and debit for each loan
-        const loanTotals = {};
-        // New: Track total credit and debit for each custom type
-        const customTypesTotals = {};
-        
-        data.forEach(item => {
-          // Capital section: only "partner"
-          if (item.other_type && item.other_type.toLowerCase() === "partner") {
-            const name = item.other_notice;
-            const amount = Math.abs(parseFloat(item.other_amount)); // always positive
-            if (!capitalData[name]) capitalData[name] = 0;
-            if (item.transaction_type === "credit") {
-              capitalData[name] += amount;
-            } else if (item.transaction_type === "debit") {
-              capitalData[name] -= amount;
-            }
-          }
-          // Loan section: only "loan"
-          else if (item.other_type && item.other_type.toLowerCase() === "loan") {
-            const name = item.other_notice;
-            const amount = Math.abs(parseFloat(item.other_amount)); // always positive
-            if (!loanData[name]) loanData[name] = 0;
-            if (!loanCreditData[name]) loanCreditData[name] = 0;
-            if (!loanDebitData[name]) loanDebitData[name] = 0;
-            if (item.transaction_type === "credit") {
-              loanData[name] += amount;
-              loanCreditData[name] += amount;
-            } else if (item.transaction_type === "debit") {
-              loanData[name] -= amount;
-              loanDebitData[name] += amount;
-            }
-            // Update loan totals
-            if (!loanTotals[name]) loanTotals[name] = { credit: 0, debit: 0 };
-            if (item.transaction_type === "credit") {
-              loanTotals[name].credit += amount;
-            } else if (item.transaction_type === "debit") {
-              loanTotals[name].debit += amount;
-            }
-          }
-          // Fixed Assets section: only "fixed assets"
-          else if (item.other_type && item.other_type.toLowerCase() === "fixed assets") {
-            const asset = item.other_notice;
-            const amount = Math.abs(parseFloat(item.other_amount)); // always positive
-            if (!fixedAssetsData[asset]) fixedAssetsData[asset] = 0;
-            fixedAssetsData[asset] += amount;
-          }
-          // Custom transaction types: any other_type not predefined
-          else if (item.other_type) {
-            const customType = item.other_type;
-            const name = item.other_notice;
-            const amount = Math.abs(parseFloat(item.other_amount)); // always positive
-            
-            // Initialize data structures for this custom type
-            if (!customTypesData[customType]) customTypesData[customType] = {};
-            if (!customTypesCreditData[customType]) customTypesCreditData[customType] = {};
-            if (!customTypesDebitData[customType]) customTypesDebitData[customType] = {};
-            if (!customTypesTotals[customType]) customTypesTotals[customType] = {};
-            
-            if (!customTypesData[customType][name]) customTypesData[customType][name] = 0;
-            if (!customTypesCreditData[customType][name]) customTypesCreditData[customType][name] = 0;
-            if (!customTypesDebitData[customType][name]) customTypesDebitData[customType][name] = 0;
-            if (!customTypesTotals[customType][name]) customTypesTotals[customType][name] = { credit: 0, debit: 0 };
-            
-            if (item.transaction_type === "credit") {
-              customTypesData[customType][name] += amount;
-              customTypesCreditData[customType][name] += amount;
-              customTypesTotals[customType][name].credit += amount;
-            } else if (item.transaction_type === "debit") {
-              customTypesData[customType][name] -= amount;
-              customTypesDebitData[customType][name] += amount;
-              customTypesTotals[customType][name].debit += amount;
-            }
-          }
-        });
-
-        // Prepare filtered lists for display
-        const filteredLoanCredit = Object.entries(loanTotals)
-          .filter(([_, v]) => v.credit - v.debit > 0)
-          .map(([name, v]) => [name, v.credit - v.debit]);
-        const filteredLoanDebit = Object.entries(loanTotals)
-          .filter(([_, v]) => v.debit - v.credit > 0)
-          .map(([name, v]) => [name, v.debit - v.credit]);
-        setLoanCredit(filteredLoanCredit);
-        setLoanDebit(filteredLoanDebit);
-
-        // Process custom types for display
-        const processedCustomTypes = {};
-        const processedCustomTypesCredit = {};
-        const processedCustomTypesDebit = {};
-        
-        Object.keys(customTypesTotals).forEach(customType => {
-          // Credit side: net positive balances (only show if balance > 0)
-          const creditEntries = Object.entries(customTypesTotals[customType])
-            .filter(([_, v]) => v.credit - v.debit > 0)
-            .map(([name, v]) => [name, v.credit - v.debit]);
-          
-          // Debit side: only show when credit side is 0 or negative for that person
-          const debitEntries = Object.entries(customTypesTotals[customType])
-            .filter(([name, v]) => {
-              const netBalance = v.credit - v.debit;
-              // Show on debit side only if net balance is 0 or negative
-              return netBalance <= 0 && v.debit > 0;
-            })
-            .map(([name, v]) => [name, Math.abs(v.credit - v.debit)]); // Show absolute value of negative balance
-          
-          if (creditEntries.length > 0) {
-            processedCustomTypesCredit[customType] = creditEntries;
-          }
-          if (debitEntries.length > 0) {
-            processedCustomTypesDebit[customType] = debitEntries;
-          }
-        });
-        
-        setCustomTypesCredit(processedCustomTypesCredit);
-        setCustomTypesDebit(processedCustomTypesDebit);
-
-        setCapital(Object.entries(capitalData));
-        setLoan(Object.entries(loanData));
-        setFixedAssets(Object.entries(fixedAssetsData));
+        setCapital(data.capital);
+        setLoanCredit(data.loan_credit);
+        setLoanDebit(data.loan_debit);
+        setFixedAssets(data.fixed_assets);
+        setCustomTypesCredit(data.custom_credit);
+        setCustomTypesDebit(data.custom_debit);
+        setSalary(data.salary);
+        setSalaryTotal(data.totals.salary);
+        setBuyer(data.buyer);
+        setBuyerTotal(data.totals.buyer);
+        setCompanyCredit(data.sundry_creditors);
+        setInvoiceDebitsRemaining(data.sundry_debtors);
       } catch (error) {
         console.error("Error fetching balance sheet data:", error);
-        setCapital([]);
-        setFixedAssets([]);
       } finally {
         setLoading(false);
       }
     };
-
-    fetchData();
-  }, []);
-
-  // Fetch salary data
-  useEffect(() => {
-    const fetchSalary = async () => {
-      try {
-        const token = localStorage.getItem("access_token");
-        const response = await fetch(SALARY_API_URL, {
-          headers: {
-            Authorization: `Bearer ${token}`,
-            "Content-Type": "application/json"
-          }
-        });
-        const data = await response.json();
-        // Group and sum by salary_name
-        const salaryMap = {};
-        data.forEach(item => {
-          const name = item.salary_name;
-          const amount = parseFloat(item.salary_amount);
-          if (!salaryMap[name]) salaryMap[name] = 0;
-          salaryMap[name] += amount;
-        });
-        const salaryArr = Object.entries(salaryMap);
-        setSalary(salaryArr);
-        setSalaryTotal(salaryArr.reduce((sum, [, amt]) => sum + amt, 0));
-      } catch (error) {
-        setSalary([]);
-        setSalaryTotal(0);
-      }
-    };
-    fetchSalary();
-  }, []);
-
-  // Fetch buyer data
-  useEffect(() => {
-    const fetchBuyer = async () => {
-      try {
-        const token = localStorage.getItem("access_token");
-        const response = await fetch(BUYER_API_URL, {
-          headers: {
-            Authorization: `Bearer ${token}`,
-            "Content-Type": "application/json"
-          }
-        });
-        const data = await response.json();
-        // Group and sum by buyer_name
-        const buyerMap = {};
-        data.forEach(item => {
-          const name = item.buyer_name;
-          const amount = parseFloat(item.amount);
-          if (!buyerMap[name]) buyerMap[name] = 0;
-          buyerMap[name] += amount;
-        });
-        const buyerArr = Object.entries(buyerMap);
-        setBuyer(buyerArr);
-        setBuyerTotal(buyerArr.reduce((sum, [, amt]) => sum + amt, 0));
-      } catch (error) {
-        setBuyer([]);
-        setBuyerTotal(0);
-      }
-    };
-    fetchBuyer();
-  }, []);
-
-  // Fetch invoice data for debit side
-  useEffect(() => {
-    const fetchInvoices = async () => {
-      try {
-        const token = localStorage.getItem("access_token");
-        const response = await fetch(INVOICE_API_URL, {
-          headers: {
-            Authorization: `Bearer ${token}`,
-            "Content-Type": "application/json"
-          }
-        });
-        const data = await response.json();
-        
-        // Group invoices by buyer_name, buyer_address, and buyer_gst
-        const groupedInvoices = {};
-        
-        data.forEach(item => {
-          if (item.buyer_name && item.base_amount > 0) {
-            // Create a unique key based on name, address, and GST
-            const name = (item.buyer_name || "").trim().toLowerCase();
-            const address = (item.buyer_address || "").trim().toLowerCase();
-            const gst = (item.buyer_gst || "").trim().toLowerCase();
-            
-            // Create composite key
-            const key = `${name}__${address}__${gst}`;
-            
-            if (!groupedInvoices[key]) {
-              groupedInvoices[key] = {
-                buyer_name: item.buyer_name,
-                buyer_address: item.buyer_address,
-                buyer_gst: item.buyer_gst,
-                total_amount: 0
-              };
-            }
-            
-            groupedInvoices[key].total_amount += parseFloat(item.base_amount);
-          }
-        });
-        
-        // Convert grouped data to array format for display
-        const groupedArray = Object.values(groupedInvoices).map(item => {
-          // Remove GST part if present in buyer_name
-          let displayName = item.buyer_name.split(' GST')[0].trim();
-          return [displayName, item.total_amount];
-        });
-        
-        setInvoiceDebits(groupedArray);
-        
-        // Aggregate invoice totals by the grouped key for company comparison
-        const totals = {};
-        Object.values(groupedInvoices).forEach(item => {
-          const name = item.buyer_name;
-          if (!totals[name]) totals[name] = 0;
-          totals[name] += item.total_amount;
-        });
-        setInvoiceTotalsByCompany(totals);
-      } catch (error) {
-        setInvoiceDebits([]);
-        setInvoiceTotalsByCompany({});
-      }
-    };
-    fetchInvoices();
-  }, []);
-
-  // Fetch company data for credit and debit side
-  useEffect(() => {
-    const fetchCompany = async () => {
-      try {
-        const token = localStorage.getItem("access_token");
-        const response = await fetch(COMPANY_API_URL, {
-          headers: {
-            Authorization: `Bearer ${token}`,
-            "Content-Type": "application/json"
-          }
-        });
-        const data = await response.json();
-        // Aggregate company amounts by company_name
-        const amounts = {};
-        data.forEach(item => {
-          if (item.company_name) {
-            const amt = parseFloat(item.amount);
-            if (!amounts[item.company_name]) amounts[item.company_name] = 0;
-            amounts[item.company_name] += amt;
-          }
-        });
-        setCompanyAmounts(amounts);
-      } catch (error) {
-        setCompanyAmounts({});
-      }
-    };
-    fetchCompany();
+    fetchBalanceSheet();
   }, []);
 
-  // Calculate company credit and debit based on invoice totals
-  useEffect(() => {
-    // Only run if both invoiceTotalsByCompany and companyAmounts are loaded
-    if (Object.keys(invoiceTotalsByCompany).length === 0 && Object.keys(companyAmounts).length === 0) return;
-    const credit = [];
-    const debit = [];
-    Object.entries(companyAmounts).forEach(([company, amount]) => {
-      const invoiceTotal = invoiceTotalsByCompany[company] || 0;
-      const diff = amount - invoiceTotal;
-      if (diff > 0) {
-        credit.push([company, diff]);
-      } else if (diff < 0) {
-        debit.push([company, Math.abs(diff)]);
-      }
-      // If diff === 0, show nothing
-    });
-    setCompanyCredit(credit);
-    setCompanyDebit(debit);
-  }, [invoiceTotalsByCompany, companyAmounts]);
-
-  // Calculate remaining invoice debits (invoice total - company amount)
-  const invoiceDebitsRemaining = invoiceDebits
-    .map(([buyerName, amount]) => {
-      const paid = companyAmounts[buyerName] || 0;
-      const remaining = amount - paid;
-      return [buyerName, remaining];
-    })
-    .filter(([_, remaining]) => remaining > 0);
-
   // Calculate totals
   const capitalTotal = capital.reduce((sum, [, amt]) => sum + amt, 0);
-  const loanTotal = loan.reduce((sum, [, amt]) => sum + amt, 0);
   const loanCreditTotal = loanCredit.reduce((sum, [, amt]) => sum + amt, 0);
   const loanDebitTotal = loanDebit.reduce((sum, [, amt]) => sum + amt, 0);
   const fixedAssetsTotal = fixedAssets.reduce((sum, [, amt]) => sum + amt, 0);
@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useCallback } from "react";
+import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import Header from "./Header";
 import Newscustomerchart from "./Newscustomerchart";
@@ -12,94 +12,49 @@ const Dashboard = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
 
-  //fot tottal client 
+  //counters from one cached summary; a 401 means the token is no longer valid
   useEffect(() => {
-    const fetchClientCount = async () => {
+    const fetchSummary = async () => {
       const token = localStorage.getItem("access_token");
-      try {
-        const response = await fetch("http://localhost:8000/api/grouped-invoices/", {
-          headers: {
-            'Authorization': `Bearer ${token}`,
-            'Content-Type': 'application/json'
-          }
-        });
-
-        if (!response.ok) {
-          if (response.status === 401) {
-            navigate('/login');
-          }
-          throw new Error("Failed to fetch client data");
-        }
-
-        const data = await response.json();
-        setClientCount(data.length); // Total number of invoices (clients)
-      } catch (err) {
-        console.error(err);
-        setError("Error fetching client count");
+      if (!token) {
+        navigate("/login");
+        return;
       }
-    };
-
-    fetchClientCount();
-  }, [navigate]);
 
-  //for total bills
-  useEffect(() => {
-    const fetchAllInvoices = async () => {
       try {
-        const response = await fetch("http://localhost:8000/api/grouped-invoices/", {
+        const response = await fetch("http://localhost:8000/api/dashboard/summary/", {
           headers: {
-            Authorization: `Bearer ${localStorage.getItem("access_token")}`,
+            Authorization: `Bearer ${token}`,
+            "Content-Type": "application/json",
           },
         });
 
+        if (response.status === 401) {
+          throw new Error("Unauthorized");
+        }
         if (!response.ok) {
           throw new Error(`HTTP error! Status: ${response.status}`);
         }
 
-        const data = await response.json(); // full client list with invoices
-
-        // Count total bills from all clients
-        let count = 0;
-        data.forEach(client => {
-          count += client.invoices?.length || 0;
-        });
-
-        setTotalBillCount(count);
+        const summary = await response.json();
+        setClientCount(summary.clients);
+        setTotalBillCount(summary.invoice_count);
+        setTotalEmployees(summary.employees);
+        setLoading(false);
       } catch (err) {
-        console.error("Error fetching invoice data:", err);
-        setTotalBillCount(0);
-      }
-    };
-
-    fetchAllInvoices();
-  }, []);
-
-  //count total employee
-  useEffect(() => {
-    const fetchEmployeeCount = async () => {
-      try {
-        const response = await fetch("http://localhost:8000/api/banking/employee/", {
-          headers: {
-            Authorization: `Bearer ${localStorage.getItem("access_token")}`,
-            "Content-Type": "application/json",
-          },
-        });
-        if (!response.ok) {
-          throw new Error(`HTTP error! Status: ${response.status}`);
+        console.error("Error fetching dashboard summary:", err);
+        if (err.message === "Unauthorized") {
+          setError("Authentication failed. Redirecting to login...");
+          setTimeout(() => navigate("/login"), 1500);
+        } else {
+          setError("Error fetching dashboard summary");
+          setLoading(false);
         }
-
-        const data = await response.json(); // Should be an array
-        console.log("Employee Data:", data); // Optional: for debugging
-
-        setTotalEmployees(data.length);
-      } catch (error) {
-        console.error("Error fetching employee data:", error);
-        setTotalEmployees(0);
       }
     };
-    fetchEmployeeCount();
-  }, []);
 
+    fetchSummary();
+  }, [navigate]);
 
   const menuItems = [
     { label: "Bills", icon: "bi-receipt-cutoff", path: "/year-table" },
@@ -115,37 +70,6 @@ const Dashboard = () => {
     { label: "Income Expenditure", icon: "bi-wallet-fill", path: "/incomeExpenditure" },
   ];
 
-  const verifyToken = useCallback(async () => {
-    const token = localStorage.getItem("access_token");
-    if (!token) {
-      navigate("/login");
-      return;
-    }
-
-    try {
-      const response = await fetch("http://localhost:8000/api/auth/me/", {
-        headers: {
-          Authorization: `Bearer ${token}`,
-          "Content-Type": "application/json",
-        },
-      });
-
-      if (!response.ok) {
-        throw new Error("Unauthorized");
-      }
-
-      setLoading(false);
-    } catch (err) {
-      console.error("Token verification failed:", err);
-      setError("Authentication failed. Redirecting to login...");
-      setTimeout(() => navigate("/login"), 1500);
-    }
-  }, [navigate]);
-
-  useEffect(() => {
-    verifyToken();
-  }, [verifyToken]);
-
   const handleButtonClick = (path) => {
     navigate(path);
   };
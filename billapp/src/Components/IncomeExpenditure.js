@@ -1,24 +1,33 @@
 import React, { useState } from "react";
 import './style/incomeexpenditure.css'
 
+const STATEMENT_API_URL = "http://localhost:8000/api/reports/income-expenditure/";
+
+const formatAmount = (value) => Number(value).toFixed(2);
+
 const IncomeExpenditure = () => {
-    const [data, setData] = useState([]);
-    const [selectedButton, setSelectedButton] = useState("");
+    const [statement, setStatement] = useState(null);
+    const [period, setPeriod] = useState("");
+    const [dateFrom, setDateFrom] = useState("");
+    const [dateTo, setDateTo] = useState("");
     const [loading, setLoading] = useState(false);
 
     const buttons = [
-        { name: "Company Bill", api: "http://localhost:8000/api/banking/buyer/" },
-        { name: "Buyer", api: "http://localhost:8000/api/banking/company/" },
-        { name: "Salary", api: "http://localhost:8000/api/banking/salary/" },
-        { name: "Other", api: "http://localhost:8000/api/banking/other/" },
+        { name: "Monthly", period: "month" },
+        { name: "Quarterly", period: "quarter" },
+        { name: "Yearly", period: "year" },
     ];
 
-    const fetchData = async (apiUrl) => {
+    // The server groups and totals every period; empty dates mean the financial year so far
+    const fetchStatement = async (selectedPeriod) => {
         try {
             setLoading(true);
             const token = localStorage.getItem("access_token");
+            const params = new URLSearchParams({ period: selectedPeriod });
+            if (dateFrom) params.set("date_from", dateFrom);
+            if (dateTo) params.set("date_to", dateTo);
 
-            const response = await fetch(apiUrl, {
+            const response = await fetch(`${STATEMENT_API_URL}?${params}`, {
                 headers: {
                     Authorization: `Bearer ${token}`,
                     "Content-Type": "application/json"
@@ -29,15 +38,19 @@ const IncomeExpenditure = () => {
                 throw new Error("Failed to fetch data");
             }
 
-            const jsonData = await response.json();
-            setData(jsonData);
+            setStatement(await response.json());
         } catch (error) {
             console.error("Error fetching data:", error);
+            setStatement(null);
         } finally {
             setLoading(false);
         }
     };
 
+    const rows = statement ? [...statement.periods, statement.totals] : [];
+    const otherIncomeTypes = [...new Set(rows.flatMap((row) => Object.keys(row.other_income)))];
+    const otherExpenditureTypes = [...new Set(rows.flatMap((row) => Object.keys(row.other_expenditure)))];
+
     return (
         <div className="d-flex" style={{ height: "100vh" }}>
             {/* Left Sidebar */}
@@ -47,18 +60,24 @@ const IncomeExpenditure = () => {
                 <div className="p-3 border-bottom">
                     <h4>Income & Expenditure</h4>
                 </div>
+                <div className="p-3">
+                    <label className="form-label">From</label>
+                    <input type="date" className="form-control mb-2" value={dateFrom} onChange={(e) => setDateFrom(e.target.value)} />
+                    <label className="form-label">To</label>
+                    <input type="date" className="form-control" value={dateTo} onChange={(e) => setDateTo(e.target.value)} />
+                </div>
                 <div className="d-flex flex-column align-items-center justify-content-around flex-grow-1">
                     {buttons.map((button, index) => (
                         <button
                             key={index}
-                            className={`button-sumbit-banking btn-all mb-3 ${selectedButton === button.name ? "active" : ""}`}
+                            className={`button-sumbit-banking btn-all mb-3 ${period === button.period ? "active" : ""}`}
                             onClick={() => {
-                                setSelectedButton(button.name);
-                                fetchData(button.api);
+                                setPeriod(button.period);
+                                fetchStatement(button.period);
                             }}
                             style={{
-                                backgroundColor: selectedButton === button.name ? "#2a75a730" : "#2a75a7",
-                                color: selectedButton === button.name ? "#2a75a7" : "#ffffff",
+                                backgroundColor: period === button.period ? "#2a75a730" : "#2a75a7",
+                                color: period === button.period ? "#2a75a7" : "#ffffff",
                                 height: "70px", width: "80%"
                             }}
                         >
@@ -68,44 +87,44 @@ const IncomeExpenditure = () => {
                 </div>
             </div>
 
-            {/* Right Content */}
             {/* Right Content */}
             <div className="p-4 w-75 mx-auto">
                 {loading ? (
                     <div className="text-center">Loading...</div>
-                ) : data.length > 0 ? (
+                ) : rows.length > 1 ? (
                         <table className="table rounded-4 overflow-hidden table-bordered table-hover table-sm w-100 expenditure-table">
                             <thead >
-                                <tr >    
-                                    {Object.keys(data[0]).map((key) => (
-                                        <th key={key}>{key}</th>
-                                    ))}
+                                <tr >
+                                    <th>Period</th>
+                                    <th>Invoiced</th>
+                                    {otherIncomeTypes.map((type) => <th key={`in-${type}`}>{type} (income)</th>)}
+                                    <th>Total Income</th>
+                                    <th>Salaries</th>
+                                    <th>Buyer Payments</th>
+                                    {otherExpenditureTypes.map((type) => <th key={`out-${type}`}>{type} (expense)</th>)}
+                                    <th>Total Expenditure</th>
+                                    <th>Surplus</th>
+                                    <th>Receipts</th>
                                 </tr>
                             </thead>
                             <tbody>
-                                {data.map((item, index) => (
-                                    <tr key={index}>
-                                        {Object.entries(item).map(([key, value], i) => {
-                                            let displayValue = value;
-
-                                            // Convert valid date to dd/mm/yyyy
-                                            if (typeof value === "string" && /^\d{4}-\d{2}-\d{2}/.test(value)) {
-                                                const date = new Date(value);
-                                                if (!isNaN(date)) {
-                                                    const day = String(date.getDate()).padStart(2, '0');
-                                                    const month = String(date.getMonth() + 1).padStart(2, '0');
-                                                    const year = date.getFullYear();
-                                                    displayValue = `${day}/${month}/${year}`;
-                                                }
-                                            }
-
-                                            return <td key={i}>{displayValue}</td>;
-                                        })}
+                                {rows.map((row) => (
+                                    <tr key={row.period} style={row === statement.totals ? { fontWeight: "bold" } : undefined}>
+                                        <td>{row === statement.totals ? "Total" : row.period}</td>
+                                        <td>{formatAmount(row.invoiced)}</td>
+                                        {otherIncomeTypes.map((type) => <td key={`in-${type}`}>{formatAmount(row.other_income[type] || 0)}</td>)}
+                                        <td>{formatAmount(row.total_income)}</td>
+                                        <td>{formatAmount(row.salaries)}</td>
+                                        <td>{formatAmount(row.buyer_payments)}</td>
+                                        {otherExpenditureTypes.map((type) => <td key={`out-${type}`}>{formatAmount(row.other_expenditure[type] || 0)}</td>)}
+                                        <td>{formatAmount(row.total_expenditure)}</td>
+                                        <td>{formatAmount(row.surplus)}</td>
+                                        <td>{formatAmount(row.receipts)}</td>
                                     </tr>
                                 ))}
                             </tbody>
                         </table>
-                   
+
                 ) : (
                     <div className="text-center mt-5">
                         <img
@@ -114,7 +133,7 @@ const IncomeExpenditure = () => {
                             style={{ width: "120px", opacity: 0.5 }}
                         />
                         <h5 className="mt-3 text-muted">No data to display</h5>
-                        <p className="text-secondary">Select a category from the sidebar to get started.</p>
+                        <p className="text-secondary">Choose a period from the sidebar to get started.</p>
                     </div>
                 )}
             </div>